@@ -0,0 +1,49 @@
+"""
+Compare prefix truncation with salience-based content selection.
+
+Usage:
+    python -m benchmarks.content_selection lecture.txt [budget_tokens]
+
+For the given text file, reports for each strategy the time taken, estimated
+Gemini tokens kept, and vocabulary coverage (share of the document's distinct
+words that survive), a rough proxy for how much of the document is represented:
+  - prefix-16k: the previous truncate_text, first 16,000 characters
+  - salient: src.content_selection.select_salient_text at the token budget
+"""
+
+import re
+import sys
+import time
+
+from src.content_selection import select_salient_text
+from src.text_processing import clean_text, estimate_tokens, truncate_text
+
+DEFAULT_BUDGET = 4000
+
+
+def _vocabulary(text: str) -> set:
+    return set(re.findall(r'[^\W\d_]{3,}', text.lower()))
+
+
+def main(path: str, budget: int):
+    with open(path, encoding='utf-8', errors='replace') as sample:
+        text = clean_text(sample.read())
+    vocabulary = _vocabulary(text)
+    print(f"{len(text)} chars, {estimate_tokens(text)} estimated tokens, {len(vocabulary)} distinct words")
+
+    strategies = [("prefix-16k", lambda t: truncate_text(t, 16000)),
+                  ("salient", lambda t: select_salient_text(t, budget))]
+    print(f"{'strategy':<12} {'time':>10} {'tokens':>8} {'coverage':>9}")
+    for name, strategy in strategies:
+        started = time.perf_counter()
+        kept = strategy(text)
+        elapsed = time.perf_counter() - started
+        coverage = len(_vocabulary(kept) & vocabulary) / max(len(vocabulary), 1)
+        print(f"{name:<12} {elapsed * 1000:>8.1f}ms {estimate_tokens(kept):>8} {coverage:>8.1%}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BUDGET)
@@ -0,0 +1,59 @@
+"""
+Compare HTML main-content extraction strategies.
+
+Usage:
+    python -m benchmarks.html_extraction page1.html page2.html ...
+
+For each saved page, reports average parse time and extracted text length of:
+  - bs4: html.parser + tag decomposition + main/article/div.content lookup
+    (previous implementation; requires beautifulsoup4)
+  - lxml-scored: src.content_extraction.extract_main_text
+"""
+
+import os
+import sys
+import time
+
+from src.content_extraction import extract_main_text
+
+REPEATS = 5
+
+
+def _extract_with_bs4(html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style', 'header', 'footer', 'nav', 'aside', 'ads', 'iframe']):
+        element.decompose()
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content') or soup
+    return ' '.join(main_content.get_text(separator='\n').split())
+
+
+def _time(extract, html: str):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        text = extract(html)
+    return (time.perf_counter() - started) / REPEATS, len(text)
+
+
+def main(paths):
+    methods = [("bs4", _extract_with_bs4), ("lxml-scored", extract_main_text)]
+    print(f"{'file':<32} {'method':<12} {'time':>10} {'chars':>9}")
+    for path in paths:
+        name = os.path.basename(path)[:32]
+        with open(path, encoding='utf-8', errors='replace') as page:
+            html = page.read()
+        for method, extract in methods:
+            try:
+                elapsed, chars = _time(extract, html)
+            except ImportError as e:
+                print(f"{name:<32} {method:<12} {'skipped':>10} ({e})")
+                continue
+            print(f"{name:<32} {method:<12} {elapsed * 1000:>8.1f}ms {chars:>9}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1:])
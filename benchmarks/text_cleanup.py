@@ -0,0 +1,76 @@
+"""
+Compare the text cleanup functions with their previous multi-pass versions.
+
+Usage:
+    python -m benchmarks.text_cleanup [sample.txt ...]
+
+Runs over built-in inputs (1MB+ of lecture-like text, and inputs that are
+pathological for backtracking regexes) plus any files given. Reports:
+  - clean_text: ten uncompiled re.sub passes vs. the single-pass normalizer
+  - pdf-noise: the lazy-dot PDF artefact regex vs. the linear scanner
+"""
+
+import re
+import sys
+import time
+
+from src.text_processing import clean_text
+from src.document_processing import remove_pdf_noise, PDF_APPROVAL_PATTERN
+
+REPEATS = 3
+
+
+def legacy_clean_text(text: str) -> str:
+    text = re.sub(r'[^\w\s\.,!?;:\'\"()\[\]{}\-–—/]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s[_\-–—/]\s', ' ', text)
+    for pattern in [r'/\d+["\']', r'_[a-zA-Z]+<', r'>[a-zA-Z]+\s', r'\s[a-zA-Z]\s', r'[<>]']:
+        text = re.sub(pattern, ' ', text)
+    text = text.strip()
+    return re.sub(r'\s+', ' ', text)
+
+
+def legacy_pdf_cleanup(text: str) -> str:
+    text = re.sub(r'/\d+"\'.*?\w+\s*[<>].*?[\(\),\.\-]', ' ', text)
+    return re.sub(r'KELISHILDI:.*?:', '', text)
+
+
+def pdf_cleanup(text: str) -> str:
+    return PDF_APPROVAL_PATTERN.sub('', remove_pdf_noise(text))
+
+
+def _sample_inputs():
+    paragraph = ("Lecture 3 — Thermodynamics: the first law states that energy is conserved, "
+                 "i.e. ΔU = Q − W. Ma'ruza matni /12\"' bo'yicha • savollar ★ and notes  \n\n"
+                 "Термодинамика — наука о тепловых явлениях, /7' стр. 14 a b c _ / - text.\n")
+    yield "lecture-1.5MB", paragraph * (1_500_000 // len(paragraph))
+    yield "late-angle-bracket", '/1"\'' + "word " * 4000 + "<" + "x" * 4000
+    yield "page-refs-one-line", '/1"\'ab ' * 3000
+    yield "long-digit-run", "/" + "1" * 200_000
+    yield "whitespace-only", " \t\n" * 400_000
+
+
+def _time(func, text: str) -> float:
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        func(text)
+    return (time.perf_counter() - started) / REPEATS
+
+
+def main(paths):
+    inputs = list(_sample_inputs())
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as sample:
+            inputs.append((path[-24:], sample.read()))
+
+    print(f"{'input':<24} {'size':>9} {'function':<12} {'legacy':>10} {'new':>10}")
+    for name, text in inputs:
+        size = f"{len(text) / 1024:.0f}KB"
+        for label, legacy, current in (("clean_text", legacy_clean_text, clean_text),
+                                       ("pdf-noise", legacy_pdf_cleanup, pdf_cleanup)):
+            legacy_time, new_time = _time(legacy, text), _time(current, text)
+            print(f"{name:<24} {size:>9} {label:<12} {legacy_time * 1000:>8.1f}ms {new_time * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
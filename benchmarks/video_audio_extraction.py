@@ -0,0 +1,67 @@
+"""
+Compare audio extraction strategies for video transcription.
+
+Usage:
+    python -m benchmarks.video_audio_extraction lecture1.mp4 lecture2.mp4 ...
+
+For each sample video, reports wall-clock time and output size of:
+  - moviepy: full decode + 192k/44.1kHz MP3 re-encode (previous implementation)
+  - ffmpeg-copy: demux/copy of the existing audio stream
+  - ffmpeg-speech: downmix to mono 16kHz 48k MP3
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+from src.media_tools import extract_audio_track
+from src.video_processing import extract_audio_with_moviepy
+
+
+def _format_size(size_bytes: int) -> str:
+    return f"{size_bytes / 1024 / 1024:.2f} MB"
+
+
+async def _time_ffmpeg(video_path: str, mode: str):
+    started = time.perf_counter()
+    audio_path = await extract_audio_track(video_path, mode=mode)
+    elapsed = time.perf_counter() - started
+    if audio_path is None:
+        return None
+    size = os.path.getsize(audio_path)
+    os.remove(audio_path)
+    return elapsed, size
+
+
+def _time_moviepy(video_path: str):
+    audio_path = tempfile.mktemp(suffix=".mp3")
+    started = time.perf_counter()
+    extract_audio_with_moviepy(video_path, audio_path)
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(audio_path)
+    os.remove(audio_path)
+    return elapsed, size
+
+
+async def main(paths):
+    print(f"{'file':<32} {'method':<14} {'time':>9} {'output':>10}")
+    for path in paths:
+        name = os.path.basename(path)[:32]
+        results = [("moviepy", _time_moviepy(path))]
+        for mode in ("copy", "speech"):
+            results.append((f"ffmpeg-{mode}", await _time_ffmpeg(path, mode)))
+        for method, result in results:
+            if result is None:
+                print(f"{name:<32} {method:<14} {'failed':>9}")
+            else:
+                elapsed, size = result
+                print(f"{name:<32} {method:<14} {elapsed:>8.2f}s {_format_size(size):>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    asyncio.run(main(sys.argv[1:]))
@@ -2,10 +2,7 @@ import os
 import logging
 from datetime import datetime
 import asyncio
-import re
-import tempfile
-import psutil
-from typing import Set, Dict
+from typing import Dict
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from telegram.ext import (
@@ -13,10 +10,19 @@ from telegram.ext import (
     CallbackQueryHandler, filters, ContextTypes
 )
 from telegram.constants import ParseMode
-from telegram.error import BadRequest, TimedOut, NetworkError
+from telegram.error import BadRequest, TimedOut, NetworkError, RetryAfter
 
 from src.prompts_summarize import LANGUAGES, TRANSLATIONS
-from src.llm_service import generate_summary
+from src.llm_service import (generate_summary, stream_summary, local_summary, llm_overloaded, find_similar_summary,
+                             MAX_INPUT_CHARS, llm)
+from src.summary_cache import summary_cache
+from src.duplicate_index import duplicate_index
+from src.http_client import http_client
+from src.browser_pool import browser_pool
+from src.crawl_worker import crawl_worker
+from src.jobs import JobContext, get_active_jobs
+from src.scheduler import job_scheduler, estimate_job_cost, AdmissionRejected
+from src.memory_budget import memory_budget, MemoryBudgetExceeded
 from src.audio_processing import extract_text_from_audio, save_transcription_to_temp_file
 from src.document_processing import *
 from src.web_processing import *
@@ -34,12 +40,14 @@ BASE_FILE_SIZE = {
 
 PREMIUM_MULTIPLIER = 2  # Premium users get 2x the base limit
 
-MAX_MEMORY_PER_FILE = 50 * 1024 * 1024  # 50MB
-MAX_TOTAL_MEMORY = 200 * 1024 * 1024  # 200MB
+# Minimum seconds between progressive edits of a streaming summary (Telegram rate-limits edits)
+STREAM_EDIT_INTERVAL = 1.5
 
-# Track resources
-active_tasks: Set[asyncio.Task] = set()
-temp_files: Set[str] = set()
+# Per-request deadlines (seconds)
+CONTENT_JOB_TIMEOUT = 15 * 60
+SUMMARY_JOB_TIMEOUT = 10 * 60
+# After this long without a complete LLM summary the local extractive summary is sent instead
+LLM_SUMMARY_TIMEOUT = 2 * 60
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
@@ -53,41 +61,62 @@ BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN_SIMPLELEARNING", "")
 LANGUAGE, CONTENT, PROCESSING, STYLE = range(4)
 
 # Resource management functions
-def check_memory_usage() -> float:
-    """Check current memory usage in MB"""
-    process = psutil.Process(os.getpid())
-    memory_info = process.memory_info()
-    return memory_info.rss / 1024 / 1024  # Memory usage in MB
+async def edit_message_text_safely(message: Message, text: str) -> bool:
+    """Edit a message in place, returning False if Telegram rejects the edit"""
+    try:
+        await message.edit_text(text, parse_mode=ParseMode.MARKDOWN)
+        return True
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            return True
+        logger.warning(f"Could not edit message: {e}")
+        return False
+    except (RetryAfter, TimedOut, NetworkError) as e:
+        logger.warning(f"Skipping message edit: {e}")
+        return False
 
 
-async def cleanup_resources() -> None:
-    """Clean up all temporary resources"""
-    # Clean up temporary files
-    for temp_file in temp_files.copy():
-        try:
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-            temp_files.remove(temp_file)
-        except Exception as e:
-            logger.error(f"Error removing temp file {temp_file}: {e}")
-    
-    # Cancel and clean up background tasks
-    for task in active_tasks.copy():
-        try:
-            task.cancel()
-            await task
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            logger.error(f"Error cancelling task: {e}")
-        finally:
-            active_tasks.remove(task)
+async def wait_for_job_slot(message: Message, job: JobContext, is_premium: bool,
+                            file_type: str, file_size: int) -> bool:
+    """Wait for a scheduler slot and a memory reservation, showing the queue position while waiting.
 
-def create_temp_file(suffix: str = None) -> str:
-    """Create a temporary file and track it"""
-    temp_path = tempfile.mktemp(suffix=suffix)
-    temp_files.add(temp_path)
-    return temp_path
+    Returns False (after telling the user) if the queue is too full or the memory cannot be reserved.
+    """
+    queue_message = None
+
+    async def on_queued(position: int) -> None:
+        nonlocal queue_message
+        queue_message = await message.reply_text(
+            f"⏳ *Queued*\n\nThe bot is busy right now. Your request is number {position} in line "
+            "and will start automatically.",
+            parse_mode=ParseMode.MARKDOWN
+        )
+
+    try:
+        await job_scheduler.admit(job, is_premium, estimate_job_cost(file_type, file_size), on_queued)
+        await memory_budget.reserve(job, file_type, file_size)
+        return True
+    except MemoryBudgetExceeded as e:
+        logger.warning(f"Rejecting job {job.id}: {e}")
+        await message.reply_text(
+            "⚠️ *Server Busy*\n\nThere is not enough memory to process this file right now. "
+            "Please try again later or with a smaller file.",
+            parse_mode=ParseMode.MARKDOWN
+        )
+        return False
+    except AdmissionRejected:
+        await message.reply_text(
+            "⚠️ *Server Busy*\n\nToo many requests are waiting right now. Please try again in a few minutes."
+            + ("" if is_premium else "\n\n💎 *Premium users get priority processing!*"),
+            parse_mode=ParseMode.MARKDOWN
+        )
+        return False
+    finally:
+        if queue_message:
+            try:
+                await queue_message.delete()
+            except Exception as e:
+                logger.error(f"Error deleting queue message: {e}")
 
 def get_file_size_limit(file_type: str, is_premium: bool) -> int:
     base_limit = BASE_FILE_SIZE.get(file_type, 0)
@@ -99,11 +128,7 @@ def get_file_size_limit(file_type: str, is_premium: bool) -> int:
 
 async def check_user_exists(user_id: int) -> bool:
     try:
-        response = supabase.table('simplelearn_users') \
-            .select('user_id') \
-            .eq('user_id', str(user_id)) \
-            .execute()
-        return len(response.data) > 0
+        return await profile_store.get_profile(user_id) is not None
     except Exception as e:
         logger.error(f"Error checking simplelearn user existence: {e}")
         return False
@@ -128,10 +153,19 @@ async def create_new_user (
             'is_premium': False
         }).execute()
         logger.info(f"Created new simplelearn user with ID {user_id}")
+        if response.data:
+            stats_aggregator.record_new_user()
         return bool(response.data)
     except Exception as e:
+        if getattr(e, 'code', None) == '23505' or 'duplicate key' in str(e):
+            # The row was created meanwhile, e.g. by the batched activity upsert; keep the chosen language
+            logger.info(f"Simplelearn user {user_id} already exists, updating language")
+            await update_user_language(user_id, language)
+            return True
         logger.error(f"Error creating new simplelearn user: {e}")
         return False
+    finally:
+        profile_store.invalidate(user_id)
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user = update.effective_user
@@ -160,6 +194,13 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         total_processed_files = await get_total_processed_files()
         total_processed_files += 20  # Add the initial count
         todays_active_users = await get_todays_active_users()
+        todays_files = stats_aggregator.today()
+        cache_stats = summary_cache.get_stats()
+        duplicate_stats = duplicate_index.get_stats()
+        llm_stats = llm.get_stats()
+        jobs = get_active_jobs()
+        queue_stats = job_scheduler.get_stats()
+        memory_stats = memory_budget.get_stats()
 
         admin_message = (
             "👑 *Admin Dashboard*\n\n"
@@ -168,7 +209,24 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             f"📝 Total Processed Files: {total_processed_files}\n\n"
             "📈 *Statistics:*\n"
             f"• Average files per user: {total_processed_files/total_users:.1f}\n"
-            f"• Success rate: {await get_success_rate():.1f}%"
+            f"• Success rate: {await get_success_rate():.1f}%\n"
+            f"• Files since midnight: {todays_files.total} (avg {todays_files.average_processing_time:.1f}s)\n\n"
+            "🗄 *Summary Cache:*\n"
+            f"• Hits: {cache_stats['hits']} (memory {cache_stats['memory_hits']}, disk {cache_stats['disk_hits']})\n"
+            f"• Misses: {cache_stats['misses']}\n"
+            f"• Hit rate: {cache_stats['hit_rate']:.1f}%\n"
+            f"• Near-duplicates: {duplicate_stats['matches']}/{duplicate_stats['lookups']} lookups, "
+            f"{duplicate_stats['documents']} documents indexed\n\n"
+            "🤖 *LLM Requests:*\n"
+            f"• Active: {llm_stats['active']}, waiting: {llm_stats['waiting']}\n"
+            f"• Coalesced: {llm_stats['coalesced']}\n\n"
+            "🚦 *Job Queue:*\n"
+            f"• Running: {queue_stats['running']}\n"
+            f"• Waiting: {queue_stats['queued_premium']} premium, {queue_stats['queued_free']} free\n"
+            f"• Memory reserved: {memory_stats['reserved_mb']:.0f}/{memory_stats['capacity_mb']:.0f}MB "
+            f"({memory_stats['waiting']} waiting)\n\n"
+            f"⚙️ *In-flight Jobs:* {len(jobs)}"
+            + "".join(f"\n• #{j['id']} {j['kind']} ({j['elapsed']:.0f}s)" for j in jobs[:10])
         )
         await update.message.reply_text(
             text=admin_message,
@@ -407,433 +465,407 @@ async def handle_content(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     extracted_text = ""
     status_message = None
-    typing_task = None
     start_time = datetime.now()
     
-    try:
-        # Check memory usage before processing
-        current_memory = check_memory_usage()
-        if current_memory > MAX_TOTAL_MEMORY:
-            await update.message.reply_text(
-                f"⚠️ *System Memory Limit Exceeded*\n\n"
-                f"Current memory usage: {current_memory:.1f}MB\n"
-                f"Maximum allowed: {MAX_TOTAL_MEMORY/1024/1024:.1f}MB\n\n"
-                "Please try again later or with a smaller file.",
-                parse_mode=ParseMode.MARKDOWN
-            )
-            return CONTENT
-        
-        # Handle video files
-        if update.message.video:
-            print("Handling video message")
-            logger.info("Video message detected")
+    async with JobContext(user.id, "content", timeout=CONTENT_JOB_TIMEOUT) as job:
+        try:
+            # Handle video files
+            if update.message.video:
+                print("Handling video message")
+                logger.info("Video message detected")
             
-            video_size = update.message.video.file_size
-            max_video_size = get_file_size_limit('video', is_premium)
+                video_size = update.message.video.file_size
+                max_video_size = get_file_size_limit('video', is_premium)
             
-            if video_size > max_video_size:
-                await update.message.reply_text(
-                    f"⚠️ *Video Too Large*\n\nThe video file is {video_size / 1024 / 1024:.2f} MB, which exceeds the maximum allowed size of {max_video_size / 1024 / 1024:.0f} MB. Please upload a smaller video.",
-                    parse_mode=ParseMode.MARKDOWN
-                )
-                return CONTENT
+                if video_size > max_video_size:
+                    await update.message.reply_text(
+                        f"⚠️ *Video Too Large*\n\nThe video file is {video_size / 1024 / 1024:.2f} MB, which exceeds the maximum allowed size of {max_video_size / 1024 / 1024:.0f} MB. Please upload a smaller video.",
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                    return CONTENT
             
-            if not ELEVENLABS_API_KEY:
-                await update.message.reply_text(
-                    "⚠️ API Key Missing\nAudio/video transcription is not available. Please contact the bot administrator.",
+                if not ELEVENLABS_API_KEY:
+                    await update.message.reply_text(
+                        "⚠️ API Key Missing\nAudio/video transcription is not available. Please contact the bot administrator.",
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                    return CONTENT
+
+                if not await wait_for_job_slot(update.message, job, is_premium, 'video', video_size):
+                    return CONTENT
+                
+                status_message = await update.message.reply_text(
+                    get_translation(language, "processing_video"),
                     parse_mode=ParseMode.MARKDOWN
                 )
-                return CONTENT
-                
-            status_message = await update.message.reply_text(
-                get_translation(language, "processing_video"),
-                parse_mode=ParseMode.MARKDOWN
-            )
             
-            try:
-                video = update.message.video
-                file = await context.bot.get_file(video.file_id)
+                try:
+                    video = update.message.video
+                    file = await context.bot.get_file(video.file_id)
                 
-                # Create temporary file for video
-                video_path = create_temp_file(suffix='.mp4')
-                await file.download_to_drive(video_path)
+                    # Create temporary file for video
+                    video_path = job.create_temp_file(suffix='.mp4')
+                    await file.download_to_drive(video_path)
                 
-                from src.video_processing import process_video_file
+                    from src.video_processing import process_video_file
                 
-                # Start typing indicator task
-                async def keep_typing():
-                    while True:
-                        await update.message.reply_chat_action("typing")
-                        await asyncio.sleep(4)
+                    # Start typing indicator task
+                    async def keep_typing():
+                        while True:
+                            await update.message.reply_chat_action("typing")
+                            await asyncio.sleep(4)
                 
-                typing_task = asyncio.create_task(keep_typing())
-                active_tasks.add(typing_task)
+                    job.spawn(keep_typing())
                 
-                # Read video file in chunks
-                with open(video_path, 'rb') as f:
-                    video_bytes = f.read()
+                    # Hand the downloaded file straight to the extractor
+                    success, message, transcript_text = await job.run(process_video_file(
+                        video_path, 
+                        ELEVENLABS_API_KEY,
+                        output_format="mp3"
+                    ))
                 
-                success, message, transcript_text = await process_video_file(
-                    video_bytes, 
-                    ELEVENLABS_API_KEY,
-                    output_format="mp3"
-                )
+                    if not success:
+                        await update.message.reply_text(
+                            f"❌ *Video Processing Error*\n\n{message}",
+                            parse_mode=ParseMode.MARKDOWN
+                        )
+                        return CONTENT
                 
-                if not success:
-                    await update.message.reply_text(
-                        f"❌ *Video Processing Error*\n\n{message}",
-                        parse_mode=ParseMode.MARKDOWN
+                    if not transcript_text:
+                        await update.message.reply_text(
+                            "❌ *No Text Extracted*\n\nCould not extract any text from the video. Please try a different video.",
+                            parse_mode=ParseMode.MARKDOWN
+                        )
+                        return CONTENT
+                    
+                    extracted_text = transcript_text
+                
+                    # Track the processed file
+                    processing_time = int((datetime.now() - start_time).total_seconds())
+                    await track_processed_file(
+                        user_id=user.id,
+                        file_type='video',
+                        file_size=video_size,
+                        processing_time=processing_time,
+                        status='success'
                     )
-                    return CONTENT
                 
-                if not transcript_text:
+                except Exception as e:
+                    logger.error(f"Error processing video: {e}")
                     await update.message.reply_text(
-                        "❌ *No Text Extracted*\n\nCould not extract any text from the video. Please try a different video.",
+                        f"❌ *Error Processing Video*\n\nAn error occurred: {str(e)}",
                         parse_mode=ParseMode.MARKDOWN
                     )
                     return CONTENT
-                    
-                extracted_text = transcript_text
-                
-                # Track the processed file
-                processing_time = int((datetime.now() - start_time).total_seconds())
-                await track_processed_file(
-                    user_id=user.id,
-                    file_type='video',
-                    file_size=video_size,
-                    processing_time=processing_time,
-                    status='success'
-                )
-                
-            except Exception as e:
-                logger.error(f"Error processing video: {e}")
-                await update.message.reply_text(
-                    f"❌ *Error Processing Video*\n\nAn error occurred: {str(e)}",
-                    parse_mode=ParseMode.MARKDOWN
-                )
-                return CONTENT
         
-        # Handle audio files or voice messages
-        elif update.message.voice or update.message.audio:
-            print("Handling audio message")
-            logger.info("Audio message detected")
+            # Handle audio files or voice messages
+            elif update.message.voice or update.message.audio:
+                print("Handling audio message")
+                logger.info("Audio message detected")
             
-            audio_obj = update.message.voice or update.message.audio
-            audio_size = audio_obj.file_size
-            max_audio_size = get_file_size_limit('audio', is_premium)
+                audio_obj = update.message.voice or update.message.audio
+                audio_size = audio_obj.file_size
+                max_audio_size = get_file_size_limit('audio', is_premium)
             
-            if audio_size > max_audio_size:
-                await update.message.reply_text(
-                    f"⚠️ *Audio Too Large*\n\nThe audio file is {audio_size / 1024 / 1024:.2f} MB, which exceeds the maximum allowed size of {max_audio_size / 1024 / 1024:.0f} MB. Please upload a smaller audio file.",
-                    parse_mode=ParseMode.MARKDOWN
-                )
-                return CONTENT
+                if audio_size > max_audio_size:
+                    await update.message.reply_text(
+                        f"⚠️ *Audio Too Large*\n\nThe audio file is {audio_size / 1024 / 1024:.2f} MB, which exceeds the maximum allowed size of {max_audio_size / 1024 / 1024:.0f} MB. Please upload a smaller audio file.",
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                    return CONTENT
             
-            if not ELEVENLABS_API_KEY:
-                await update.message.reply_text(
-                    "⚠️ API Key Missing\nAudio/video transcription is not available. Please contact the bot administrator.",
+                if not ELEVENLABS_API_KEY:
+                    await update.message.reply_text(
+                        "⚠️ API Key Missing\nAudio/video transcription is not available. Please contact the bot administrator.",
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                    return CONTENT
+
+                if not await wait_for_job_slot(update.message, job, is_premium, 'audio', audio_size):
+                    return CONTENT
+                    
+                status_message = await update.message.reply_text(
+                    get_translation(language, "transcribing"),
                     parse_mode=ParseMode.MARKDOWN
                 )
-                return CONTENT
-                    
-            status_message = await update.message.reply_text(
-                get_translation(language, "transcribing"),
-                parse_mode=ParseMode.MARKDOWN
-            )
             
-            try:
-                file_obj = update.message.voice or update.message.audio
-                file = await context.bot.get_file(file_obj.file_id)
+                try:
+                    file_obj = update.message.voice or update.message.audio
+                    file = await context.bot.get_file(file_obj.file_id)
+                
+                    # Create temporary file for audio, keeping Telegram's extension (voice notes are .oga)
+                    audio_ext = os.path.splitext(file.file_path or "")[1].lower() or '.mp3'
+                    audio_path = job.create_temp_file(suffix=audio_ext)
+                    await file.download_to_drive(audio_path)
                 
-                # Create temporary file for audio
-                audio_path = create_temp_file(suffix='.mp3')
-                await file.download_to_drive(audio_path)
+                    # Start typing indicator task
+                    async def keep_typing():
+                        while True:
+                            await update.message.reply_chat_action("typing")
+                            await asyncio.sleep(4)
                 
-                # Start typing indicator task
-                async def keep_typing():
-                    while True:
-                        await update.message.reply_chat_action("typing")
-                        await asyncio.sleep(4)
+                    job.spawn(keep_typing())
                 
-                typing_task = asyncio.create_task(keep_typing())
-                active_tasks.add(typing_task)
+                    # Stream the downloaded file to the transcription API
+                    success, message, transcript_text = await job.run(extract_text_from_audio(
+                        audio_path, 
+                        ELEVENLABS_API_KEY
+                    ))
                 
-                # Read audio file in chunks
-                with open(audio_path, 'rb') as f:
-                    audio_bytes = f.read()
+                    if not success:
+                        await update.message.reply_text(
+                            f"❌ *Transcription Error*\n\n{message}",
+                            parse_mode=ParseMode.MARKDOWN
+                        )
+                        return CONTENT
                 
-                success, message, transcript_text = await extract_text_from_audio(
-                    audio_bytes, 
-                    ELEVENLABS_API_KEY
-                )
+                    if not transcript_text:
+                        await update.message.reply_text(
+                            "❌ *No Text Extracted*\n\nCould not extract any text from the audio. Please try a different audio file.",
+                            parse_mode=ParseMode.MARKDOWN
+                        )
+                        return CONTENT
+                    
+                    extracted_text = transcript_text
                 
-                if not success:
+                    # Track the processed file
+                    processing_time = int((datetime.now() - start_time).total_seconds())
+                    await track_processed_file(
+                        user_id=user.id,
+                        file_type='audio',
+                        file_size=audio_size,
+                        processing_time=processing_time,
+                        status='success'
+                    )
+                
+                except Exception as e:
+                    logger.error(f"Error processing audio: {e}")
                     await update.message.reply_text(
-                        f"❌ *Transcription Error*\n\n{message}",
+                        f"❌ *Error Processing Audio*\n\nAn error occurred: {str(e)}",
                         parse_mode=ParseMode.MARKDOWN
                     )
                     return CONTENT
-                
-                if not transcript_text:
+        
+            # Handle document files
+            elif update.message.document:
+                document = update.message.document
+                max_doc_size = get_file_size_limit('document', is_premium)
+                file_name = document.file_name if document.file_name else "unnamed"
+                file_ext = os.path.splitext(file_name)[1].lower() if file_name else ""
+            
+                # Log document details for debugging
+                logger.info(f"Processing document: {file_name} ({file_ext}) - Size: {document.file_size} bytes")
+            
+                if document.file_size > max_doc_size:
+                    size_mb = document.file_size / 1024 / 1024
+                    max_size_mb = max_doc_size / 1024 / 1024
                     await update.message.reply_text(
-                        "❌ *No Text Extracted*\n\nCould not extract any text from the audio. Please try a different audio file.",
+                        f"❌ *File Size Limit Exceeded*\n\n"
+                        f"📄 File: `{file_name}`\n"
+                        f"📊 Size: {size_mb:.1f}MB\n"
+                        f"⚖️ Max allowed: {max_size_mb:.1f}MB\n\n"
+                        "💡 *Please try:*\n"
+                        "• Compressing the file\n"
+                        "• Splitting it into smaller parts\n"
+                        "• Using a smaller document\n\n"
+                        f"💎 *Premium users get {PREMIUM_MULTIPLIER}x larger file limits!*",
                         parse_mode=ParseMode.MARKDOWN
                     )
                     return CONTENT
-                    
-                extracted_text = transcript_text
-                
-                # Track the processed file
-                processing_time = int((datetime.now() - start_time).total_seconds())
-                await track_processed_file(
-                    user_id=user.id,
-                    file_type='audio',
-                    file_size=audio_size,
-                    processing_time=processing_time,
-                    status='success'
-                )
-                
-            except Exception as e:
-                logger.error(f"Error processing audio: {e}")
-                await update.message.reply_text(
-                    f"❌ *Error Processing Audio*\n\nAn error occurred: {str(e)}",
-                    parse_mode=ParseMode.MARKDOWN
-                )
-                return CONTENT
-        
-        # Handle document files
-        elif update.message.document:
-            document = update.message.document
-            max_doc_size = get_file_size_limit('document', is_premium)
-            file_name = document.file_name if document.file_name else "unnamed"
-            file_ext = os.path.splitext(file_name)[1].lower() if file_name else ""
-            
-            # Log document details for debugging
-            logger.info(f"Processing document: {file_name} ({file_ext}) - Size: {document.file_size} bytes")
-            
-            if document.file_size > max_doc_size:
-                size_mb = document.file_size / 1024 / 1024
-                max_size_mb = max_doc_size / 1024 / 1024
-                await update.message.reply_text(
-                    f"❌ *File Size Limit Exceeded*\n\n"
-                    f"📄 File: `{file_name}`\n"
-                    f"📊 Size: {size_mb:.1f}MB\n"
-                    f"⚖️ Max allowed: {max_size_mb:.1f}MB\n\n"
-                    "💡 *Please try:*\n"
-                    "• Compressing the file\n"
-                    "• Splitting it into smaller parts\n"
-                    "• Using a smaller document\n\n"
-                    f"💎 *Premium users get {PREMIUM_MULTIPLIER}x larger file limits!*",
-                    parse_mode=ParseMode.MARKDOWN
-                )
-                return CONTENT
             
-            if file_ext not in ['.pdf', '.docx', '.doc', '.txt']:
-                await update.message.reply_text(
-                    f"❌ *Unsupported File Format*\n\n"
+                if file_ext not in ['.pdf', '.docx', '.doc', '.txt']:
+                    await update.message.reply_text(
+                        f"❌ *Unsupported File Format*\n\n"
+                        f"📄 File: `{file_name}`\n"
+                        f"📎 Format: `{file_ext}`\n\n"
+                        "✅ *Supported formats:*\n"
+                        "• PDF (`.pdf`)\n"
+                        "• Word (`.docx`, `.doc`)\n"
+                        "• Text (`.txt`)\n\n"
+                        "Please convert your file to one of these formats and try again.",
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                    return CONTENT
+
+                if not await wait_for_job_slot(update.message, job, is_premium, 'document', document.file_size):
+                    return CONTENT
+            
+                status_message = await update.message.reply_text(
+                    f"🔄 *Processing Document*\n\n"
                     f"📄 File: `{file_name}`\n"
-                    f"📎 Format: `{file_ext}`\n\n"
-                    "✅ *Supported formats:*\n"
-                    "• PDF (`.pdf`)\n"
-                    "• Word (`.docx`, `.doc`)\n"
-                    "• Text (`.txt`)\n\n"
-                    "Please convert your file to one of these formats and try again.",
+                    "Please wait...",
                     parse_mode=ParseMode.MARKDOWN
                 )
-                return CONTENT
             
-            status_message = await update.message.reply_text(
-                f"🔄 *Processing Document*\n\n"
-                f"📄 File: `{file_name}`\n"
-                "Please wait...",
-                parse_mode=ParseMode.MARKDOWN
-            )
-            
-            try:
-                file = await context.bot.get_file(document.file_id)
-                doc_path = create_temp_file(suffix=file_ext)
-                await file.download_to_drive(doc_path)
+                try:
+                    file = await context.bot.get_file(document.file_id)
+                    doc_path = job.create_temp_file(suffix=file_ext)
+                    await file.download_to_drive(doc_path)
                 
-                # Start typing indicator
-                async def keep_typing():
-                    while True:
-                        await update.message.reply_chat_action("typing")
-                        await asyncio.sleep(4)
+                    # Start typing indicator
+                    async def keep_typing():
+                        while True:
+                            await update.message.reply_chat_action("typing")
+                            await asyncio.sleep(4)
                 
-                typing_task = asyncio.create_task(keep_typing())
-                active_tasks.add(typing_task)
+                    job.spawn(keep_typing())
                 
-                with open(doc_path, 'rb') as f:
-                    file_bytes = f.read()
+                    # Extractors read from the downloaded file directly
+                    if file_ext == '.pdf':
+                        extracted_text = await job.run(extract_text_from_pdf(doc_path))
+                    elif file_ext in ['.docx', '.doc']:
+                        extracted_text = await job.run(extract_text_from_docx(doc_path))
+                    elif file_ext == '.txt':
+                        extracted_text = await job.run(extract_text_from_txt(doc_path))
                 
-                if file_ext == '.pdf':
-                    extracted_text = await extract_text_from_pdf(file_bytes)
-                elif file_ext in ['.docx', '.doc']:
-                    extracted_text = await extract_text_from_docx(file_bytes)
-                elif file_ext == '.txt':
-                    extracted_text = await extract_text_from_txt(file_bytes)
+                    if not extracted_text or len(extracted_text.strip()) == 0:
+                        await update.message.reply_text(
+                            f"❌ *No Text Found*\n\n"
+                            f"📄 File: `{file_name}`\n\n"
+                            "The document appears to be empty or contains no extractable text.\n\n"
+                            "💡 *Please check:*\n"
+                            "• The file is not password protected\n"
+                            "• The file contains actual text (not just images)\n"
+                            "• The file is not corrupted",
+                            parse_mode=ParseMode.MARKDOWN
+                        )
+                        return CONTENT
+                
+                    # Track successful processing
+                    processing_time = int((datetime.now() - start_time).total_seconds())
+                    await track_processed_file(
+                        user_id=user.id,
+                        file_type='document',
+                        file_size=document.file_size,
+                        processing_time=processing_time,
+                        status='success'
+                    )
+                
+                except Exception as e:
+                    logger.error(f"Error processing document {file_name}: {str(e)}")
+                    error_message = str(e)
+                
+                    # Track failed processing
+                    processing_time = int((datetime.now() - start_time).total_seconds())
+                    await track_processed_file(
+                        user_id=user.id,
+                        file_type='document',
+                        file_size=document.file_size,
+                        processing_time=processing_time,
+                        status='error',
+                        error_message=error_message
+                    )
                 
-                if not extracted_text or len(extracted_text.strip()) == 0:
                     await update.message.reply_text(
-                        f"❌ *No Text Found*\n\n"
-                        f"📄 File: `{file_name}`\n\n"
-                        "The document appears to be empty or contains no extractable text.\n\n"
-                        "💡 *Please check:*\n"
-                        "• The file is not password protected\n"
-                        "• The file contains actual text (not just images)\n"
-                        "• The file is not corrupted",
+                        f"❌ *Error Processing Document*\n\n"
+                        f"📄 File: `{file_name}`\n"
+                        f"❗ Error: {error_message}\n\n"
+                        "💡 *Please try:*\n"
+                        "• Using a different document\n"
+                        "• Checking if the file is corrupted\n"
+                        "• Converting to a different format\n"
+                        "• Making sure the file isn't password protected",
                         parse_mode=ParseMode.MARKDOWN
                     )
                     return CONTENT
-                
-                # Track successful processing
+        
+            # Handle text messages
+            elif update.message.text:
+                text = update.message.text.strip()
+                if len(text) < 50:
+                    await update.message.reply_text(
+                        get_translation(language, "text_too_short"),
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                    return CONTENT
+            
+                # Track the text processing
                 processing_time = int((datetime.now() - start_time).total_seconds())
                 await track_processed_file(
                     user_id=user.id,
-                    file_type='document',
-                    file_size=document.file_size,
+                    file_type='text',
+                    file_size=len(text.encode('utf-8')),  
                     processing_time=processing_time,
                     status='success'
                 )
-                
-            except Exception as e:
-                logger.error(f"Error processing document {file_name}: {str(e)}")
-                error_message = str(e)
-                
-                # Track failed processing
-                processing_time = int((datetime.now() - start_time).total_seconds())
-                await track_processed_file(
-                    user_id=user.id,
-                    file_type='document',
-                    file_size=document.file_size,
-                    processing_time=processing_time,
-                    status='error',
-                    error_message=error_message
-                )
-                
-                await update.message.reply_text(
-                    f"❌ *Error Processing Document*\n\n"
-                    f"📄 File: `{file_name}`\n"
-                    f"❗ Error: {error_message}\n\n"
-                    "💡 *Please try:*\n"
-                    "• Using a different document\n"
-                    "• Checking if the file is corrupted\n"
-                    "• Converting to a different format\n"
-                    "• Making sure the file isn't password protected",
-                    parse_mode=ParseMode.MARKDOWN
-                )
-                return CONTENT
-        
-        # Handle text messages
-        elif update.message.text:
-            text = update.message.text.strip()
-            if len(text) < 50:
-                await update.message.reply_text(
-                    get_translation(language, "text_too_short"),
-                    parse_mode=ParseMode.MARKDOWN
-                )
-                return CONTENT
-            
-            # Track the text processing
-            processing_time = int((datetime.now() - start_time).total_seconds())
-            await track_processed_file(
-                user_id=user.id,
-                file_type='text',
-                file_size=len(text.encode('utf-8')),  
-                processing_time=processing_time,
-                status='success'
-            )
             
-            extracted_text = text
-            context.user_data['extracted_text'] = extracted_text
+                extracted_text = text
+                context.user_data['extracted_text'] = extracted_text
             
-            keyboard = [
-                [InlineKeyboardButton("✅ Summarize", callback_data="process_summarize")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+                keyboard = [
+                    [InlineKeyboardButton("✅ Summarize", callback_data="process_summarize")]
+                ]
+                reply_markup = InlineKeyboardMarkup(keyboard)
             
-            preview = extracted_text[:150] + "..." if len(extracted_text) > 150 else extracted_text
+                preview = extracted_text[:150] + "..." if len(extracted_text) > 150 else extracted_text
             
-            await update.message.reply_text(
-                f"✅ *{get_translation(language, 'text_successfully_processed')}*\n\n"
-                f"*Preview:*\n```\n{preview}\n```\n\n"
-                f"{get_translation(language, 'would_you_like_summary')}",
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
-            )
+                await update.message.reply_text(
+                    f"✅ *{get_translation(language, 'text_successfully_processed')}*\n\n"
+                    f"*Preview:*\n```\n{preview}\n```\n\n"
+                    f"{get_translation(language, 'would_you_like_summary')}",
+                    parse_mode=ParseMode.MARKDOWN,
+                    reply_markup=reply_markup
+                )
             
-            return PROCESSING
+                return PROCESSING
         
-        # Process the extracted text
-        if extracted_text:
-            extracted_text = re.sub(r'\s+', ' ', extracted_text).strip()
+            # Process the extracted text
+            if extracted_text:
+                extracted_text = normalize_whitespace(extracted_text)
             
-            if len(extracted_text) < 50:
-                await update.message.reply_text(
-                    "⚠️ *Content too short*\n\nThe extracted content is too short to create a meaningful summary. Please provide more content.",
-                    parse_mode=ParseMode.MARKDOWN
-                )
-                return CONTENT
+                if len(extracted_text) < 50:
+                    await update.message.reply_text(
+                        "⚠️ *Content too short*\n\nThe extracted content is too short to create a meaningful summary. Please provide more content.",
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                    return CONTENT
                 
-            context.user_data['extracted_text'] = await truncate_text(extracted_text)
+                context.user_data['extracted_text'] = truncate_text(extracted_text, MAX_INPUT_CHARS)
             
-            keyboard = [
-                [InlineKeyboardButton("✅ Summarize", callback_data="process_summarize")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+                keyboard = [
+                    [InlineKeyboardButton("✅ Summarize", callback_data="process_summarize")]
+                ]
+                reply_markup = InlineKeyboardMarkup(keyboard)
             
-            preview = extracted_text[:150] + "..." if len(extracted_text) > 150 else extracted_text
+                preview = extracted_text[:150] + "..." if len(extracted_text) > 150 else extracted_text
             
-            await update.message.reply_text(
-                f"✅ *Content Successfully Extracted*\n\n"
-                f"*Preview:*\n```\n{preview}\n```\n\n"
-                "Would you like me to create a summary of this content?",
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
-            )
+                await update.message.reply_text(
+                    f"✅ *Content Successfully Extracted*\n\n"
+                    f"*Preview:*\n```\n{preview}\n```\n\n"
+                    "Would you like me to create a summary of this content?",
+                    parse_mode=ParseMode.MARKDOWN,
+                    reply_markup=reply_markup
+                )
             
-            return PROCESSING
-        
-        await update.message.reply_text(
-            get_translation(language, "error"),
-            parse_mode=ParseMode.MARKDOWN
-        )
-        return CONTENT
-        
-    except Exception as e:
-        logger.error(f"Error processing content: {e}")
-        # Track the failed file processing
-        processing_time = int((datetime.now() - start_time).total_seconds())
-        await track_processed_file(
-            user_id=user.id,
-            file_type='unknown',
-            file_size=0,
-            processing_time=processing_time,
-            status='error',
-            error_message=str(e)
-        )
-        raise
+                return PROCESSING
         
-    finally:
-        # Clean up resources
-        if status_message:
-            try:
-                await status_message.delete()
-            except Exception as e:
-                logger.error(f"Error deleting status message: {e}")
+            await update.message.reply_text(
+                get_translation(language, "error"),
+                parse_mode=ParseMode.MARKDOWN
+            )
+            return CONTENT
         
-        if typing_task:
-            try:
-                typing_task.cancel()
-                await typing_task
-            except asyncio.CancelledError:
-                pass
-            except Exception as e:
-                logger.error(f"Error cancelling typing task: {e}")
-            finally:
-                active_tasks.discard(typing_task)
+        except Exception as e:
+            logger.error(f"Error processing content: {e}")
+            # Track the failed file processing
+            processing_time = int((datetime.now() - start_time).total_seconds())
+            await track_processed_file(
+                user_id=user.id,
+                file_type='unknown',
+                file_size=0,
+                processing_time=processing_time,
+                status='error',
+                error_message=str(e)
+            )
+            raise
         
-        await cleanup_resources()
+        finally:
+            # Clean up resources
+            if status_message:
+                try:
+                    await status_message.delete()
+                except Exception as e:
+                    logger.error(f"Error deleting status message: {e}")
 
 async def process_content(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
@@ -842,91 +874,175 @@ async def process_content(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user = query.from_user
     language = await get_user_language(user.id)
     status_message = None
-    typing_task = None
     
-    try:
-        if query.data == "process_summarize":
-            # Check memory usage before processing
-            if check_memory_usage() > MAX_TOTAL_MEMORY:
-                await query.message.reply_text(
-                    "⚠️ *Memory Limit Exceeded*\n\nPlease try again later or with a smaller file.",
-                    parse_mode=ParseMode.MARKDOWN
-                )
-                return CONTENT
+    async with JobContext(user.id, "summary", timeout=SUMMARY_JOB_TIMEOUT) as job:
+        try:
+            if query.data in ("process_summarize", "process_summarize_fresh"):
+                extracted_text = context.user_data.get('extracted_text', '')
             
-            status_message = await query.message.reply_text(
-                get_translation(language, "summarizing"),
-                parse_mode=ParseMode.MARKDOWN
-            )
+                # Offer the summary of a near-identical document instead of paying for a new one
+                similar = None
+                if extracted_text and query.data == "process_summarize":
+                    try:
+                        similar = await find_similar_summary(extracted_text, language, user_id=user.id)
+                    except Exception as e:
+                        logger.error(f"Error looking up similar documents: {e}")
+                if similar:
+                    existing_summary, similarity = similar
+                    await query.message.reply_text(
+                        get_translation(language, "similar_summary_found").format(similarity=similarity),
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                    await query.message.reply_text(
+                        existing_summary,
+                        parse_mode=ParseMode.MARKDOWN,
+                        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton(
+                            get_translation(language, "summarize_anyway"), callback_data="process_summarize_fresh"
+                        )]])
+                    )
+                    return PROCESSING
             
-            extracted_text = context.user_data.get('extracted_text', '')
+                is_premium = await get_user_premium_status(user.id)
+                if not await wait_for_job_slot(query.message, job, is_premium, 'summary',
+                                               len(extracted_text.encode('utf-8'))):
+                    return CONTENT
             
-            if extracted_text:
-                try:
-                    # Start typing indicator task
-                    async def keep_typing():
-                        while True:
-                            await query.message.reply_chat_action("typing")
-                            await asyncio.sleep(4)
+                status_message = await query.message.reply_text(
+                    get_translation(language, "summarizing"),
+                    parse_mode=ParseMode.MARKDOWN
+                )
+            
+                if extracted_text:
+                    try:
+                        # Start typing indicator task
+                        async def keep_typing():
+                            while True:
+                                await query.message.reply_chat_action("typing")
+                                await asyncio.sleep(4)
                     
-                    typing_task = asyncio.create_task(keep_typing())
-                    active_tasks.add(typing_task)
+                        job.spawn(keep_typing())
                     
-                    summary = await generate_summary(extracted_text, language)
+                        loop = asyncio.get_running_loop()
+                        last_edit = 0.0
                     
-                    # Send the formatted summary
-                    await query.message.reply_text(
-                        summary,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
+                        async def stream_into_status():
+                            """Stream points into the status message as they arrive"""
+                            nonlocal last_edit
+                            summary = None
+                            shown_text = None
+                            stream = stream_summary(extracted_text, language, user_id=user.id)
+                            try:
+                                async for partial in stream:
+                                    if job.expired:
+                                        raise asyncio.TimeoutError("Summary job exceeded its deadline")
+                                    summary = partial
+                                    if loop.time() - last_edit >= STREAM_EDIT_INTERVAL:
+                                        if await edit_message_text_safely(status_message, partial):
+                                            shown_text = partial
+                                            last_edit = loop.time()
+                            finally:
+                                # Release the LLM slot now on timeout or cancellation, not at garbage collection
+                                await stream.aclose()
+                            return summary, shown_text
                     
-                    # Send a simple message indicating the summary is ready
-                    await query.message.reply_text(
-                        get_translation(language, "summary_ready"),
-                        parse_mode=ParseMode.MARKDOWN
-                    )
+                        # The local extractive summary takes well under a second. It is shown while
+                        # the LLM works, and sent in its place when the LLM is overloaded, fails or is too slow.
+                        try:
+                            preview = await asyncio.to_thread(local_summary, extracted_text)
+                        except Exception as e:
+                            logger.error(f"Error creating local summary: {e}")
+                            preview = None
                     
-                    if 'extracted_text' in context.user_data:
-                        del context.user_data['extracted_text']
-                    if 'processing_state' in context.user_data:
-                        del context.user_data['processing_state']
+                        summary = shown_text = None
+                        if preview and llm_overloaded():
+                            logger.warning(f"LLM overloaded, sending local summary to user {user.id}")
+                        else:
+                            if preview and await edit_message_text_safely(
+                                    status_message, f"{get_translation(language, 'summary_preview')}\n\n{preview}"):
+                                last_edit = loop.time()
+                            try:
+                                summary, shown_text = await asyncio.wait_for(
+                                    stream_into_status(), min(LLM_SUMMARY_TIMEOUT, job.remaining))
+                            except Exception as e:
+                                if not preview:
+                                    raise
+                                logger.error(f"LLM summary failed, sending local summary to user {user.id}: {e!r}")
+                                summary = shown_text = None
+                        if summary is None:
+                            summary = f"{get_translation(language, 'quick_summary')}\n\n{preview}"
                     
-                except Exception as e:
-                    logger.error(f"Error generating summary: {e}")
+                        delivered = summary == shown_text
+                        if not delivered:
+                            await asyncio.sleep(max(0.0, STREAM_EDIT_INTERVAL - (loop.time() - last_edit)))
+                            delivered = await edit_message_text_safely(status_message, summary)
+                    
+                        if delivered:
+                            # The status message now holds the summary; keep it
+                            status_message = None
+                        else:
+                            # Send the formatted summary
+                            await query.message.reply_text(
+                                summary,
+                                parse_mode=ParseMode.MARKDOWN
+                            )
+                    
+                        # Send a simple message indicating the summary is ready
+                        await query.message.reply_text(
+                            get_translation(language, "summary_ready"),
+                            parse_mode=ParseMode.MARKDOWN
+                        )
+                    
+                        if 'extracted_text' in context.user_data:
+                            del context.user_data['extracted_text']
+                        if 'processing_state' in context.user_data:
+                            del context.user_data['processing_state']
+                    
+                    except Exception as e:
+                        logger.error(f"Error generating summary: {e}")
+                        await query.message.reply_text(
+                            get_translation(language, "error"),
+                            parse_mode=ParseMode.MARKDOWN
+                        )
+                else:
                     await query.message.reply_text(
-                        get_translation(language, "error"),
+                        get_translation(language, "error"), 
                         parse_mode=ParseMode.MARKDOWN
                     )
-            else:
-                await query.message.reply_text(
-                    get_translation(language, "error"), 
-                    parse_mode=ParseMode.MARKDOWN
-                )
-        return CONTENT
-        
-    finally:
-        # Clean up resources
-        if status_message:
-            try:
-                await status_message.delete()
-            except Exception as e:
-                logger.error(f"Error deleting status message: {e}")
-        
-        if typing_task:
-            try:
-                typing_task.cancel()
-                await typing_task
-            except asyncio.CancelledError:
-                pass
-            except Exception as e:
-                logger.error(f"Error cancelling typing task: {e}")
-            finally:
-                active_tasks.discard(typing_task)
+            return CONTENT
         
-        await cleanup_resources()
+        finally:
+            # Clean up resources
+            if status_message:
+                try:
+                    await status_message.delete()
+                except Exception as e:
+                    logger.error(f"Error deleting status message: {e}")
+
+async def on_startup(application: Application) -> None:
+    """Create process-wide resources once the event loop is running"""
+    await http_client.start()
+    await profile_store.start()
+    await processed_files_sink.start()
+    await stats_aggregator.start(load_stats_totals)
+
+async def on_shutdown(application: Application) -> None:
+    """Release process-wide resources when the bot stops"""
+    await stats_aggregator.stop()
+    await processed_files_sink.stop()
+    await profile_store.stop()
+    await browser_pool.close()
+    await crawl_worker.stop()
+    await http_client.close()
+    shutdown_process_pool()
 
 def main() -> None:
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     logger.debug("Setting up handlers")
     application.add_handler(CallbackQueryHandler(language_selection, pattern=r"^lang_"))
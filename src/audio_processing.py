@@ -1,67 +1,97 @@
 import os
+import re
+import asyncio
 import logging
 import tempfile
 import aiohttp
-from typing import Tuple, Optional, Dict, Any
+from io import BytesIO
+from typing import Tuple, Optional, Dict, Any, Union, List
+
+from src.media_tools import probe_media, detect_silences, plan_segments, cut_audio_segment
+from src.http_client import get_http_session
 
 logger = logging.getLogger(__name__)
 
 ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1/speech-to-text"
 DEFAULT_MODEL = "scribe_v1"
 
-async def extract_text_from_audio(audio_bytes: bytes, api_key: str) -> Tuple[bool, str, Optional[str]]:
-    logger.info(f"Starting audio extraction. Audio size: {len(audio_bytes)} bytes")
+AUDIO_CONTENT_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".oga": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".m4a": "audio/mp4",
+    ".aac": "audio/aac",
+    ".webm": "audio/webm",
+}
+
+# Recordings longer than this are split on silence and transcribed in parallel
+LONG_AUDIO_SECONDS = 10 * 60
+SEGMENT_TARGET_SECONDS = 5 * 60
+SEGMENT_MAX_SECONDS = 7 * 60
+SEGMENT_OVERLAP_SECONDS = 2.0
+MAX_PARALLEL_TRANSCRIPTIONS = 4
+SEGMENT_MAX_ATTEMPTS = 3
+SEGMENT_TIMEOUT = 120  # seconds per segment request
+MAX_OVERLAP_WORDS = 40
+
+async def _transcribe_file(audio: Union[bytes, str], api_key: str, timeout: int = 300,
+                           session: Optional[aiohttp.ClientSession] = None) -> Tuple[bool, str, Optional[str]]:
+    """Transcribe audio given as raw bytes or as a path to a file on disk in a single request.
+
+    Files are streamed to the API in chunks rather than read into memory.
+    """
+    is_path = isinstance(audio, str)
+    audio_size = os.path.getsize(audio) if is_path else len(audio)
+    logger.info(f"Starting audio extraction. Audio size: {audio_size} bytes")
     logger.debug(f"API key exists: {bool(api_key)}")
 
     if not api_key:
         logger.error("No API key provided")
         return False, "ElevenLabs API key is required", None
     
-    temp_path = None
+    audio_file = None
     
     try:
-        temp_path = tempfile.mktemp(suffix='.mp3')
-        logger.debug(f"Temp audio path: {temp_path}")
-        
-        with open(temp_path, 'wb') as f:
-            f.write(audio_bytes)
-        
-        logger.debug(f"Audio file saved, size: {os.path.getsize(temp_path)} bytes")
+        extension = os.path.splitext(audio)[1].lower() if is_path else ".mp3"
+        content_type = AUDIO_CONTENT_TYPES.get(extension, "audio/mpeg")
+        audio_file = open(audio, 'rb') if is_path else BytesIO(audio)
         
         headers = {
             "xi-api-key": api_key
         }
         
         form_data = aiohttp.FormData()
-        form_data.add_field('file', open(temp_path, 'rb'), filename='audio.mp3', content_type='audio/mpeg')
+        form_data.add_field('file', audio_file, filename=f'audio{extension}', content_type=content_type)
         form_data.add_field('model_id', DEFAULT_MODEL)
         
         logger.debug(f"Sending request to ElevenLabs API at {ELEVENLABS_API_URL}")
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                ELEVENLABS_API_URL,
-                headers=headers,
-                data=form_data,
-                timeout=300
-            ) as response:
-                logger.debug(f"Response status: {response.status}")
-                
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"ElevenLabs API error (Status {response.status}): {error_text}")
-                    return False, f"Transcription failed with status {response.status}", None
-                
-                result = await response.json()
-                logger.debug(f"API response: {result}")
-                
-                if 'text' in result:
-                    logger.info(f"Transcription successful, text length: {len(result['text'])}")
-                    return True, "Transcription successful", result['text']
-                else:
-                    logger.error("No text found in transcription result")
-                    return False, "No text found in transcription result", None
-    
+        session = session or get_http_session()
+        async with session.post(
+            ELEVENLABS_API_URL,
+            headers=headers,
+            data=form_data,
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            logger.debug(f"Response status: {response.status}")
+            
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"ElevenLabs API error (Status {response.status}): {error_text}")
+                return False, f"Transcription failed with status {response.status}", None
+            
+            result = await response.json()
+            logger.debug(f"API response: {result}")
+            
+            if 'text' in result:
+                logger.info(f"Transcription successful, text length: {len(result['text'])}")
+                return True, "Transcription successful", result['text']
+            else:
+                logger.error("No text found in transcription result")
+                return False, "No text found in transcription result", None
+
     except aiohttp.ClientError as e:
         logger.error(f"ElevenLabs API request error: {e}")
         return False, f"API request failed: {str(e)}", None
@@ -69,12 +99,88 @@ async def extract_text_from_audio(audio_bytes: bytes, api_key: str) -> Tuple[boo
         logger.error(f"Error processing audio: {e}")
         return False, f"Error processing audio: {str(e)}", None
     finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-                logger.debug(f"Removed temp audio file: {temp_path}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary audio file: {e}")
+        if audio_file is not None:
+            audio_file.close()
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r'[^\w]', '', word.lower())
+
+def merge_transcripts(transcripts: List[str], max_overlap_words: int = MAX_OVERLAP_WORDS) -> str:
+    """Join segment transcripts, dropping words repeated across the overlap between segments."""
+    merged_words: List[str] = []
+    for transcript in transcripts:
+        words = transcript.split()
+        if merged_words and words:
+            tail = [_normalize_word(word) for word in merged_words[-max_overlap_words:]]
+            head = [_normalize_word(word) for word in words[:max_overlap_words]]
+            # Longest run of at least two words that ends the previous segment and starts this one
+            for size in range(min(len(tail), len(head)), 1, -1):
+                if tail[-size:] == head[:size]:
+                    words = words[size:]
+                    break
+        merged_words.extend(words)
+    return ' '.join(merged_words)
+
+async def _transcribe_segment(path: str, start: float, end: float, api_key: str,
+                              semaphore: asyncio.Semaphore,
+                              session: Optional[aiohttp.ClientSession] = None) -> Tuple[bool, str, Optional[str]]:
+    """Cut one segment and transcribe it, retrying with backoff on failure."""
+    async with semaphore:
+        segment_path = await cut_audio_segment(path, start, end)
+        if segment_path is None:
+            return False, f"Could not cut audio segment {start:.0f}-{end:.0f}s", None
+        try:
+            for attempt in range(1, SEGMENT_MAX_ATTEMPTS + 1):
+                success, message, text = await _transcribe_file(segment_path, api_key, timeout=SEGMENT_TIMEOUT, session=session)
+                if success:
+                    return success, message, text
+                logger.warning(f"Segment {start:.0f}-{end:.0f}s attempt {attempt} failed: {message}")
+                if attempt < SEGMENT_MAX_ATTEMPTS:
+                    await asyncio.sleep(2 ** attempt)
+            return False, message, None
+        finally:
+            if os.path.exists(segment_path):
+                os.remove(segment_path)
+
+async def _transcribe_in_segments(path: str, duration: float, api_key: str,
+                                  session: Optional[aiohttp.ClientSession] = None) -> Tuple[bool, str, Optional[str]]:
+    silences = await detect_silences(path)
+    segments = plan_segments(duration, silences, SEGMENT_TARGET_SECONDS, SEGMENT_MAX_SECONDS, SEGMENT_OVERLAP_SECONDS)
+    logger.info(f"Transcribing {duration:.0f}s of audio in {len(segments)} segments")
+
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_TRANSCRIPTIONS)
+    results = await asyncio.gather(*(
+        _transcribe_segment(path, start, end, api_key, semaphore, session) for start, end in segments
+    ))
+
+    failed = [i for i, (success, _, _) in enumerate(results) if not success]
+    if failed:
+        return False, f"Transcription failed for {len(failed)} of {len(segments)} segments: {results[failed[0]][1]}", None
+
+    return True, "Transcription successful", merge_transcripts([text or '' for _, _, text in results])
+
+async def extract_text_from_audio(audio: Union[bytes, str], api_key: str,
+                                  session: Optional[aiohttp.ClientSession] = None) -> Tuple[bool, str, Optional[str]]:
+    """Transcribe audio given as raw bytes or as a path to a file on disk.
+
+    Long recordings on disk are split on silence into overlapping segments that are
+    transcribed concurrently and stitched back together. Requests go through the
+    shared application session unless another `session` is injected.
+    """
+    if not api_key:
+        logger.error("No API key provided")
+        return False, "ElevenLabs API key is required", None
+
+    if isinstance(audio, str):
+        try:
+            info = await probe_media(audio)
+        except FileNotFoundError:
+            info = None  # ffmpeg is not installed; send the file in one request
+        if info and info["duration"] and info["duration"] > LONG_AUDIO_SECONDS:
+            return await _transcribe_in_segments(audio, info["duration"], api_key, session)
+
+    return await _transcribe_file(audio, api_key, session=session)
+
 async def save_transcription_to_temp_file(transcript_text: str) -> str:
     transcript_path = tempfile.mktemp(suffix='.txt')
     
@@ -0,0 +1,143 @@
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from src.http_client import DEFAULT_USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_USES = 50  # pages loaded before a browser is restarted, bounding Chrome's memory growth
+BROWSER_MAX_AGE = 30 * 60  # seconds before an idle browser is restarted
+BROWSER_PAGE_TIMEOUT = 20  # seconds for a page load
+BROWSER_BODY_TIMEOUT = 10  # seconds to wait for <body> after the load
+BROWSER_ACQUIRE_TIMEOUT = 30  # seconds to wait for a free browser
+
+
+def _chrome_options() -> Options:
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument(f'--user-agent={DEFAULT_USER_AGENT}')
+    return options
+
+
+class _PooledBrowser:
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+
+class BrowserPool:
+    """Bounded pool of warm headless Chrome instances driven from worker threads.
+
+    Selenium calls block, so every driver operation runs in a dedicated thread pool
+    rather than on the event loop. A browser is health-checked before reuse, reset to
+    a blank page after each fetch, and restarted after `max_uses` pages or on any error.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_uses: int = BROWSER_MAX_USES,
+                 page_timeout: float = BROWSER_PAGE_TIMEOUT):
+        self.size = size
+        self.max_uses = max_uses
+        self.page_timeout = page_timeout
+        self._idle: List[_PooledBrowser] = []
+        self._slots = asyncio.Semaphore(size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _run(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="browser")
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _launch(self) -> _PooledBrowser:
+        driver = webdriver.Chrome(options=_chrome_options())
+        driver.set_page_load_timeout(self.page_timeout)
+        logger.info("Launched pooled Chrome instance")
+        return _PooledBrowser(driver)
+
+    @staticmethod
+    def _quit(browser: _PooledBrowser) -> None:
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting Chrome instance: {e}")
+
+    @staticmethod
+    def _is_healthy(browser: _PooledBrowser) -> bool:
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _load(browser: _PooledBrowser, url: str) -> str:
+        driver = browser.driver
+        try:
+            driver.get(url)
+            WebDriverWait(driver, BROWSER_BODY_TIMEOUT).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+            return driver.page_source
+        finally:
+            # Recycle the page so the next fetch starts clean
+            try:
+                driver.delete_all_cookies()
+                driver.get("about:blank")
+            except Exception:
+                pass
+
+    async def _acquire(self) -> _PooledBrowser:
+        while self._idle:
+            browser = self._idle.pop()
+            expired = time.monotonic() - browser.created_at > BROWSER_MAX_AGE
+            if not expired and await self._run(self._is_healthy, browser):
+                return browser
+            logger.info("Restarting stale or unhealthy Chrome instance")
+            await self._run(self._quit, browser)
+        return await self._run(self._launch)
+
+    async def fetch_html(self, url: str) -> str:
+        """Load `url` in a pooled browser and return the rendered page source."""
+        await asyncio.wait_for(self._slots.acquire(), BROWSER_ACQUIRE_TIMEOUT)
+        browser = None
+        reusable = False
+        try:
+            browser = await self._acquire()
+            browser.uses += 1
+            html = await self._run(self._load, browser, url)
+            reusable = browser.uses < self.max_uses
+            return html
+        finally:
+            if browser is not None:
+                if reusable:
+                    self._idle.append(browser)
+                else:
+                    await asyncio.shield(self._run(self._quit, browser))
+            self._slots.release()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for browser in idle:
+            await self._run(self._quit, browser)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if idle:
+            logger.info(f"Closed {len(idle)} pooled Chrome instances")
+
+
+browser_pool = BrowserPool()
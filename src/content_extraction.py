@@ -0,0 +1,115 @@
+import re
+import logging
+from typing import Dict, Optional
+
+import lxml.html
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Elements that never hold article text; removed before scoring. <form> and <header> are
+# scored instead: ASP.NET pages wrap the whole body in a form, and articles keep their title in a header
+STRIP_TAGS = ('script', 'style', 'noscript', 'template', 'iframe', 'svg', 'canvas',
+              'button', 'select', 'input', 'footer', 'nav', 'aside')
+# Elements whose own text is scored as a paragraph
+PARAGRAPH_TAGS = ('p', 'pre', 'td', 'blockquote', 'li', 'h2', 'h3')
+
+POSITIVE_HINTS = re.compile(r'article|body|content|entry|main|post|story|text|blog', re.IGNORECASE)
+NEGATIVE_HINTS = re.compile(
+    r'comment|footer|sidebar|widget|nav|menu|masthead|banner|advert|\bads?\b|promo|sponsor|'
+    r'related|share|social|cookie|consent|subscribe|newsletter|popup|modal|breadcrumb',
+    re.IGNORECASE
+)
+
+MIN_PARAGRAPH_CHARS = 25
+HINT_WEIGHT = 25
+SIBLING_SCORE_RATIO = 0.2  # siblings scoring at least this share of the best block are kept with it
+MIN_MAIN_TEXT_CHARS = 200  # below this the whole body is used instead of the scored block
+
+
+def _text(element) -> str:
+    return ' '.join(' '.join(element.itertext()).split())
+
+
+def _hint_weight(element) -> int:
+    hints = f"{element.get('class', '')} {element.get('id', '')}"
+    if not hints.strip():
+        return 0
+    weight = 0
+    if NEGATIVE_HINTS.search(hints):
+        weight -= HINT_WEIGHT
+    if POSITIVE_HINTS.search(hints):
+        weight += HINT_WEIGHT
+    return weight
+
+
+def _link_density(element, text_length: int) -> float:
+    if not text_length:
+        return 1.0
+    link_length = sum(len(_text(link)) for link in element.iter('a'))
+    return min(1.0, link_length / text_length)
+
+
+def _score_candidates(root) -> Dict:
+    """Readability-style scores: paragraphs credit their parent fully and grandparent by half."""
+    scores: Dict = {}
+    for paragraph in root.iter(*PARAGRAPH_TAGS):
+        text = _text(paragraph)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        parent = paragraph.getparent()
+        for ancestor, share in ((parent, 1.0), (parent.getparent() if parent is not None else None, 0.5)):
+            if ancestor is None or not isinstance(ancestor.tag, str):
+                continue
+            if ancestor not in scores:
+                scores[ancestor] = float(_hint_weight(ancestor))
+            scores[ancestor] += score * share
+
+    for candidate in scores:
+        scores[candidate] *= 1 - _link_density(candidate, len(_text(candidate)))
+    return scores
+
+
+def extract_main_text(html: str) -> str:
+    """Extract the main readable text of an HTML page.
+
+    Parses with lxml, strips non-content elements, scores blocks by text and comma
+    density penalised by link density and boilerplate class/id names, and returns
+    the best block together with strongly scoring siblings. Falls back to the whole
+    body when no block stands out.
+    """
+    if not html or not html.strip():
+        return ""
+    try:
+        try:
+            root = lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml rejects str input that carries an XML encoding declaration
+            root = lxml.html.document_fromstring(html.encode('utf-8'))
+    except (etree.ParserError, ValueError) as e:
+        logger.warning(f"Could not parse HTML: {e}")
+        return ""
+
+    etree.strip_elements(root, *STRIP_TAGS, with_tail=False)
+    etree.strip_elements(root, etree.Comment, with_tail=False)
+
+    body = root.find('body')
+    if body is None:
+        body = root
+
+    scores = _score_candidates(root)
+    best: Optional[etree._Element] = max(scores, key=scores.get) if scores else None
+    if best is None:
+        return _text(body)
+
+    threshold = max(10.0, scores[best] * SIBLING_SCORE_RATIO)
+    parent = best.getparent()
+    blocks = [best] if parent is None else [
+        sibling for sibling in parent
+        if sibling is best or scores.get(sibling, 0) >= threshold
+    ]
+    text = ' '.join(_text(block) for block in blocks)
+    if len(text) < MIN_MAIN_TEXT_CHARS:
+        return _text(body)
+    return text
@@ -0,0 +1,127 @@
+import re
+import logging
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from src.text_processing import token_weights, truncate_text
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_PATTERN = re.compile(r'[^.!?…]+(?:[.!?…]+|$)')
+WORD_PATTERN = re.compile(r'[^\W\d_]{2,}')
+MAX_SENTENCE_WORDS = 60  # longer unpunctuated runs (common in PDF text) are split into pieces
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+
+class TermMatrix(NamedTuple):
+    """Sparse sentence x term TF-IDF matrix in coordinate form, rows L2-normalized."""
+    rows: np.ndarray
+    cols: np.ndarray
+    values: np.ndarray
+    terms: List[str]
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """Character spans of the sentences of `text`, long ones cut into MAX_SENTENCE_WORDS pieces."""
+    spans = []
+    for match in SENTENCE_PATTERN.finditer(text):
+        start, end = match.span()
+        words = list(re.finditer(r'\S+', match.group()))
+        if not words:
+            continue
+        for i in range(0, len(words), MAX_SENTENCE_WORDS):
+            piece = words[i:i + MAX_SENTENCE_WORDS]
+            spans.append((start + piece[0].start(), start + piece[-1].end()))
+    return spans
+
+
+def term_matrix(sentences: List[str]) -> TermMatrix:
+    """TF-IDF weights of the words of each sentence, with sublinear term frequency."""
+    vocabulary: Dict[str, int] = {}
+    rows, cols, counts = [], [], []
+    for row, sentence in enumerate(sentences):
+        sentence_counts: Dict[int, int] = {}
+        for word in WORD_PATTERN.findall(sentence.lower()):
+            col = vocabulary.setdefault(word, len(vocabulary))
+            sentence_counts[col] = sentence_counts.get(col, 0) + 1
+        rows.extend([row] * len(sentence_counts))
+        cols.extend(sentence_counts)
+        counts.extend(sentence_counts.values())
+
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    document_frequency = np.bincount(cols, minlength=len(vocabulary))
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    values = (1 + np.log(np.asarray(counts, dtype=np.float64))) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(sentences)))
+    values /= norms[rows]
+    return TermMatrix(rows, cols, values, list(vocabulary))
+
+
+def rank_sentences(matrix: TermMatrix, n: int) -> np.ndarray:
+    """Salience of each of the `n` sentences: PageRank over their cosine-similarity graph.
+
+    The n x n similarity matrix S = W·Wᵀ is never built: each product S·x is
+    computed as W·(Wᵀ·x) on the sparse TF-IDF matrix W, so every iteration is
+    linear in the number of words. Without any words to compare, earlier
+    sentences rank higher.
+    """
+    rows, cols, values = matrix.rows, matrix.cols, matrix.values
+    if not len(values):
+        return -np.arange(n, dtype=np.float64)
+    n_terms = len(matrix.terms)
+
+    def similarity_times(x: np.ndarray) -> np.ndarray:
+        term_totals = np.bincount(cols, weights=values * x[rows], minlength=n_terms)
+        products = np.bincount(rows, weights=values * term_totals[cols], minlength=n)
+        return products - self_similarity * x  # no self-loops
+
+    self_similarity = np.bincount(rows, weights=values ** 2, minlength=n)
+    degree = similarity_times(np.ones(n))
+    inverse_degree = np.divide(1.0, degree, out=np.zeros(n), where=degree > 1e-12)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / n + DAMPING * similarity_times(scores * inverse_degree)
+        converged = np.abs(updated - scores).sum() < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def select_salient_text(text: str, max_tokens: int) -> str:
+    """Shorten `text` to about `max_tokens` by keeping its most salient sentences.
+
+    Sentences are ranked with TextRank on TF-IDF cosine similarity and taken
+    greedily while they fit the budget; the kept sentences are returned in their
+    original order. Text already within the budget is returned unchanged.
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(token_weights(text), dtype=np.float64)))
+    if cumulative[-1] <= max_tokens:
+        return text
+
+    spans = sentence_spans(text)
+    sentences = [text[start:end] for start, end in spans]
+    costs = np.array([cumulative[end] - cumulative[start] for start, end in spans])
+    scores = rank_sentences(term_matrix(sentences), len(spans))
+
+    keep = np.zeros(len(spans), dtype=bool)
+    remaining = float(max_tokens)
+    for index in np.argsort(-scores, kind='stable'):
+        if costs[index] <= remaining:
+            keep[index] = True
+            remaining -= costs[index]
+
+    if not keep.any():
+        # Not even one sentence fits: keep as much of the start as the budget allows
+        cut = int(np.searchsorted(cumulative, max_tokens, side='right')) - 1
+        return truncate_text(text, cut)
+
+    selected = ' '.join(sentence for sentence, kept in zip(sentences, keep) if kept)
+    logger.info(f"Selected {int(keep.sum())}/{len(spans)} sentences, "
+                f"{max_tokens - remaining:.0f}/{cumulative[-1]:.0f} estimated tokens")
+    return selected
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import itertools
+import threading
+import multiprocessing
+from typing import Dict, Any, Optional
+
+import scrapy
+
+from src.http_client import DEFAULT_USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+CRAWL_TIMEOUT = 45  # seconds to wait for a crawl result
+CRAWL_STOP_TIMEOUT = 5  # seconds to wait for the worker to exit on shutdown
+CRAWL_REACTOR = 'twisted.internet.asyncioreactor.AsyncioSelectorReactor'
+CRAWL_SETTINGS = {
+    'TWISTED_REACTOR': CRAWL_REACTOR,
+    'USER_AGENT': DEFAULT_USER_AGENT,
+    'LOG_LEVEL': 'WARNING',
+    'ROBOTSTXT_OBEY': False,
+    'TELNETCONSOLE_ENABLED': False,
+    'DOWNLOAD_TIMEOUT': 30,
+    'RETRY_TIMES': 1,
+    'CONCURRENT_REQUESTS': 16,
+    'CONCURRENT_REQUESTS_PER_DOMAIN': 4,
+    'REQUEST_FINGERPRINTER_IMPLEMENTATION': '2.7',
+}
+
+
+class PageSpider(scrapy.Spider):
+    """Fetches a single URL and keeps its HTML on the spider."""
+    name = 'page_spider'
+
+    def __init__(self, url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.start_urls = [url]
+        self.html: Optional[str] = None
+
+    def parse(self, response):
+        if isinstance(response, scrapy.http.TextResponse):
+            self.html = response.text
+        return []
+
+
+def _worker_main(requests, results, settings: Dict[str, Any]) -> None:
+    """Entry point of the crawl process: one Twisted reactor serving crawl jobs until told to stop."""
+    from scrapy.utils.reactor import install_reactor
+    install_reactor(settings['TWISTED_REACTOR'])
+
+    from twisted.internet import reactor
+    from scrapy.crawler import CrawlerRunner
+
+    runner = CrawlerRunner(settings)
+
+    def crawl(job_id: int, url: str) -> None:
+        crawler = runner.create_crawler(PageSpider)
+        deferred = runner.crawl(crawler, url=url)
+
+        def done(_):
+            html = crawler.spider.html if crawler.spider is not None else None
+            if html:
+                results.put((job_id, True, html))
+            else:
+                results.put((job_id, False, "No content found"))
+
+        def failed(failure):
+            results.put((job_id, False, str(failure.value)))
+
+        deferred.addCallbacks(done, failed)
+
+    def read_requests() -> None:
+        while True:
+            job = requests.get()
+            if job is None:
+                reactor.callFromThread(reactor.stop)
+                return
+            reactor.callFromThread(crawl, *job)
+
+    threading.Thread(target=read_requests, name="crawl-requests", daemon=True).start()
+    reactor.run(installSignalHandlers=False)
+
+
+class CrawlWorker:
+    """Long-lived Scrapy process that accepts URL jobs over a queue.
+
+    Twisted's reactor cannot be restarted, so Scrapy runs in its own spawned process
+    for the lifetime of the bot and serves any number of concurrent crawls. The
+    process is (re)started on demand if it is not running.
+    """
+
+    def __init__(self, timeout: float = CRAWL_TIMEOUT):
+        self.timeout = timeout
+        self._process: Optional[multiprocessing.Process] = None
+        self._requests = None
+        self._results = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+
+    def _read_results(self, results) -> None:
+        while True:
+            message = results.get()
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._resolve, *message)
+
+    def _resolve(self, job_id: int, success: bool, payload: str) -> None:
+        future = self._pending.pop(job_id, None)
+        if future is None or future.done():
+            return
+        if success:
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def _fail_pending(self, reason: str) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError(reason))
+        self._pending.clear()
+
+    def _ensure_started(self) -> None:
+        if self._process is not None and self._process.is_alive():
+            return
+        if self._process is not None:
+            logger.warning("Crawl worker exited, restarting it")
+            self._fail_pending("Crawl worker exited")
+            self._results.put(None)  # stop the old reader thread
+
+        context = multiprocessing.get_context("spawn")
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._process = context.Process(
+            target=_worker_main, args=(self._requests, self._results, CRAWL_SETTINGS),
+            name="crawl-worker", daemon=True
+        )
+        self._process.start()
+        self._loop = asyncio.get_running_loop()
+        threading.Thread(target=self._read_results, args=(self._results,), name="crawl-results", daemon=True).start()
+        logger.info(f"Started crawl worker (pid {self._process.pid})")
+
+    async def fetch_html(self, url: str) -> str:
+        """Crawl `url` in the worker process and return its HTML."""
+        self._ensure_started()
+        job_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[job_id] = future
+        self._requests.put((job_id, url))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._pending.pop(job_id, None)
+
+    async def stop(self) -> None:
+        if self._process is None:
+            return
+        self._fail_pending("Crawl worker stopped")
+        self._requests.put(None)
+        await asyncio.to_thread(self._process.join, CRAWL_STOP_TIMEOUT)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._results.put(None)
+        self._process = None
+        logger.info("Stopped crawl worker")
+
+
+crawl_worker = CrawlWorker()
@@ -1,12 +1,112 @@
 import os
+import time
+import math
+import asyncio
 import logging
+import multiprocessing
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple, Union
 import docx2txt
 import PyPDF2
 import re
 
 logger = logging.getLogger(__name__)
 
+DOCUMENT_WORKERS = int(os.environ.get("DOCUMENT_WORKERS", str(os.cpu_count() or 2)))
+PDF_MIN_PAGES_PER_TASK = 8
+PDF_CPU_BUDGET = float(os.environ.get("PDF_CPU_BUDGET", "90"))  # CPU seconds per PDF, shared by its page ranges
+
+# Extraction artefacts: /12"' followed on the same line by a word, optional whitespace (which may
+# span lines) and a < or >, then by one of ( ) , . - on the line of the angle
+PDF_NOISE_REGEX = r'/\d+"\'.*?\w+\s*[<>].*?[(),.\-]'
+PDF_NOISE_START = re.compile(r'/\d+"\'')
+PDF_NOISE_ANGLE = re.compile(r'\w\s*[<>]|\n')
+PDF_NOISE_CROSSING = re.compile(r'\w\s*[<>]')
+PDF_NOISE_END = re.compile(r'[(),.\-\n]')
+PDF_APPROVAL_PATTERN = re.compile(r'KELISHILDI:[^:\n]*:')
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _crossing_angle(text: str, newline: int, lower: int):
+    r"""The one `\w\s*[<>]` whose word ends the line at `newline` and whose angle is on a later line."""
+    i = newline
+    while i > lower and text[i - 1].isspace():
+        i -= 1
+    if i - 1 < lower:
+        return None
+    return PDF_NOISE_CROSSING.match(text, i - 1)
+
+def remove_pdf_noise(text: str) -> str:
+    """Replace PDF extraction artefacts with spaces in linear time.
+
+    Produces the same output as re.sub(PDF_NOISE_REGEX, ' ', text), but that regex
+    with lazy wildcards rescans the rest of the line from every candidate start.
+    This scanner reuses its last forward searches while they are still ahead of
+    the current position, so each character is examined a bounded number of times.
+    """
+    parts = []
+    last = 0
+    # Cached searches: (searched_from, match or None) for the angle and its end, and
+    # (newline, angle match or None, end match or None) for an angle on the next line
+    angle = end = crossing = None
+    for start in PDF_NOISE_START.finditer(text):
+        if start.start() < last:
+            continue
+        if angle is None or (angle[1] is not None and angle[1].start() < start.end()):
+            angle = (start.end(), PDF_NOISE_ANGLE.search(text, start.end()))
+        angle_match = angle[1]
+        if angle_match is None or angle_match.group() == '\n':
+            continue
+        if end is None or (end[1] is not None and end[1].start() < angle_match.end()):
+            end = (angle_match.end(), PDF_NOISE_END.search(text, angle_match.end()))
+        end_match = end[1]
+        if end_match is not None and end_match.group() == '\n' and '\n' not in angle_match.group():
+            # The regex backtracks to a later angle only through `\s*` spanning the end of the line
+            newline = end_match.start()
+            if crossing is None or crossing[0] != newline:
+                crossing_match = _crossing_angle(text, newline, angle_match.end())
+                crossing_end = crossing_match and PDF_NOISE_END.search(text, crossing_match.end())
+                crossing = (newline, crossing_match, crossing_end)
+            end_match = crossing[2]
+        if end_match is None or end_match.group() == '\n':
+            continue
+        parts.append(text[last:start.start()])
+        parts.append(' ')
+        last = end_match.end()
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return ''.join(parts)
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared document extraction pool, creating it on first use."""
+    global _process_pool
+    if _process_pool is None:
+        # Spawned workers do not inherit the bot's event loop and HTTP threads
+        _process_pool = ProcessPoolExecutor(
+            max_workers=DOCUMENT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+async def _run_in_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_process_pool(), func, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a malformed file); start a fresh pool for later jobs
+        logger.error("Document process pool is broken, recreating it")
+        shutdown_process_pool()
+        raise
+
 def get_file_extension(filename: str) -> str:
     return os.path.splitext(filename)[1].lower()
 
@@ -30,32 +130,72 @@ def format_file_size(size_bytes: int) -> str:
         size_bytes /= 1024.0
     return f"{size_bytes:.1f} TB"
 
-async def extract_text_from_pdf(file_bytes: bytes) -> str:
+def _open_pdf(source: Union[bytes, str]) -> PyPDF2.PdfReader:
+    # Paths are opened by each worker, so only the path string crosses the process boundary
+    return PyPDF2.PdfReader(BytesIO(source) if isinstance(source, bytes) else source)
+
+def _count_pdf_pages(source: Union[bytes, str]) -> int:
+    return len(_open_pdf(source).pages)
+
+def _extract_pdf_pages(source: Union[bytes, str], start: int, end: int, cpu_budget: float) -> Tuple[List[str], bool]:
+    """Worker: extract and clean pages [start, end). Stops early once cpu_budget is spent."""
+    started = time.process_time()
+    reader = _open_pdf(source)
+    pages = []
+    for index in range(start, end):
+        if time.process_time() - started > cpu_budget:
+            return pages, True
+        page_text = reader.pages[index].extract_text()
+        if page_text:
+            page_text = remove_pdf_noise(page_text)
+            page_text = PDF_APPROVAL_PATTERN.sub('', page_text)
+            pages.append(page_text)
+    return pages, False
+
+async def extract_text_from_pdf(file_bytes: Union[bytes, str]) -> str:
+    """Extract PDF text in the process pool, splitting pages into ranges parsed in parallel."""
     text = ""
     try:
-        with BytesIO(file_bytes) as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    page_text = re.sub(r'/\d+"\'.*?\w+\s*[<>].*?[\(\),\.\-]', ' ', page_text)
-                    page_text = re.sub(r'KELISHILDI:.*?:', '', page_text)
-                    text += page_text + "\n\n"
+        page_count = await _run_in_pool(_count_pdf_pages, file_bytes)
+        if page_count == 0:
+            return text
+        
+        pages_per_task = max(PDF_MIN_PAGES_PER_TASK, math.ceil(page_count / DOCUMENT_WORKERS))
+        ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+        
+        # Each range gets a share of the job's CPU budget proportional to its page count
+        results = await asyncio.gather(*(
+            _run_in_pool(_extract_pdf_pages, file_bytes, start, end, PDF_CPU_BUDGET * (end - start) / page_count)
+            for start, end in ranges
+        ))
+        
+        for (start, end), (pages, over_budget) in zip(ranges, results):
+            if over_budget:
+                logger.warning(f"PDF pages {start + 1}-{end} exceeded the CPU budget; keeping {len(pages)} extracted pages")
+            for page_text in pages:
+                text += page_text + "\n\n"
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {e}")
     return text
 
-async def extract_text_from_docx(file_bytes: bytes) -> str:
+def _extract_docx(source: Union[bytes, str]) -> str:
+    if isinstance(source, str):
+        return docx2txt.process(source)
+    with BytesIO(source) as file:
+        return docx2txt.process(file)
+
+async def extract_text_from_docx(file_bytes: Union[bytes, str]) -> str:
     try:
-        with BytesIO(file_bytes) as file:
-            text = docx2txt.process(file)
-            return text
+        return await _run_in_pool(_extract_docx, file_bytes)
     except Exception as e:
         logger.error(f"Error extracting text from DOCX: {e}")
         return ""
 
-async def extract_text_from_txt(file_bytes: bytes) -> str:
+async def extract_text_from_txt(file_bytes: Union[bytes, str]) -> str:
     try:
+        if isinstance(file_bytes, str):
+            with open(file_bytes, 'rb') as f:
+                file_bytes = f.read()
         text = file_bytes.decode("utf-8")
         return text
     except UnicodeDecodeError:
@@ -0,0 +1,284 @@
+import os
+import re
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Optional, Dict, Any, Tuple, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_INDEX_PATH = os.environ.get("DUPLICATE_INDEX_PATH", "duplicate_index.db")
+DUPLICATE_INDEX_MAX_BYTES = int(os.environ.get("DUPLICATE_INDEX_MAX_BYTES", str(200 * 1024 * 1024)))  # compressed texts
+DUPLICATE_SIMILARITY_THRESHOLD = float(os.environ.get("DUPLICATE_SIMILARITY_THRESHOLD", "0.8"))
+
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16  # 16 bands of 8 rows: documents above ~0.7 Jaccard similarity become candidates
+SHINGLE_WORDS = 3
+SIGNATURE_BLOCK = 4096  # shingles hashed per NumPy block, bounds the temporary matrix to ~4MB
+# Stored with every signature; changing any parameter makes load() rebuild from the stored texts
+SIGNATURE_PARAMS = f"minhash-v2-{NUM_PERMUTATIONS}-{LSH_BANDS}-{SHINGLE_WORDS}"
+
+# Letters only: page numbers and other digits differ between exports of the same document
+WORD_PATTERN = re.compile(r'[^\W\d_]+')
+
+
+def _permutation_coefficients(name: str) -> np.ndarray:
+    # Derived from a fixed hash rather than a RNG so persisted signatures stay valid across NumPy versions
+    return np.array([
+        int.from_bytes(hashlib.blake2b(f"{name}{i}".encode(), digest_size=8).digest(), "big") | 1
+        for i in range(NUM_PERMUTATIONS)
+    ], dtype=np.uint64)
+
+
+_PERM_A = _permutation_coefficients("a")
+_PERM_B = _permutation_coefficients("b")
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    """Distinct 32-bit hashes of the word 3-grams of `text`, stable across processes."""
+    word_ids: Dict[str, int] = {}
+    ids = np.array([word_ids.setdefault(word, zlib.crc32(word.encode("utf-8")))
+                    for word in WORD_PATTERN.findall(text.lower())], dtype=np.uint64)
+    if not len(ids):
+        return ids
+    if len(ids) < SHINGLE_WORDS:
+        ids = np.pad(ids, (0, SHINGLE_WORDS - len(ids)))
+    hashes = ids[:len(ids) - SHINGLE_WORDS + 1].copy()
+    for offset in range(1, SHINGLE_WORDS):
+        hashes = hashes * np.uint64(1000003) ^ ids[offset:len(ids) - SHINGLE_WORDS + 1 + offset]
+    return np.unique((hashes ^ (hashes >> np.uint64(32))) & np.uint64(0xFFFFFFFF))
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of the word shingles of `text`, or None if it has no words."""
+    shingles = _shingle_hashes(text)
+    if not len(shingles):
+        return None
+    signature = np.full(NUM_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(shingles), SIGNATURE_BLOCK):
+        block = shingles[start:start + SIGNATURE_BLOCK, None]
+        # Multiply-shift hashing: wrapping 64-bit arithmetic, keep the high 32 bits
+        np.minimum(signature, ((block * _PERM_A + _PERM_B) >> np.uint64(32)).min(axis=0), out=signature)
+    return signature
+
+
+def _band_keys(signature: np.ndarray):
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(LSH_BANDS)]
+
+
+class DuplicateIndex:
+    """Persistent MinHash/LSH index of summarized documents for near-duplicate lookup.
+
+    Each entry maps a document's signature to a key naming its summary, within
+    a variant (model, prompt, style, language, user) that must match exactly. Signatures are kept in memory, banded for LSH; the SQLite store
+    also keeps the compressed text so the index can be rebuilt when the
+    signature parameters change. The store is trimmed oldest-accessed first
+    once the stored texts exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str = DUPLICATE_INDEX_PATH, max_bytes: int = DUPLICATE_INDEX_MAX_BYTES,
+                 threshold: float = DUPLICATE_SIMILARITY_THRESHOLD):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        self._signatures: Dict[str, Tuple[str, np.ndarray]] = {}
+        self._bands: Dict[Tuple[int, bytes], Set[str]] = defaultdict(set)
+        self.stats = {"lookups": 0, "matches": 0, "added": 0, "evictions": 0}
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            try:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS documents ("
+                    "key TEXT PRIMARY KEY, variant TEXT NOT NULL, params TEXT NOT NULL, signature BLOB, "
+                    "text BLOB NOT NULL, size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_accessed ON documents(accessed_at)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error opening duplicate index at {self.path}: {e}")
+                self._conn = None
+        return self._conn
+
+    def _index(self, key: str, variant: str, signature: np.ndarray) -> None:
+        self._unindex(key)
+        self._signatures[key] = (variant, signature)
+        for band_key in _band_keys(signature):
+            self._bands[band_key].add(key)
+
+    def _unindex(self, key: str) -> None:
+        entry = self._signatures.pop(key, None)
+        if entry is None:
+            return
+        for band_key in _band_keys(entry[1]):
+            bucket = self._bands.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._bands[band_key]
+
+    def _load(self) -> None:
+        """Read all signatures into memory, recomputing any made with other parameters."""
+        if self._loaded:
+            return
+        self._loaded = True
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            stale = []
+            for key, variant, params, signature in conn.execute(
+                    "SELECT key, variant, params, signature FROM documents"):
+                if params == SIGNATURE_PARAMS and signature is not None:
+                    self._index(key, variant, np.frombuffer(signature, dtype=np.uint64))
+                else:
+                    stale.append((key, variant))
+            # Texts are only read back, one at a time, for the signatures that must be recomputed
+            for key, variant in stale:
+                row = conn.execute("SELECT text FROM documents WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    continue
+                signature = minhash_signature(zlib.decompress(row[0]).decode("utf-8"))
+                if signature is None:
+                    conn.execute("DELETE FROM documents WHERE key = ?", (key,))
+                    continue
+                conn.execute("UPDATE documents SET params = ?, signature = ? WHERE key = ?",
+                             (SIGNATURE_PARAMS, signature.tobytes(), key))
+                self._index(key, variant, signature)
+            conn.commit()
+            logger.info(f"Loaded {len(self._signatures)} documents into the duplicate index ({len(stale)} rebuilt)")
+        except (sqlite3.Error, zlib.error) as e:
+            logger.error(f"Error loading duplicate index: {e}")
+
+    def find_sync(self, text: str, variant: str) -> Optional[Tuple[str, float]]:
+        """Return (key, estimated similarity) of the closest indexed document above the threshold."""
+        signature = minhash_signature(text)
+        with self._lock:
+            self._load()
+            self.stats["lookups"] += 1
+            if signature is None:
+                return None
+            candidates = set()
+            for band_key in _band_keys(signature):
+                candidates |= self._bands.get(band_key, set())
+
+            best_key, best_similarity = None, 0.0
+            for key in candidates:
+                candidate_variant, candidate_signature = self._signatures[key]
+                if candidate_variant != variant:
+                    continue
+                similarity = float(np.mean(candidate_signature == signature))
+                if similarity > best_similarity:
+                    best_key, best_similarity = key, similarity
+            if best_key is None or best_similarity < self.threshold:
+                return None
+
+            self.stats["matches"] += 1
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    conn.execute("UPDATE documents SET accessed_at = ? WHERE key = ?", (time.time(), best_key))
+                    conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Error updating duplicate index: {e}")
+            return best_key, best_similarity
+
+    def add_sync(self, key: str, text: str, variant: str) -> None:
+        signature = minhash_signature(text)
+        if signature is None:
+            return
+        compressed = zlib.compress(text.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._load()
+            self._index(key, variant, signature)
+            self.stats["added"] += 1
+
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents (key, variant, params, signature, text, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, variant, SIGNATURE_PARAMS, signature.tobytes(), compressed, len(compressed), now, now)
+                )
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error writing duplicate index: {e}")
+
+    def remove_sync(self, key: str) -> None:
+        with self._lock:
+            self._unindex(key)
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("DELETE FROM documents WHERE key = ?", (key,))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error removing from duplicate index: {e}")
+
+    def rebuild_sync(self) -> None:
+        """Recompute every signature from the stored texts."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("UPDATE documents SET params = ''")
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error rebuilding duplicate index: {e}")
+                return
+            self._signatures.clear()
+            self._bands.clear()
+            self._loaded = False
+            self._load()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM documents ORDER BY accessed_at ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM documents WHERE key = ?", (key,))
+            self._unindex(key)
+            total -= size
+            self.stats["evictions"] += 1
+
+    async def find(self, text: str, variant: str) -> Optional[Tuple[str, float]]:
+        return await asyncio.to_thread(self.find_sync, text, variant)
+
+    async def add(self, key: str, text: str, variant: str) -> None:
+        await asyncio.to_thread(self.add_sync, key, text, variant)
+
+    async def remove(self, key: str) -> None:
+        await asyncio.to_thread(self.remove_sync, key)
+
+    async def rebuild(self) -> None:
+        await asyncio.to_thread(self.rebuild_sync)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["documents"] = len(self._signatures)
+        return stats
+
+
+duplicate_index = DuplicateIndex()
@@ -0,0 +1,75 @@
+import re
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.content_selection import sentence_spans, term_matrix, rank_sentences
+from src.text_processing import truncate_text
+
+logger = logging.getLogger(__name__)
+
+KEY_POINTS_PER_SECTION = 2  # top sentences of a section shown as its key points
+SUMMARY_SENTENCES_PER_SECTION = 2  # next best sentences, in document order, as its summary
+MIN_SECTION_SENTENCES = 3
+KEYWORDS_PER_TITLE = 3
+MAX_SENTENCE_CHARS = 300
+# Telegram Markdown control characters; stripped so extracted sentences cannot break formatting
+MARKDOWN_CHARS = re.compile(r'[*_`\[\]]')
+
+
+def _clean_sentence(sentence: str) -> str:
+    sentence = MARKDOWN_CHARS.sub('', sentence).strip()
+    if len(sentence) > MAX_SENTENCE_CHARS:
+        sentence = truncate_text(sentence, MAX_SENTENCE_CHARS) + "…"
+    return sentence
+
+
+def _keyword_title(weights: np.ndarray, terms: List[str]) -> str:
+    top = np.argsort(-weights, kind='stable')[:KEYWORDS_PER_TITLE]
+    return ", ".join(terms[index].capitalize() for index in top if weights[index] > 0)
+
+
+def extractive_summary(text: str, max_points: int) -> Dict[str, Any]:
+    """Summarize `text` without a model, in the {"title", "points"} shape format_summary renders.
+
+    The text is cut into up to `max_points` consecutive sections of similar
+    length. Sentences are ranked with TextRank over the whole document; each
+    section's best sentences become its key points and summary, and its most
+    heavily weighted TF-IDF terms its title. The document title is built from
+    the top terms overall.
+    """
+    spans = sentence_spans(text)
+    sentences = [text[start:end] for start, end in spans]
+    if not sentences:
+        return {"title": "", "points": []}
+
+    matrix = term_matrix(sentences)
+    scores = rank_sentences(matrix, len(sentences))
+
+    n_sections = max(1, min(max_points, len(sentences) // MIN_SECTION_SENTENCES))
+    starts = np.array([start for start, _ in spans])
+    boundaries = np.searchsorted(starts, np.linspace(0, len(text), n_sections + 1)[1:-1])
+    sections = [indices for indices in np.split(np.arange(len(sentences)), boundaries) if len(indices)]
+
+    section_of = np.empty(len(sentences), dtype=np.int64)
+    for number, indices in enumerate(sections):
+        section_of[indices] = number
+    n_terms = len(matrix.terms)
+    term_weights = np.bincount(section_of[matrix.rows] * n_terms + matrix.cols, weights=matrix.values,
+                               minlength=len(sections) * n_terms).reshape(len(sections), n_terms)
+
+    points = []
+    for number, indices in enumerate(sections):
+        ranked = indices[np.argsort(-scores[indices], kind='stable')]
+        # Always leave at least one sentence for the summary
+        n_key_points = min(KEY_POINTS_PER_SECTION, len(ranked) - 1)
+        key_points = sorted(ranked[:n_key_points])
+        details = sorted(ranked[n_key_points:n_key_points + SUMMARY_SENTENCES_PER_SECTION])
+        points.append({
+            "title": _keyword_title(term_weights[number], matrix.terms) or f"Part {number + 1}",
+            "key_points": [_clean_sentence(sentences[index]) for index in key_points],
+            "summary": " ".join(_clean_sentence(sentences[index]) for index in details),
+        })
+
+    return {"title": _keyword_title(term_weights.sum(axis=0), matrix.terms), "points": points}
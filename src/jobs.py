@@ -0,0 +1,126 @@
+import os
+import time
+import asyncio
+import logging
+import tempfile
+import itertools
+from typing import Dict, Any, List, Optional, Set, Coroutine, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+_job_ids = itertools.count(1)
+
+# Jobs currently in flight, by job id
+active_jobs: Dict[int, "JobContext"] = {}
+
+
+class JobContext:
+    """Scope of one user request that owns its temp files, background tasks and deadline.
+
+    Use as `async with JobContext(user_id, "summary") as job:`. On exit only this
+    job's tasks are cancelled and only its temp files are deleted, so concurrent
+    requests from other users are unaffected.
+    """
+
+    def __init__(self, user_id: int, kind: str, timeout: Optional[float] = None):
+        self.id = next(_job_ids)
+        self.user_id = user_id
+        self.kind = kind
+        self.started_at = time.monotonic()
+        self.timeout = timeout
+        self.deadline = self.started_at + timeout if timeout else None
+        self.temp_files: Set[str] = set()
+        self.tasks: Set[asyncio.Task] = set()
+        self._cleanup_callbacks: List[Callable[[], None]] = []
+
+    @property
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None if the job has no deadline."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def create_temp_file(self, suffix: str = None) -> str:
+        """Create a temporary file path that is deleted when the job ends."""
+        temp_path = tempfile.mktemp(suffix=suffix)
+        self.temp_files.add(temp_path)
+        return temp_path
+
+    def spawn(self, coro: Coroutine) -> asyncio.Task:
+        """Run a background task that is cancelled when the job ends."""
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def add_cleanup(self, callback: Callable[[], None]) -> None:
+        """Call `callback` when the job ends, e.g. to give back a scheduler slot."""
+        self._cleanup_callbacks.append(callback)
+
+    async def run(self, awaitable: Awaitable):
+        """Await something within the job's deadline, raising asyncio.TimeoutError if it runs out."""
+        try:
+            return await asyncio.wait_for(awaitable, self.remaining)
+        except asyncio.TimeoutError as e:
+            if not self.expired:
+                raise
+            # Handlers show str(e) to the user, which is empty for a bare TimeoutError
+            raise asyncio.TimeoutError(
+                f"Processing took too long and was stopped after {self.timeout:.0f} seconds") from e
+
+    async def cleanup(self) -> None:
+        for task in list(self.tasks):
+            task.cancel()
+        for task in list(self.tasks):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Error cancelling task of job {self.id}: {e}")
+        self.tasks.clear()
+
+        for temp_file in list(self.temp_files):
+            try:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+            except Exception as e:
+                logger.error(f"Error removing temp file {temp_file}: {e}")
+        self.temp_files.clear()
+
+        while self._cleanup_callbacks:
+            callback = self._cleanup_callbacks.pop()
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in cleanup callback of job {self.id}: {e}")
+
+    async def __aenter__(self) -> "JobContext":
+        active_jobs[self.id] = self
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            await self.cleanup()
+        finally:
+            active_jobs.pop(self.id, None)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "kind": self.kind,
+            "elapsed": time.monotonic() - self.started_at,
+            "remaining": self.remaining,
+            "tasks": len(self.tasks),
+            "temp_files": len(self.temp_files),
+        }
+
+
+def get_active_jobs() -> List[Dict[str, Any]]:
+    """Snapshot of in-flight jobs, oldest first."""
+    return [job.describe() for job in sorted(active_jobs.values(), key=lambda job: job.started_at)]
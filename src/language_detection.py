@@ -0,0 +1,183 @@
+import re
+import math
+import logging
+from collections import Counter
+from typing import Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_WINDOW = 200  # characters taken from the start, middle and end of the text
+MIN_LETTERS = 20  # fewer letters than this are not enough to guess
+CONFIDENCE_EVIDENCE = 20  # n-grams' worth of evidence assumed when turning scores into a confidence
+NGRAM_SIZES = (1, 2, 3)
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "ru": "Russian",
+    "uz": "Uzbek (Latin script)",
+    "uz-Cyrl": "Uzbek (Cyrillic script)",
+    "kk": "Kazakh",
+    "tr": "Turkish",
+    "de": "German",
+    "fr": "French",
+    "es": "Spanish",
+    "ar": "Arabic",
+    "zh": "Chinese",
+    "ja": "Japanese",
+    "ko": "Korean",
+}
+
+# Languages identified by their script alone
+SCRIPT_LANGUAGES = {"arabic": "ar", "han": "zh", "kana": "ja", "hangul": "ko"}
+
+# Short samples of everyday and academic text used to build the n-gram profiles
+PROFILE_SAMPLES = {
+    "latin": {
+        "en": "the students read the lecture notes and write a short summary of the main ideas. "
+              "this chapter explains how the economy works and why prices change over time. "
+              "we should think about what they have learned in class and which questions are still open. "
+              "there are many different ways to study, but regular practice is the most important thing. "
+              "the teacher will give the final exam at the end of the semester, so please prepare with your group.",
+        "uz": "talabalar ma'ruza matnini o'qib, asosiy g'oyalarning qisqacha mazmunini yozadilar. "
+              "bu bobda iqtisodiyot qanday ishlashi va narxlar nega o'zgarishi tushuntiriladi. "
+              "o'qituvchi semestr oxirida yakuniy imtihon o'tkazadi, shuning uchun guruhingiz bilan tayyorlaning. "
+              "biz darsda nimalarni o'rganganimiz haqida o'ylashimiz kerak va qaysi savollar hali ochiq qolgan. "
+              "o'zbekiston tarixi, adabiyoti va madaniyati haqida ko'plab kitoblar bor. men bugun kutubxonaga boraman.",
+        "tr": "öğrenciler ders notlarını okuyup ana fikirlerin kısa bir özetini yazarlar. "
+              "bu bölüm ekonominin nasıl işlediğini ve fiyatların neden zamanla değiştiğini açıklıyor. "
+              "öğretmen dönem sonunda final sınavı yapacak, bu yüzden lütfen grubunuzla hazırlanın. "
+              "derste neler öğrendiğimizi ve hangi soruların hâlâ açık olduğunu düşünmeliyiz. "
+              "düzenli çalışmak en önemli şeydir ve bunun için birçok farklı yol vardır.",
+        "de": "die studenten lesen die vorlesungsnotizen und schreiben eine kurze zusammenfassung der wichtigsten ideen. "
+              "dieses kapitel erklärt, wie die wirtschaft funktioniert und warum sich die preise im laufe der zeit ändern. "
+              "der lehrer wird die abschlussprüfung am ende des semesters geben, also bereiten sie sich bitte mit ihrer gruppe vor. "
+              "wir sollten darüber nachdenken, was wir im unterricht gelernt haben und welche fragen noch offen sind.",
+        "fr": "les étudiants lisent les notes de cours et écrivent un court résumé des idées principales. "
+              "ce chapitre explique comment fonctionne l'économie et pourquoi les prix changent avec le temps. "
+              "le professeur donnera l'examen final à la fin du semestre, alors préparez-vous avec votre groupe. "
+              "nous devons réfléchir à ce que nous avons appris en classe et aux questions qui restent ouvertes.",
+        "es": "los estudiantes leen los apuntes de la clase y escriben un breve resumen de las ideas principales. "
+              "este capítulo explica cómo funciona la economía y por qué los precios cambian con el tiempo. "
+              "el profesor dará el examen final al final del semestre, así que por favor prepárense con su grupo. "
+              "debemos pensar en lo que hemos aprendido en clase y en las preguntas que todavía están abiertas.",
+    },
+    "cyrillic": {
+        "ru": "студенты читают конспекты лекций и пишут краткое изложение основных идей. "
+              "эта глава объясняет, как работает экономика и почему цены меняются со временем. "
+              "преподаватель проведёт итоговый экзамен в конце семестра, поэтому готовьтесь вместе с группой. "
+              "мы должны подумать о том, что мы узнали на занятиях, и какие вопросы ещё остаются открытыми. "
+              "существует много разных способов учиться, но регулярная практика важнее всего.",
+        "uz-Cyrl": "талабалар маъруза матнини ўқиб, асосий ғояларнинг қисқача мазмунини ёзадилар. "
+                   "бу бобда иқтисодиёт қандай ишлаши ва нархлар нега ўзгариши тушунтирилади. "
+                   "ўқитувчи семестр охирида якуний имтиҳон ўтказади, шунинг учун гуруҳингиз билан тайёрланинг. "
+                   "биз дарсда нималарни ўрганганимиз ҳақида ўйлашимиз керак ва қайси саволлар ҳали очиқ қолган. "
+                   "ўзбекистон тарихи, адабиёти ва маданияти ҳақида кўплаб китоблар бор.",
+        "kk": "студенттер дәріс жазбаларын оқып, негізгі идеялардың қысқаша мазмұнын жазады. "
+              "бұл тарау экономиканың қалай жұмыс істейтінін және бағалардың неліктен өзгеретінін түсіндіреді. "
+              "оқытушы семестрдің соңында қорытынды емтихан өткізеді, сондықтан тобыңызбен бірге дайындалыңыз. "
+              "біз сабақта не үйренгенімізді және қандай сұрақтар әлі ашық екенін ойлауымыз керек.",
+    },
+}
+
+# Normalize the many apostrophes used in Uzbek Latin (oʻ, o‘, o’, o`) to one character
+_APOSTROPHES = str.maketrans({"ʻ": "'", "ʼ": "'", "‘": "'", "’": "'", "`": "'"})
+
+
+class LanguageGuess(NamedTuple):
+    language: Optional[str]  # code from LANGUAGE_NAMES, or None if undetermined
+    confidence: float  # 0..1
+
+    @property
+    def name(self) -> Optional[str]:
+        return LANGUAGE_NAMES.get(self.language)
+
+
+SCRIPT_PATTERNS = {
+    "latin": re.compile(r"[a-zA-Z\u00C0-\u024F]"),
+    "cyrillic": re.compile(r"[\u0400-\u04FF]"),
+    "arabic": re.compile(r"[\u0600-\u06FF]"),
+    "kana": re.compile(r"[\u3040-\u30FF]"),
+    "han": re.compile(r"[\u4E00-\u9FFF]"),
+    "hangul": re.compile(r"[\uAC00-\uD7AF]"),
+}
+# Letters, with apostrophes allowed inside a word (o'zbek)
+WORD_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+
+
+def _ngrams(text: str) -> Counter:
+    """Counts of 1- to 3-character n-grams of the words in `text`, padded with spaces."""
+    counts: Counter = Counter()
+    for word in WORD_PATTERN.findall(text):
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            counts.update(padded[i:i + size] for i in range(len(padded) - size + 1))
+    return counts
+
+
+def _build_profiles() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Per script, per language: log-probability of each n-gram in its sample."""
+    profiles: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for script, samples in PROFILE_SAMPLES.items():
+        profiles[script] = {}
+        for language, sample in samples.items():
+            counts = _ngrams(sample.translate(_APOSTROPHES))
+            total = sum(counts.values())
+            profiles[script][language] = {gram: math.log(count / total) for gram, count in counts.items()}
+    return profiles
+
+
+_PROFILES = _build_profiles()
+# One penalty for n-grams missing from a profile, so languages with smaller samples are not favoured
+_UNSEEN_LOGPROB = min(logprob for languages in _PROFILES.values()
+                      for logprobs in languages.values() for logprob in logprobs.values()) - math.log(2)
+
+
+def _sample(text: str) -> str:
+    if len(text) <= 3 * SAMPLE_WINDOW:
+        return text
+    middle = len(text) // 2 - SAMPLE_WINDOW // 2
+    return ' '.join((text[:SAMPLE_WINDOW], text[middle:middle + SAMPLE_WINDOW], text[-SAMPLE_WINDOW:]))
+
+
+def detect_language(text: str) -> LanguageGuess:
+    """Guess the language of `text` from a bounded sample.
+
+    The dominant script narrows the candidates (Arabic, CJK and Korean are decided
+    by script alone); Latin and Cyrillic texts are scored against character n-gram
+    profiles. Cost does not depend on the length of `text`.
+    """
+    sample = _sample(text).lower().translate(_APOSTROPHES)
+
+    scripts = Counter({script: len(pattern.findall(sample)) for script, pattern in SCRIPT_PATTERNS.items()})
+    letters = sum(scripts.values())
+    if letters < MIN_LETTERS:
+        return LanguageGuess(None, 0.0)
+
+    script, script_letters = scripts.most_common(1)[0]
+    script_share = script_letters / letters
+    if script in SCRIPT_LANGUAGES:
+        # Kana mixed into Han text means Japanese
+        if script == "han" and scripts["kana"] >= 0.1 * letters:
+            return LanguageGuess("ja", script_share)
+        return LanguageGuess(SCRIPT_LANGUAGES[script], script_share)
+
+    profiles = _PROFILES.get(script)
+    if not profiles:
+        return LanguageGuess(None, 0.0)
+
+    counts = _ngrams(sample)
+    total = sum(counts.values())
+    if not total:
+        return LanguageGuess(None, 0.0)
+    scores = {}
+    for language, logprobs in profiles.items():
+        score = sum(count * logprobs.get(gram, _UNSEEN_LOGPROB) for gram, count in counts.items())
+        scores[language] = score / total  # average log-probability per n-gram
+
+    best = max(scores, key=scores.get)
+    if len(scores) == 1:
+        return LanguageGuess(best, script_share)
+    # Posterior over the candidates, treating the sample as CONFIDENCE_EVIDENCE independent n-grams
+    weights = {language: math.exp((score - scores[best]) * CONFIDENCE_EVIDENCE) for language, score in scores.items()}
+    confidence = weights[best] / sum(weights.values()) * script_share
+    return LanguageGuess(best, confidence)
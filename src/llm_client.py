@@ -0,0 +1,135 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Hashable, AsyncIterator
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+
+
+class FairLimiter:
+    """Concurrency limiter that grants free slots round-robin across users.
+
+    Each user has a FIFO queue of waiters; when a slot frees up it goes to the
+    next user in rotation, so one user's big document cannot starve everyone else.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._active = 0
+        self._queues: "OrderedDict[Hashable, deque]" = OrderedDict()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def acquire(self, key: Hashable) -> None:
+        if self._active < self.max_concurrency and not self._queues:
+            self._active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as we were cancelled; pass it on
+                self.release()
+            else:
+                queue = self._queues.get(key)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[key]
+            raise
+
+    def release(self) -> None:
+        self._active -= 1
+        while self._queues and self._active < self.max_concurrency:
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class LLMClient:
+    """Async Gemini client with a global fair limiter and single-flight coalescing."""
+
+    def __init__(self, model: str, temperature: float, max_retries: int = 3,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.model = model
+        self._llm = ChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            max_retries=max_retries
+        )
+        self.limiter = FairLimiter(max_concurrency)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced_requests = 0
+
+    @staticmethod
+    def _request_key(messages: List[Dict[str, str]]) -> str:
+        payload = json.dumps(messages, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _call(self, messages: List[Dict[str, str]], user_id: Optional[Hashable]) -> str:
+        async with self.limiter.slot(user_id):
+            response = await self._llm.ainvoke(messages)
+            return response.content
+
+    async def ainvoke(self, messages: List[Dict[str, str]], user_id: Optional[Hashable] = None) -> str:
+        """Invoke the model, sharing one upstream call between identical concurrent requests."""
+        key = self._request_key(messages)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced_requests += 1
+            logger.info(f"Coalescing LLM request {key[:12]} with in-flight call")
+        else:
+            # The upstream call runs in its own task so cancelling one waiter does not fail the others
+            task = asyncio.create_task(self._call(messages, user_id))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def astream(self, messages: List[Dict[str, str]], user_id: Optional[Hashable] = None) -> AsyncIterator[str]:
+        """Stream response text chunks, holding a limiter slot for the whole stream.
+
+        Streams are not coalesced: each caller renders its own progressive output.
+        """
+        async with self.limiter.slot(user_id):
+            async for chunk in self._llm.astream(messages):
+                if chunk.content:
+                    yield chunk.content
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.limiter.active,
+            "waiting": self.limiter.waiting,
+            "in_flight": len(self._inflight),
+            "coalesced": self.coalesced_requests,
+        }
@@ -3,20 +3,49 @@ import asyncio
 import logging
 import re
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from src.text_processing import clean_text, detect_language
+from src.llm_client import LLMClient
+from src.text_processing import clean_text, estimate_tokens, split_into_chunks
+from src.content_selection import select_salient_text
+from src.extractive_summary import extractive_summary
+from src.language_detection import detect_language, LANGUAGE_NAMES
+from src.summary_cache import summary_cache, make_cache_key
+from src.duplicate_index import duplicate_index
 from src import GOOGLE_API_KEY  # Import from src package
 
 logger = logging.getLogger(__name__)
 
 GEMINI_MODEL = "gemini-2.0-flash"
 DEFAULT_TEMPERATURE = 0.7
+# Bump whenever the prompts below change so stale cached summaries are not served
+PROMPT_VERSION = "3"
+
+# Below this detection confidence the summary is written in the user's interface language
+LANGUAGE_CONFIDENCE_THRESHOLD = 0.6
+
+# Map-reduce settings for long documents
+CHUNK_TOKEN_BUDGET = 4000  # Texts above this are summarized chunk by chunk
+MAX_CONCURRENT_CHUNKS = 4
+MAX_INPUT_CHARS = 1_000_000  # Roughly a 300-page textbook
+# Cost vs. quality knob: longer texts are cut down to their most salient sentences before summarizing
+SUMMARY_TOKEN_BUDGET = int(os.environ.get("SUMMARY_TOKEN_BUDGET", "32000"))
+# The token budget changes what is summarized, so it is part of the cache key
+CACHE_VERSION = f"{PROMPT_VERSION}-{SUMMARY_TOKEN_BUDGET}"
+# With this many LLM calls waiting for a slot, new summaries are produced locally instead
+LLM_OVERLOAD_WAITING = int(os.environ.get("LLM_OVERLOAD_WAITING", "16"))
+
+STYLE_INSTRUCTIONS = {
+    "short": "Create a very concise summary with 2-3 main points. Each point should have a bold title, key points in bold, and a brief italic summary.",
+    "medium": "Create a balanced summary with 4-6 main points. Each point should have a bold title, key points in bold, and a detailed italic summary.",
+    "long": "Create a comprehensive summary with 7-10 main points. Each point should have a bold title, key points in bold, and a thorough italic summary."
+}
+
+STYLE_MAX_POINTS = {"short": 3, "medium": 6, "long": 10}
 
 os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
 
-llm = ChatGoogleGenerativeAI(
+llm = LLMClient(
     model=GEMINI_MODEL,
     temperature=DEFAULT_TEMPERATURE,
     max_retries=3
@@ -25,8 +54,8 @@ llm = ChatGoogleGenerativeAI(
 def format_summary(summary_data: Dict[str, Any]) -> str:
     """Format the summary with explicit markdown for Telegram compatibility."""
     try:
-        # Start with the title
-        formatted_text = f"*{summary_data['title']}*\n\n"
+        # Start with the title (may still be missing while a summary is streaming)
+        formatted_text = f"*{summary_data['title']}*\n\n" if summary_data.get('title') else ""
         
         for point in summary_data['points']:
             formatted_text += f"*{point['title']}*\n"
@@ -51,17 +80,68 @@ def format_summary(summary_data: Dict[str, Any]) -> str:
         logger.error(f"Error in formatting summary: {e}")
         return str(summary_data)
 
-async def generate_summary(text: str, user_language: str = None, style: str = "medium") -> str:
-    try:
-        cleaned_text = clean_text(text)
-        
-        style_instructions = {
-            "short": "Create a very concise summary with 2-3 main points. Each point should have a bold title, key points in bold, and a brief italic summary.",
-            "medium": "Create a balanced summary with 4-6 main points. Each point should have a bold title, key points in bold, and a detailed italic summary.",
-            "long": "Create a comprehensive summary with 7-10 main points. Each point should have a bold title, key points in bold, and a thorough italic summary."
-        }
-        
-        system_prompt = f"""You are an expert document summarizer that creates well-structured summaries.
+def local_summary(text: str, style: str = "medium") -> str:
+    """Extractive summary computed on this machine; a fallback and preview for the LLM summary."""
+    return format_summary(extractive_summary(clean_text(text), STYLE_MAX_POINTS[style]))
+
+def _summary_variant(style: str, language: Optional[str], user_id: Optional[int]) -> str:
+    """Everything besides the text that a summary depends on; near-duplicates must share it.
+
+    Near-duplicates are only looked up among the user's own documents: a partial match
+    with someone else's document would hand them a summary of text they never sent.
+    """
+    return f"{GEMINI_MODEL}|{CACHE_VERSION}|{style}|{language or ''}|{user_id or ''}"
+
+def _duplicate_key(cache_key: str, user_id: Optional[int]) -> str:
+    # One index entry per user, so the same document sent by another user does not replace it
+    return f"{cache_key}:{user_id or ''}"
+
+async def _store_summary(cache_key: str, summary: str, document_text: str, style: str,
+                         language: Optional[str], user_id: Optional[int] = None) -> None:
+    await summary_cache.set(cache_key, summary)
+    await duplicate_index.add(_duplicate_key(cache_key, user_id), document_text,
+                              _summary_variant(style, language, user_id))
+
+def _find_similar_sync(text: str, user_language: Optional[str], style: str,
+                       user_id: Optional[int]) -> Optional[Tuple[str, float]]:
+    language = _summary_language(text, user_language)
+    return duplicate_index.find_sync(clean_text(text), _summary_variant(style, language, user_id))
+
+async def find_similar_summary(text: str, user_language: str = None, style: str = "medium",
+                               user_id: Optional[int] = None) -> Optional[Tuple[str, float]]:
+    """Summary of a near-duplicate of `text` the user summarized before, with its estimated similarity."""
+    # Language detection and cleaning are linear in the text, up to a megabyte: keep them off the event loop
+    match = await asyncio.to_thread(_find_similar_sync, text, user_language, style, user_id)
+    if match is None:
+        return None
+    index_key, similarity = match
+    cache_key = index_key.split(':', 1)[0]
+    summary = await summary_cache.get(cache_key)
+    if summary is None:
+        # The summary has expired or been evicted from the cache
+        await duplicate_index.remove(index_key)
+        return None
+    logger.info(f"Found near-duplicate summary {cache_key[:12]} ({similarity:.0%} similar)")
+    return summary, similarity
+
+def llm_overloaded() -> bool:
+    return llm.limiter.waiting >= LLM_OVERLOAD_WAITING
+
+def _summary_language(text: str, user_language: Optional[str]) -> Optional[str]:
+    """Language the summary is written in: the detected document language, else the user's."""
+    guess = detect_language(text)
+    if guess.language and guess.confidence >= LANGUAGE_CONFIDENCE_THRESHOLD:
+        return guess.language
+    logger.info(f"Unsure of document language ({guess.language}, {guess.confidence:.2f}), using {user_language}")
+    return user_language if user_language in LANGUAGE_NAMES else None
+
+def _language_instruction(language: Optional[str]) -> str:
+    if language is None:
+        return "Write the summary in the original language of the text"
+    return f"Write the summary in {LANGUAGE_NAMES[language]}"
+
+def _build_system_prompt(style: str, language: Optional[str] = None) -> str:
+    return f"""You are an expert document summarizer that creates well-structured summaries.
 
 IMPORTANT: Your summary MUST follow these requirements:
 - Return the summary in JSON format with this structure:
@@ -80,44 +160,321 @@ IMPORTANT: Your summary MUST follow these requirements:
         }}
     ]
 }}
-- Maintain the original language of the text
+- {_language_instruction(language)}
 - Write in clear, natural language
 
 Style requirements:
-{style_instructions[style]}"""
-        
-        user_prompt = f"""Please create a well-structured summary of this text following the specified style:
+{STYLE_INSTRUCTIONS[style]}"""
+
+def _build_reduce_prompt(style: str, language: Optional[str] = None) -> str:
+    return f"""{_build_system_prompt(style, language)}
+
+You will receive partial summaries of consecutive sections of ONE document, in the same JSON structure.
+Merge them into a single summary of the whole document: pick one overall title, combine overlapping points,
+and keep the most important information from every section."""
+
+async def _invoke_llm(messages: List[Dict[str, str]], user_id: Optional[int] = None) -> str:
+    return await llm.ainvoke(messages, user_id=user_id)
+
+def _parse_summary_json(response: str) -> Dict[str, Any]:
+    """Extract and parse the summary JSON from a model response."""
+    # Extract JSON from response if needed (sometimes models wrap JSON in text)
+    json_match = re.search(r'```json\s*([\s\S]*?)\s*```|(\{[\s\S]*\})', response)
+    if json_match:
+        json_str = json_match.group(1) or json_match.group(2)
+    else:
+        json_str = response
+    return json.loads(json_str)
+
+async def _summarize_chunk(chunk: str, index: int, total: int, style: str, language: Optional[str],
+                           semaphore: asyncio.Semaphore, user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Map step: summarize one section of a long document."""
+    messages = [
+        {"role": "system", "content": _build_system_prompt(style, language)},
+        {"role": "user", "content": f"""Please create a well-structured summary of section {index + 1} of {total} of a longer document following the specified style:
+
+{chunk}"""}
+    ]
+    async with semaphore:
+        try:
+            response = await _invoke_llm(messages, user_id)
+            return _parse_summary_json(response)
+        except Exception as e:
+            logger.error(f"Error summarizing chunk {index + 1}/{total}: {e}")
+            return None
+
+def _merge_points_locally(partials: List[Dict[str, Any]], style: str) -> Dict[str, Any]:
+    """Fallback reduce step that concatenates partial points without another LLM call."""
+    points = [point for partial in partials for point in partial.get('points', [])]
+    max_points = STYLE_MAX_POINTS[style]
+    if len(points) > max_points:
+        # Keep points spread evenly across the document rather than just the opening sections
+        step = len(points) / max_points
+        points = [points[int(i * step)] for i in range(max_points)]
+    return {"title": partials[0].get('title', ''), "points": points}
+
+async def _reduce_summaries(partials: List[Dict[str, Any]], style: str, language: Optional[str],
+                            semaphore: asyncio.Semaphore, user_id: Optional[int] = None) -> Tuple[Dict[str, Any], bool]:
+    """Reduce step: merge partial summaries, in groups if they do not fit in one call.
+
+    Returns the merged summary and whether any group fell back to merging locally.
+    """
+    degraded = False
+    while True:
+        groups = []
+        current = []
+        current_tokens = 0
+        for partial in partials:
+            text = json.dumps(partial, ensure_ascii=False)
+            tokens = estimate_tokens(text)
+            if current and current_tokens + tokens > CHUNK_TOKEN_BUDGET:
+                groups.append(current)
+                current = []
+                current_tokens = 0
+            current.append((partial, text))
+            current_tokens += tokens
+        groups.append(current)
+
+        async def reduce_group(group):
+            nonlocal degraded
+            if len(group) == 1:
+                return group[0][0]
+            messages = [
+                {"role": "system", "content": _build_reduce_prompt(style, language)},
+                {"role": "user", "content": "Partial summaries in document order:\n\n" + "\n\n".join(t for _, t in group)}
+            ]
+            async with semaphore:
+                try:
+                    return _parse_summary_json(await _invoke_llm(messages, user_id))
+                except Exception as e:
+                    logger.error(f"Error in reduce step, merging locally: {e}")
+                    degraded = True
+                    return _merge_points_locally([p for p, _ in group], style)
+
+        merged = await asyncio.gather(*(reduce_group(group) for group in groups))
+        if len(merged) == 1:
+            return merged[0], degraded
+        if len(merged) == len(partials):
+            # Every partial is over budget on its own; further LLM rounds cannot shrink the input
+            return _merge_points_locally(merged, style), True
+        partials = list(merged)
+
+async def _map_reduce_summary(text: str, style: str, language: Optional[str],
+                              user_id: Optional[int] = None) -> Tuple[Dict[str, Any], bool]:
+    """Summarize a long document chunk by chunk, then merge the partial summaries.
+
+    Returns the summary and whether it is degraded: some chunks failed, or the
+    reduce step fell back to merging points locally.
+    """
+    chunks = split_into_chunks(text, CHUNK_TOKEN_BUDGET)
+    logger.info(f"Summarizing long document in {len(chunks)} chunks")
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHUNKS)
+
+    results = await asyncio.gather(*(
+        _summarize_chunk(chunk, i, len(chunks), style, language, semaphore, user_id)
+        for i, chunk in enumerate(chunks)
+    ))
+    partials = [result for result in results if result and result.get('points')]
+    if not partials:
+        raise ValueError("All document chunks failed to summarize")
+    if len(partials) < len(chunks):
+        logger.warning(f"{len(chunks) - len(partials)} of {len(chunks)} chunks failed to summarize")
+
+    summary, degraded = await _reduce_summaries(partials, style, language, semaphore, user_id)
+    return summary, degraded or len(partials) < len(chunks)
+
+class IncrementalSummaryParser:
+    """Incremental parser for the summary JSON as it streams from the model.
+
+    Tracks string/escape state and bracket depth over the growing buffer, picks up
+    the top-level "title" as soon as its string closes and decodes every object in
+    the top-level "points" array as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.title: Optional[str] = None
+        self.points: List[Dict[str, Any]] = []
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._expect_value = False
+        self._in_points = False
+        self._point_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk of model output. Returns True if the title or points changed."""
+        self.buffer += chunk
+        buffer = self.buffer
+        changed = False
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        changed |= self._top_level_string(buffer[self._string_start:i + 1])
+            elif char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in '{[':
+                if char == '[' and len(self._stack) == 1 and self._expect_value and self._key == 'points':
+                    self._in_points = True
+                self._stack.append(char)
+                if char == '{' and self._in_points and len(self._stack) == 3:
+                    self._point_start = i
+            elif char in '}]' and self._stack:
+                if char == '}' and self._point_start is not None and len(self._stack) == 3:
+                    try:
+                        self.points.append(json.loads(buffer[self._point_start:i + 1]))
+                        changed = True
+                    except json.JSONDecodeError:
+                        pass
+                    self._point_start = None
+                self._stack.pop()
+                if char == ']' and len(self._stack) == 1:
+                    self._in_points = False
+            elif len(self._stack) == 1:
+                if char == ':':
+                    self._expect_value = True
+                elif char == ',':
+                    self._key = None
+                    self._expect_value = False
+            i += 1
+        self._pos = i
+        return changed
+
+    def _top_level_string(self, raw: str) -> bool:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return False
+        if not self._expect_value:
+            self._key = value
+            return False
+        self._expect_value = False
+        if self._key == 'title' and self.title is None:
+            self.title = value
+            return True
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"title": self.title, "points": list(self.points)}
+
+async def _summarize_uncached(cleaned_text: str, style: str, language: Optional[str],
+                              user_id: Optional[int], cache_key: str, document_text: str) -> str:
+    if estimate_tokens(cleaned_text) > CHUNK_TOKEN_BUDGET:
+        summary_data, degraded = await _map_reduce_summary(cleaned_text, style, language, user_id)
+        summary = format_summary(summary_data)
+        if degraded:
+            # A retry may do better, so neither cache it nor offer it to near-duplicates
+            logger.info(f"Not caching degraded summary {cache_key[:12]}")
+        else:
+            await _store_summary(cache_key, summary, document_text, style, language, user_id)
+        return summary
+    
+    user_prompt = f"""Please create a well-structured summary of this text following the specified style:
 
 {cleaned_text}"""
+    
+    messages = [
+        {"role": "system", "content": _build_system_prompt(style, language)},
+        {"role": "user", "content": user_prompt}
+    ]
+    
+    response = await _invoke_llm(messages, user_id)
+    
+    try:
+        summary_data = _parse_summary_json(response)
         
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+        # Format the summary with proper markdown
+        summary = format_summary(summary_data)
+        await _store_summary(cache_key, summary, document_text, style, language, user_id)
+        return summary
         
-        response = await asyncio.to_thread(
-            lambda: llm.invoke(messages).content
-        )
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing JSON response: {e}")
+        cleaned_response = re.sub(r'```json|```', '', response).strip()
+        return cleaned_response
+
+def _prepare_text(text: str, user_language: Optional[str], style: str) -> Tuple[Optional[str], str, str]:
+    """Summary language, cleaned text and cache key of `text`; linear in its length, run in a thread."""
+    # Detect on the raw text: clean_text drops the typographic apostrophes of Uzbek Latin
+    language = _summary_language(text, user_language)
+    cleaned_text = clean_text(text)
+    return language, cleaned_text, make_cache_key(cleaned_text, style, language, GEMINI_MODEL, CACHE_VERSION)
+
+async def generate_summary(text: str, user_language: str = None, style: str = "medium", user_id: Optional[int] = None) -> str:
+    try:
+        language, cleaned_text, cache_key = await asyncio.to_thread(_prepare_text, text, user_language, style)
+        cached_summary = await summary_cache.get(cache_key)
+        if cached_summary is not None:
+            logger.info(f"Summary cache hit for key {cache_key[:12]}")
+            return cached_summary
         
-        try:
-            # Extract JSON from response if needed (sometimes models wrap JSON in text)
-            json_match = re.search(r'```json\s*([\s\S]*?)\s*```|(\{[\s\S]*\})', response)
-            if json_match:
-                json_str = json_match.group(1) or json_match.group(2)
-            else:
-                json_str = response
-                
-            # Parse the JSON response
-            summary_data = json.loads(json_str)
-            
-            # Format the summary with proper markdown
-            return format_summary(summary_data)
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON response: {e}")
-            cleaned_response = re.sub(r'```json|```', '', response).strip()
-            return cleaned_response
+        selected_text = await asyncio.to_thread(select_salient_text, cleaned_text, SUMMARY_TOKEN_BUDGET)
+        return await _summarize_uncached(selected_text, style, language, user_id, cache_key, cleaned_text)
         
     except Exception as e:
         logger.error(f"Error in LLM summarization: {e}")
-        raise
\ No newline at end of file
+        raise
+
+async def stream_summary(text: str, user_language: str = None, style: str = "medium",
+                         user_id: Optional[int] = None) -> AsyncIterator[str]:
+    """Yield progressively longer formatted summaries as points stream in.
+
+    The last yielded value is the complete summary. Cached results and long
+    documents (which go through map-reduce) are yielded once, in full.
+    """
+    language, cleaned_text, cache_key = await asyncio.to_thread(_prepare_text, text, user_language, style)
+
+    cached_summary = await summary_cache.get(cache_key)
+    if cached_summary is not None:
+        logger.info(f"Summary cache hit for key {cache_key[:12]}")
+        yield cached_summary
+        return
+
+    selected_text = await asyncio.to_thread(select_salient_text, cleaned_text, SUMMARY_TOKEN_BUDGET)
+    if estimate_tokens(selected_text) > CHUNK_TOKEN_BUDGET:
+        yield await _summarize_uncached(selected_text, style, language, user_id, cache_key, cleaned_text)
+        return
+
+    messages = [
+        {"role": "system", "content": _build_system_prompt(style, language)},
+        {"role": "user", "content": f"""Please create a well-structured summary of this text following the specified style:
+
+{selected_text}"""}
+    ]
+
+    parser = IncrementalSummaryParser()
+    stream = llm.astream(messages, user_id=user_id)
+    try:
+        async for chunk in stream:
+            if parser.feed(chunk) and parser.points:
+                yield format_summary(parser.snapshot())
+    except Exception as e:
+        logger.error(f"Error in LLM summary streaming: {e}")
+        raise
+    finally:
+        # Closing this generator early must release the limiter slot held by astream right away
+        await stream.aclose()
+
+    response = parser.buffer
+    try:
+        summary = format_summary(_parse_summary_json(response))
+        await _store_summary(cache_key, summary, cleaned_text, style, language, user_id)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing streamed JSON response: {e}")
+        if parser.points:
+            summary = format_summary(parser.snapshot())
+        else:
+            summary = re.sub(r'```json|```', '', response).strip()
+    yield summary
@@ -0,0 +1,183 @@
+import os
+import json
+import asyncio
+import logging
+import tempfile
+from typing import Tuple, Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.environ.get("FFPROBE_BINARY", "ffprobe")
+FFMPEG_TIMEOUT = 600  # seconds
+
+# "copy" keeps the original audio stream when its codec can be stored as-is;
+# "speech" always downmixes to mono 16kHz low-bitrate MP3, which is smaller to upload
+VIDEO_AUDIO_MODE = os.environ.get("VIDEO_AUDIO_MODE", "copy")
+
+# Audio codecs that can be copied out of a video container, and the extension to store them under
+COPYABLE_AUDIO_CODECS = {
+    "aac": ".m4a",
+    "mp3": ".mp3",
+    "opus": ".ogg",
+    "vorbis": ".ogg",
+}
+
+SPEECH_AUDIO_ARGS = ["-ac", "1", "-ar", "16000", "-c:a", "libmp3lame", "-b:a", "48k"]
+
+
+async def run_command(args: List[str], timeout: float = FFMPEG_TIMEOUT) -> Tuple[int, bytes, bytes]:
+    """Run a subprocess without blocking the event loop. Returns (returncode, stdout, stderr)."""
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, stdout, stderr
+
+
+async def probe_media(path: str) -> Optional[Dict[str, Any]]:
+    """Return the first audio stream's codec, channels and sample rate plus the duration, or None."""
+    returncode, stdout, stderr = await run_command([
+        FFPROBE_BINARY, "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,channels,sample_rate:format=duration",
+        "-of", "json", path
+    ], timeout=60)
+    if returncode != 0:
+        logger.warning(f"ffprobe failed for {path}: {stderr.decode(errors='replace').strip()}")
+        return None
+
+    data = json.loads(stdout or b"{}")
+    streams = data.get("streams") or []
+    if not streams:
+        return None
+    stream = streams[0]
+    duration = data.get("format", {}).get("duration")
+    return {
+        "codec": stream.get("codec_name"),
+        "channels": stream.get("channels"),
+        "sample_rate": stream.get("sample_rate"),
+        "duration": float(duration) if duration else None,
+    }
+
+
+async def _ffmpeg_extract(video_path: str, audio_path: str, codec_args: List[str]) -> bool:
+    returncode, _, stderr = await run_command([
+        FFMPEG_BINARY, "-y", "-v", "error",
+        "-i", video_path,
+        "-vn", "-map", "0:a:0",
+        *codec_args,
+        audio_path
+    ])
+    if returncode != 0 or not os.path.exists(audio_path) or os.path.getsize(audio_path) == 0:
+        logger.warning(f"ffmpeg audio extraction failed: {stderr.decode(errors='replace').strip()}")
+        return False
+    return True
+
+
+async def extract_audio_track(video_path: str, mode: str = VIDEO_AUDIO_MODE) -> Optional[str]:
+    """Pull the audio track out of a video without decoding the video stream.
+
+    Copies the audio stream as-is when possible, otherwise downmixes it to a mono
+    speech-quality MP3. Returns the path of a new temp file, or None if ffmpeg is
+    unavailable or the video has no usable audio.
+    """
+    try:
+        info = await probe_media(video_path)
+    except FileNotFoundError:
+        logger.warning(f"{FFPROBE_BINARY} not found, cannot demux audio")
+        return None
+    if info is None:
+        return None
+
+    attempts = []
+    copy_extension = COPYABLE_AUDIO_CODECS.get(info["codec"])
+    if mode == "copy" and copy_extension:
+        attempts.append((copy_extension, ["-c:a", "copy"]))
+    attempts.append((".mp3", SPEECH_AUDIO_ARGS))
+
+    for extension, codec_args in attempts:
+        audio_path = tempfile.mktemp(suffix=extension)
+        try:
+            if await _ffmpeg_extract(video_path, audio_path, codec_args):
+                return audio_path
+        except FileNotFoundError:
+            logger.warning(f"{FFMPEG_BINARY} not found, cannot demux audio")
+            return None
+        except BaseException:
+            if os.path.exists(audio_path):
+                os.remove(audio_path)
+            raise
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+    return None
+
+
+async def detect_silences(path: str, noise_db: int = -30, min_silence: float = 0.5) -> List[Tuple[float, float]]:
+    """Return (start, end) times of silent stretches using ffmpeg's silencedetect filter."""
+    returncode, _, stderr = await run_command([
+        FFMPEG_BINARY, "-v", "info", "-nostats",
+        "-i", path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+        "-f", "null", "-"
+    ])
+    if returncode != 0:
+        logger.warning(f"Silence detection failed for {path}")
+        return []
+
+    silences = []
+    start = None
+    for line in stderr.decode(errors="replace").splitlines():
+        if "silence_start:" in line:
+            start = float(line.split("silence_start:")[1].split()[0])
+        elif "silence_end:" in line and start is not None:
+            end = float(line.split("silence_end:")[1].split()[0])
+            silences.append((start, end))
+            start = None
+    return silences
+
+
+def plan_segments(duration: float, silences: List[Tuple[float, float]], target: float = 300.0,
+                  max_length: float = 420.0, overlap: float = 2.0) -> List[Tuple[float, float]]:
+    """Plan (start, end) segments of roughly `target` seconds, cut in silences where possible.
+
+    Each segment after the first starts `overlap` seconds before the previous cut so
+    words at the boundary are not lost; the duplicates are removed when stitching.
+    """
+    min_length = target / 2
+    split_points = sorted((start + end) / 2 for start, end in silences)
+    segments = []
+    cursor = 0.0
+    while duration - cursor > max_length:
+        ideal = cursor + target
+        candidates = [point for point in split_points if cursor + min_length <= point <= cursor + max_length]
+        cut = min(candidates, key=lambda point: abs(point - ideal)) if candidates else ideal
+        segments.append((max(0.0, cursor - overlap), cut))
+        cursor = cut
+    segments.append((max(0.0, cursor - overlap), duration))
+    return segments
+
+
+async def cut_audio_segment(path: str, start: float, end: float) -> Optional[str]:
+    """Cut [start, end) out of an audio/video file as a mono speech-quality MP3 temp file."""
+    segment_path = tempfile.mktemp(suffix=".mp3")
+    returncode, _, stderr = await run_command([
+        FFMPEG_BINARY, "-y", "-v", "error",
+        "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}",
+        "-i", path,
+        "-vn", *SPEECH_AUDIO_ARGS,
+        segment_path
+    ])
+    if returncode != 0:
+        logger.warning(f"Failed to cut audio segment {start:.1f}-{end:.1f}s: {stderr.decode(errors='replace').strip()}")
+        if os.path.exists(segment_path):
+            os.remove(segment_path)
+        return None
+    return segment_path
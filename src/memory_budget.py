@@ -0,0 +1,163 @@
+import os
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Optional
+
+import psutil
+
+from src.jobs import JobContext
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+MEMORY_POOL_BYTES = int(os.environ.get("MEMORY_POOL_MB", "200")) * MB  # the old MAX_TOTAL_MEMORY; raise on larger hosts
+MEMORY_WAIT_TIMEOUT = 120  # seconds a job may wait for memory before it is rejected
+MIN_RESERVATION = 16 * MB
+
+# Starting estimates of peak memory as a multiple of the input size; calibrated from observed peaks
+DEFAULT_MEMORY_FACTORS = {'video': 1.5, 'audio': 2.0, 'document': 4.0, 'summary': 3.0}
+CALIBRATION_WEIGHT = 0.2  # weight of each new observation in the moving average
+MIN_MEMORY_FACTOR, MAX_MEMORY_FACTOR = 0.5, 20.0
+MEMORY_SAMPLE_INTERVAL = 0.5  # seconds
+
+
+def _process_tree_rss() -> int:
+    """Resident memory of this process plus its children (process pool workers, ffmpeg)."""
+    process = psutil.Process(os.getpid())
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a job's memory estimate cannot be reserved."""
+
+
+class Reservation:
+    __slots__ = ("job_id", "file_type", "input_size", "amount", "baseline_rss", "peak", "solo")
+
+    def __init__(self, job_id: int, file_type: str, input_size: int, amount: int, baseline_rss: int):
+        self.job_id = job_id
+        self.file_type = file_type
+        self.input_size = input_size
+        self.amount = amount
+        self.baseline_rss = baseline_rss
+        self.peak = 0
+        self.solo = True  # no other reservation overlapped, so the peak is attributable to this job
+
+
+class MemoryBudget:
+    """Fixed pool of memory that jobs reserve from before loading their input.
+
+    A reservation is estimated from the file type and size. Jobs that do not fit wait
+    in FIFO order until memory is released, and are rejected after `wait_timeout`.
+    While reservations are held, RSS of the process tree is sampled; peaks seen by
+    jobs that ran alone are used to calibrate the per-type estimates.
+    """
+
+    def __init__(self, capacity: int = MEMORY_POOL_BYTES, wait_timeout: float = MEMORY_WAIT_TIMEOUT):
+        self.capacity = capacity
+        self.wait_timeout = wait_timeout
+        self.factors: Dict[str, float] = dict(DEFAULT_MEMORY_FACTORS)
+        self.reserved = 0
+        self._active: Dict[int, Reservation] = {}
+        self._waiters: deque = deque()  # (amount, future)
+        self._sampler: Optional[asyncio.Task] = None
+
+    def estimate(self, file_type: str, input_size: int) -> int:
+        return max(MIN_RESERVATION, int(self.factors.get(file_type, 4.0) * input_size))
+
+    def _fits(self, amount: int) -> bool:
+        return self.reserved + amount <= self.capacity
+
+    def _wake_waiters(self) -> None:
+        while self._waiters:
+            amount, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(amount):
+                return
+            self._waiters.popleft()
+            self.reserved += amount
+            future.set_result(None)
+
+    async def reserve(self, job: JobContext, file_type: str, input_size: int) -> Reservation:
+        """Reserve memory for `job`, waiting if the pool is exhausted; released when the job ends."""
+        amount = self.estimate(file_type, input_size)
+        if amount > self.capacity:
+            raise MemoryBudgetExceeded(
+                f"{file_type} of {input_size / MB:.1f}MB needs ~{amount / MB:.0f}MB, pool is {self.capacity / MB:.0f}MB")
+
+        if not self._waiters and self._fits(amount):
+            self.reserved += amount
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append((amount, future))
+            logger.info(f"Job {job.id} waiting for {amount / MB:.0f}MB of memory "
+                        f"({self.reserved / MB:.0f}/{self.capacity / MB:.0f}MB reserved)")
+            try:
+                await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+            except BaseException as e:
+                if future.done() and not future.cancelled():
+                    self.reserved -= amount
+                    self._wake_waiters()
+                else:
+                    future.cancel()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise MemoryBudgetExceeded(f"Timed out waiting for {amount / MB:.0f}MB of memory") from e
+                raise
+
+        reservation = Reservation(job.id, file_type, input_size, amount, _process_tree_rss())
+        for other in self._active.values():
+            other.solo = False
+        reservation.solo = not self._active
+        self._active[job.id] = reservation
+        if self._sampler is None or self._sampler.done():
+            self._sampler = asyncio.create_task(self._sample())
+        job.add_cleanup(lambda: self.release(reservation))
+        return reservation
+
+    def release(self, reservation: Reservation) -> None:
+        if self._active.pop(reservation.job_id, None) is None:
+            return
+        self.reserved -= reservation.amount
+        self._calibrate(reservation)
+        self._wake_waiters()
+
+    def _calibrate(self, reservation: Reservation) -> None:
+        if not reservation.solo or reservation.input_size <= 0 or reservation.peak <= 0:
+            return
+        observed = reservation.peak / reservation.input_size
+        current = self.factors.get(reservation.file_type, 4.0)
+        updated = (1 - CALIBRATION_WEIGHT) * current + CALIBRATION_WEIGHT * observed
+        self.factors[reservation.file_type] = min(MAX_MEMORY_FACTOR, max(MIN_MEMORY_FACTOR, updated))
+        logger.info(f"Memory factor for {reservation.file_type}: {current:.2f} -> "
+                    f"{self.factors[reservation.file_type]:.2f} (peak {reservation.peak / MB:.1f}MB)")
+
+    async def _sample(self) -> None:
+        while self._active:
+            try:
+                rss = await asyncio.to_thread(_process_tree_rss)
+            except Exception as e:
+                logger.error(f"Error sampling memory usage: {e}")
+                return
+            for reservation in list(self._active.values()):
+                reservation.peak = max(reservation.peak, rss - reservation.baseline_rss)
+            await asyncio.sleep(MEMORY_SAMPLE_INTERVAL)
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "reserved_mb": self.reserved / MB,
+            "capacity_mb": self.capacity / MB,
+            "active": len(self._active),
+            "waiting": sum(1 for _, future in self._waiters if not future.done()),
+        }
+
+
+memory_budget = MemoryBudget()
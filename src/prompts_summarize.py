@@ -18,6 +18,10 @@ TRANSLATIONS = {
         "error": "❌ An error occurred. Please try again.",
         "unsupported": "❌ Unsupported file format. Please use PDF, DOCX, DOC, or TXT.",
         "send_document": "📤 Ready to Learn! 📤\n\n✨ Please share your content with me:\n• 📄 A document (lecture, textbook, paper)\n• 🎥 A video (lecture, tutorial)\n• 🎤 An audio recording\n• 🔗 A web link (article, research paper)\n• 💬 Some text\n\nI'll create a perfect summary for you!",
+        "summary_preview": "⚡ *Quick preview* — the full summary is on its way...",
+        "quick_summary": "⚡ *Quick summary* — our AI service is busy, so this summary was made from the key sentences of your text.",
+        "similar_summary_found": "♻️ *This looks like a document that was already summarized* ({similarity:.0%} similar), so here is its summary right away.",
+        "summarize_anyway": "🔄 Summarize anyway",
         "summary_ready": "✅ Your summary is ready! You can send me another document if you'd like to summarize more content.",
         "text_too_short": "⚠️ Text is too short. Please provide at least 50 characters.",
         "content_too_short": "⚠️ Content is too short. Please provide more content.",
@@ -63,6 +67,10 @@ TRANSLATIONS = {
         "processing_video": "🎥 *Обработка видео...* 🎥\n\n🎬 *Извлечение аудио*\n📝 *Преобразование в текст*\n⏱️ *Это может занять несколько минут*",
         "no_api_key": "⚠️ *Функция аудио/видео недоступна* ⚠️\n\n🔑 *Отсутствует API ключ*\n\n📞 *Пожалуйста, свяжитесь с администратором для включения этой функции*",
         "premium_required": "🔒 *Премиум функция*\n\nНастройки стиля конспекта доступны для премиум пользователей. Обновите свой аккаунт для доступа к этой и другим функциям!",
+        "summary_preview": "⚡ *Быстрый предпросмотр* — полный конспект уже готовится...",
+        "quick_summary": "⚡ *Быстрый конспект* — сервис ИИ сейчас перегружен, поэтому конспект составлен из ключевых предложений вашего текста.",
+        "similar_summary_found": "♻️ *Похоже, этот документ уже был обработан* (совпадение {similarity:.0%}), поэтому вот его конспект.",
+        "summarize_anyway": "🔄 Создать новый конспект",
         "summary_ready": "✅ Ваш конспект готов! Вы можете отправить мне другой документ, если хотите создать еще один конспект.",
         "text_successfully_processed": "Text Successfully Processed",
         "would_you_like_summary": "Would you like me to create a summary of this text?"
@@ -78,6 +86,10 @@ TRANSLATIONS = {
         "error": "❌ Xatolik yuz berdi. Iltimos, qayta urinib ko'ring.",
         "unsupported": "❌ Qo'llab-quvvatlanmaydigan fayl formati. Iltimos, PDF, DOCX, DOC yoki TXT formatidan foydalaning.",
         "send_document": "📤 O'rganishga tayyor! 📤\n\n✨ Iltimos, kontentingizni menga yuboring:\n• 📄 Hujjat (ma'ruza, darslik, maqola)\n• 🎥 Video (ma'ruza, darslik)\n• 🎤 Audio yozuv\n• 🔗 Veb havola (maqola, tadqiqot ishi)\n• 💬 Matn\n\nMen siz uchun mukammal xulosa yarataman!",
+        "summary_preview": "⚡ *Tezkor ko'rinish* — to'liq xulosa tayyorlanmoqda...",
+        "quick_summary": "⚡ *Tezkor xulosa* — AI xizmati hozir band, shuning uchun xulosa matningizdagi asosiy gaplardan tuzildi.",
+        "similar_summary_found": "♻️ *Bu hujjat avval xulosa qilinganga o'xshaydi* ({similarity:.0%} o'xshash), shuning uchun uning xulosasi darhol yuborildi.",
+        "summarize_anyway": "🔄 Baribir xulosa qilish",
         "summary_ready": "✅ Xulosangiz tayyor! Agar yana xulosa qilmoqchi bo'lsangiz, menga boshqa hujjat yuborishingiz mumkin.",
         "text_too_short": "⚠️ Matn juda qisqa. Iltimos, kamida 50 ta belgi kiriting.",
         "content_too_short": "⚠️ Kontent juda qisqa. Iltimos, ko'proq kontent kiriting.",
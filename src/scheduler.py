@@ -0,0 +1,154 @@
+import os
+import asyncio
+import logging
+import itertools
+from collections import deque
+from typing import Dict, Optional, Callable, Awaitable
+
+from src.jobs import JobContext
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_MAX_RUNNING_JOBS = int(os.environ.get("SCHEDULER_MAX_RUNNING_JOBS", "4"))
+PREMIUM_WEIGHT = 3  # premium jobs started for every free job when both queues are waiting
+MAX_RUNNING_PER_USER = {"premium": 2, "free": 1}
+# Estimated work (cost units) allowed to wait in each queue before new jobs are turned away
+MAX_QUEUED_COST = {"premium": 400.0, "free": 100.0}
+
+# Cost units per MB of input, plus a fixed overhead per job
+COST_PER_MB = {"video": 3.0, "audio": 2.0, "document": 1.0, "summary": 2.0, "text": 0.5}
+BASE_JOB_COST = 1.0
+
+
+def estimate_job_cost(file_type: str, file_size: int) -> float:
+    """Rough relative cost of a job from its type and input size in bytes."""
+    return BASE_JOB_COST + COST_PER_MB.get(file_type, 1.0) * file_size / 1024 / 1024
+
+
+class AdmissionRejected(Exception):
+    """Raised when the queue for a user's tier is too full, or a job's deadline passes while it waits."""
+
+
+class _Ticket:
+    __slots__ = ("id", "user_id", "tier", "cost", "future")
+
+    def __init__(self, ticket_id: int, user_id: int, tier: str, cost: float, future: asyncio.Future):
+        self.id = ticket_id
+        self.user_id = user_id
+        self.tier = tier
+        self.cost = cost
+        self.future = future
+
+
+class JobScheduler:
+    """Weighted two-tier job scheduler with per-user caps and cost-based admission.
+
+    Premium and free jobs wait in separate FIFO queues. When both have work, premium
+    jobs are started PREMIUM_WEIGHT times as often as free ones, so premium latency
+    stays bounded while free users still make progress. A user never has more than
+    their tier's cap of jobs running at once.
+    """
+
+    def __init__(self, max_running: int = SCHEDULER_MAX_RUNNING_JOBS, premium_weight: int = PREMIUM_WEIGHT):
+        self.max_running = max_running
+        self.premium_weight = premium_weight
+        self._queues: Dict[str, deque] = {"premium": deque(), "free": deque()}
+        self._queued_cost: Dict[str, float] = {"premium": 0.0, "free": 0.0}
+        self._running: Dict[int, int] = {}
+        self._running_total = 0
+        self._premium_streak = 0
+        self._ids = itertools.count(1)
+
+    def _user_cap_reached(self, ticket: _Ticket) -> bool:
+        return self._running.get(ticket.user_id, 0) >= MAX_RUNNING_PER_USER[ticket.tier]
+
+    def _pop_eligible(self, tier: str) -> Optional[_Ticket]:
+        queue = self._queues[tier]
+        for ticket in queue:
+            if not self._user_cap_reached(ticket):
+                queue.remove(ticket)
+                self._queued_cost[tier] -= ticket.cost
+                return ticket
+        return None
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        # Give free jobs a turn after `premium_weight` consecutive premium starts
+        order = ("free", "premium") if self._premium_streak >= self.premium_weight else ("premium", "free")
+        for tier in order:
+            ticket = self._pop_eligible(tier)
+            if ticket is not None:
+                self._premium_streak = self._premium_streak + 1 if tier == "premium" else 0
+                return ticket
+        return None
+
+    def _start(self, ticket: _Ticket) -> None:
+        self._running[ticket.user_id] = self._running.get(ticket.user_id, 0) + 1
+        self._running_total += 1
+        ticket.future.set_result(None)
+
+    def _dispatch(self) -> None:
+        while self._running_total < self.max_running:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            self._start(ticket)
+
+    def _release(self, ticket: _Ticket) -> None:
+        self._running_total -= 1
+        remaining = self._running.get(ticket.user_id, 1) - 1
+        if remaining > 0:
+            self._running[ticket.user_id] = remaining
+        else:
+            self._running.pop(ticket.user_id, None)
+        self._dispatch()
+
+    def queue_position(self, ticket: _Ticket) -> int:
+        """1-based position among jobs that will start before this one in its tier."""
+        return list(self._queues[ticket.tier]).index(ticket) + 1
+
+    async def admit(self, job: JobContext, is_premium: bool, cost: float,
+                    on_queued: Optional[Callable[[int], Awaitable[None]]] = None) -> None:
+        """Wait until `job` may run; its slot is released when the job ends.
+
+        Raises AdmissionRejected if the tier's queue already holds too much work, or if
+        the job's deadline passes while it waits: time in the queue counts against it.
+        `on_queued` is awaited with the queue position if the job has to wait.
+        """
+        tier = "premium" if is_premium else "free"
+        if self._queued_cost[tier] > 0 and self._queued_cost[tier] + cost > MAX_QUEUED_COST[tier]:
+            raise AdmissionRejected(f"{tier} queue is full")
+
+        ticket = _Ticket(next(self._ids), job.user_id, tier, cost, asyncio.get_running_loop().create_future())
+        self._queues[tier].append(ticket)
+        self._queued_cost[tier] += cost
+        self._dispatch()
+
+        try:
+            if not ticket.future.done():
+                position = self.queue_position(ticket)
+                logger.info(f"Job {job.id} queued at position {position} in the {tier} queue")
+                if on_queued is not None:
+                    await on_queued(position)
+            try:
+                await asyncio.wait_for(asyncio.shield(ticket.future), job.remaining)
+            except asyncio.TimeoutError:
+                raise AdmissionRejected(f"Job {job.id} reached its deadline in the {tier} queue") from None
+        except BaseException:
+            if ticket.future.done() and not ticket.future.cancelled():
+                self._release(ticket)
+            elif ticket in self._queues[tier]:
+                self._queues[tier].remove(ticket)
+                self._queued_cost[tier] -= ticket.cost
+            raise
+
+        job.add_cleanup(lambda: self._release(ticket))
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "running": self._running_total,
+            "queued_premium": len(self._queues["premium"]),
+            "queued_free": len(self._queues["free"]),
+        }
+
+
+job_scheduler = JobScheduler()
@@ -0,0 +1,211 @@
+import time
+import asyncio
+import logging
+import contextlib
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, Callable, Optional, Set, Iterable
+
+logger = logging.getLogger(__name__)
+
+STATS_RECONCILE_INTERVAL = 15 * 60  # seconds between reconciliations against the database
+USER_STATS_TTL = 60 * 60  # seconds before a user's rollup is reloaded
+USER_STATS_MAX_USERS = 10000  # per-user rollups kept in memory, oldest loaded dropped first
+ROLLUP_DAYS = 30  # days of per-day rollups kept in memory
+
+TASHKENT_TZ = timezone(timedelta(hours=5))
+
+
+def _today() -> str:
+    return datetime.now(TASHKENT_TZ).date().isoformat()
+
+
+@contextlib.asynccontextmanager
+async def _no_hold():
+    yield
+
+
+class FileRollup:
+    """Counts of processed files by (file_type, status) plus successful processing time."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.processing_time_total = 0
+        self.processing_time_count = 0
+
+    def add(self, file_type: str, status: str, processing_time: int) -> None:
+        self.counts[(file_type, status)] += 1
+        if status == 'success':
+            self.processing_time_total += processing_time
+            self.processing_time_count += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def successful(self) -> int:
+        return sum(count for (_, status), count in self.counts.items() if status == 'success')
+
+    @property
+    def average_processing_time(self) -> float:
+        return self.processing_time_total / self.processing_time_count if self.processing_time_count else 0
+
+    def by_type(self) -> Dict[str, int]:
+        distribution: Counter = Counter()
+        for (file_type, _), count in self.counts.items():
+            distribution[file_type] += count
+        return dict(distribution)
+
+
+class StatsAggregator:
+    """Processing and activity statistics maintained incrementally in memory.
+
+    Rows from the telemetry stream update per-day and per-user rollups as they are
+    recorded. Totals start from a baseline loaded from the database and are
+    periodically reconciled against it to correct drift. Rows recorded but not
+    yet inserted by the telemetry sink are tracked so reconciling keeps them.
+    """
+
+    def __init__(self, reconcile_interval: float = STATS_RECONCILE_INTERVAL, user_ttl: float = USER_STATS_TTL,
+                 max_users: int = USER_STATS_MAX_USERS):
+        self.reconcile_interval = reconcile_interval
+        self.user_ttl = user_ttl
+        self.max_users = max_users
+        self.days: Dict[str, FileRollup] = {}
+        self.active_users: Dict[str, Set[str]] = {}
+        self._active_counts: Dict[str, int] = {}  # day -> users active that day according to the database
+        self._totals = FileRollup()  # baseline from the database plus rows recorded since
+        self._unwritten: Counter = Counter()  # (file_type, status) of rows the sink has not inserted yet
+        self._total_users = 0
+        self._new_users = 0
+        self._users: Dict[str, tuple] = {}  # user_id -> (loaded_at, FileRollup), in load order
+        self._sink = None
+        self._reconciled = False
+        self._reconcile_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, sink) -> None:
+        """Follow the rows recorded into and inserted by a TelemetrySink of processed files."""
+        self._sink = sink
+        sink.add_listener(self.record_file)
+        sink.add_write_listener(self.record_written)
+
+    def _day(self, day: str) -> FileRollup:
+        rollup = self.days.get(day)
+        if rollup is None:
+            rollup = self.days[day] = FileRollup()
+            for old_day in sorted(self.days)[:-ROLLUP_DAYS]:
+                del self.days[old_day]
+                self.active_users.pop(old_day, None)
+        return rollup
+
+    def record_file(self, row: Dict[str, Any]) -> None:
+        """Telemetry listener for processed_files rows."""
+        file_type, status, processing_time = row['file_type'], row['status'], row['processing_time']
+        self._day(_today()).add(file_type, status, processing_time)
+        self._totals.add(file_type, status, processing_time)
+        self._unwritten[(file_type, status)] += 1
+        entry = self._users.get(row['user_id'])
+        if entry is not None:
+            entry[1].add(file_type, status, processing_time)
+
+    def record_written(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Telemetry write listener: these rows are now counted by the database."""
+        # Counter subtraction drops counts at or below zero, e.g. for spilled rows replayed after a restart
+        self._unwritten -= Counter((row['file_type'], row['status']) for row in rows)
+
+    def record_activity(self, user_id: int) -> None:
+        self.active_users.setdefault(_today(), set()).add(str(user_id))
+
+    def record_new_user(self) -> None:
+        self._total_users += 1
+        self._new_users += 1
+
+    async def reconcile(self, load_totals: Callable[[], Dict[str, Any]]) -> None:
+        """Replace the in-memory totals with fresh counts from `load_totals` (run in a thread).
+
+        `load_totals` returns total_users, total_files, successful_files and the number
+        of users active today. File inserts are held back while it runs, so the rows
+        still unwritten afterwards are exactly the ones the database did not count.
+        """
+        async with self._reconcile_lock:
+            new_users = self._new_users
+            async with self._sink.holding_writes() if self._sink is not None else _no_hold():
+                totals = await asyncio.to_thread(load_totals)
+                baseline = FileRollup()
+                baseline.counts[('all', 'success')] = totals['successful_files']
+                baseline.counts[('all', 'error')] = totals['total_files'] - totals['successful_files']
+                baseline.counts.update(self._unwritten)
+                self._totals = baseline
+            # Users are inserted before they are recorded, so one recorded during the load may
+            # already be counted; the next reconciliation corrects that
+            self._total_users = totals['total_users'] + self._new_users - new_users
+            self._active_counts = {_today(): totals['active_users']}
+            self._reconciled = True
+            logger.info(f"Reconciled stats: {totals['total_files']} files, {totals['total_users']} users")
+
+    async def ensure_reconciled(self, load_totals: Callable[[], Dict[str, Any]]) -> None:
+        if not self._reconciled:
+            await self.reconcile(load_totals)
+
+    async def _reconcile_loop(self, load_totals: Callable[[], Dict[str, Any]]) -> None:
+        while True:
+            try:
+                await self.reconcile(load_totals)
+            except Exception as e:
+                logger.error(f"Error reconciling stats: {e}")
+            await asyncio.sleep(self.reconcile_interval)
+
+    async def start(self, load_totals: Callable[[], Dict[str, Any]]) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._reconcile_loop(load_totals))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def total_users(self) -> int:
+        return self._total_users
+
+    @property
+    def total_files(self) -> int:
+        return self._totals.total
+
+    @property
+    def success_rate(self) -> float:
+        total = self._totals.total
+        return (self._totals.successful / total) * 100 if total else 100.0
+
+    def today(self) -> FileRollup:
+        return self.days.get(_today()) or FileRollup()
+
+    @property
+    def todays_active_users(self) -> int:
+        # The database lags behind recorded activity and misses nothing from before a restart;
+        # without the ids behind its count, the larger of the two is the safe estimate
+        today = _today()
+        return max(len(self.active_users.get(today, ())), self._active_counts.get(today, 0))
+
+    async def get_user_rollup(self, user_id: int,
+                              load_rows: Callable[[str], Iterable[Dict[str, Any]]]) -> FileRollup:
+        """Return a user's rollup, building it from `load_rows` (run in a thread) when missing or stale."""
+        key = str(user_id)
+        entry = self._users.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.user_ttl:
+            return entry[1]
+        rows = await asyncio.to_thread(lambda: list(load_rows(key)))
+        rollup = FileRollup()
+        for row in rows:
+            rollup.add(row['file_type'], row['status'], row['processing_time'] or 0)
+        self._users.pop(key, None)
+        self._users[key] = (time.monotonic(), rollup)
+        while len(self._users) > self.max_users:
+            del self._users[next(iter(self._users))]
+        return rollup
@@ -0,0 +1,152 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_PATH = os.environ.get("SUMMARY_CACHE_PATH", "summary_cache.db")
+SUMMARY_CACHE_MEMORY_ITEMS = int(os.environ.get("SUMMARY_CACHE_MEMORY_ITEMS", "256"))
+SUMMARY_CACHE_MAX_BYTES = int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))  # 100MB on disk
+SUMMARY_CACHE_TTL = int(os.environ.get("SUMMARY_CACHE_TTL", str(30 * 24 * 60 * 60)))  # 30 days
+
+
+def make_cache_key(text: str, style: str, language: Optional[str], model: str, prompt_version: str) -> str:
+    """Build a content-addressed key for a summary request."""
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, style or "", language or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Two-tier summary cache: a bounded in-memory LRU in front of a SQLite store.
+
+    Entries expire after `ttl` seconds. The disk tier is trimmed oldest-accessed
+    first whenever its total payload grows past `max_bytes`.
+    """
+
+    def __init__(self, path: str = SUMMARY_CACHE_PATH, memory_items: int = SUMMARY_CACHE_MEMORY_ITEMS,
+                 max_bytes: int = SUMMARY_CACHE_MAX_BYTES, ttl: int = SUMMARY_CACHE_TTL):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            try:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS summaries ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                    "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries(accessed_at)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error opening summary cache at {self.path}: {e}")
+                self._conn = None
+        return self._conn
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_sync(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    row = conn.execute("SELECT value, created_at FROM summaries WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        if now - row[1] <= self.ttl:
+                            conn.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+                            conn.commit()
+                            self._remember(key, row[0], row[1])
+                            self.stats["disk_hits"] += 1
+                            return row[0]
+                        conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                        conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Error reading summary cache: {e}")
+
+            self.stats["misses"] += 1
+            return None
+
+    def set_sync(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._remember(key, value, now)
+            self.stats["stores"] += 1
+
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO summaries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error writing summary cache: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        removed = max(expired, 0)
+        if total > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM summaries ORDER BY accessed_at ASC").fetchall()
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                total -= size
+                removed += 1
+        self.stats["evictions"] += removed
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get_sync, key)
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.set_sync, key, value)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the admin dashboard."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_items"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = (hits / lookups * 100) if lookups else 0.0
+        return stats
+
+
+summary_cache = SummaryCache()
@@ -0,0 +1,176 @@
+import os
+import json
+import asyncio
+import logging
+import contextlib
+from typing import Dict, Any, List, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_QUEUE_SIZE = 1000
+TELEMETRY_BATCH_SIZE = 50
+TELEMETRY_FLUSH_INTERVAL = 10  # seconds
+TELEMETRY_SPILL_PATH = os.environ.get("TELEMETRY_SPILL_PATH", "telemetry_spill.jsonl")
+
+
+class TelemetrySink:
+    """Buffers rows in a bounded queue and bulk-inserts them into a table in the background.
+
+    A batch is written when it reaches `batch_size` rows or `flush_interval` seconds
+    after its first row. Rows that cannot be written (database down, queue full) are
+    appended to a local JSONL spill file and replayed after the next successful insert.
+    """
+
+    def __init__(self, client, table: str, batch_size: int = TELEMETRY_BATCH_SIZE,
+                 flush_interval: float = TELEMETRY_FLUSH_INTERVAL, max_queue: int = TELEMETRY_QUEUE_SIZE,
+                 spill_path: str = TELEMETRY_SPILL_PATH):
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._batch: List[Dict[str, Any]] = []  # rows taken off the queue but not yet written
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._write_listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self._write_lock = asyncio.Lock()
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Register a callback that sees every recorded row, e.g. to maintain live aggregates."""
+        self._listeners.append(listener)
+
+    def add_write_listener(self, listener: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """Register a callback that sees the rows of every successful insert."""
+        self._write_listeners.append(listener)
+
+    @contextlib.asynccontextmanager
+    async def holding_writes(self):
+        """Wait for the insert in progress, if any, and hold back further inserts until exit."""
+        async with self._write_lock:
+            yield
+
+    def record(self, row: Dict[str, Any]) -> None:
+        """Queue a row without waiting on the database."""
+        for listener in self._listeners:
+            try:
+                listener(row)
+            except Exception as e:
+                logger.error(f"Error in telemetry listener for {self.table}: {e}")
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            logger.warning(f"Telemetry queue for {self.table} is full, spilling row to disk")
+            self._spill([row])
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as spill_file:
+                for row in rows:
+                    spill_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Error spilling {len(rows)} telemetry rows: {e}")
+
+    def _take_spilled(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.spill_path):
+            return []
+        replay_path = self.spill_path + ".replay"
+        os.replace(self.spill_path, replay_path)
+        with open(replay_path, encoding='utf-8') as spill_file:
+            rows = [json.loads(line) for line in spill_file if line.strip()]
+        os.remove(replay_path)
+        return rows
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(rows), self.batch_size):
+            self.client.table(self.table).insert(rows[start:start + self.batch_size]).execute()
+
+    def _written(self, rows: List[Dict[str, Any]]) -> None:
+        logger.info(f"Inserted {len(rows)} rows into {self.table}")
+        for listener in self._write_listeners:
+            try:
+                listener(rows)
+            except Exception as e:
+                logger.error(f"Error in telemetry write listener for {self.table}: {e}")
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        # Worker threads run to completion even when stop() cancels the writer, so their
+        # outcome is awaited on cancellation rather than dropped along with the rows
+        insert = asyncio.ensure_future(asyncio.to_thread(self._insert, rows))
+        try:
+            await asyncio.shield(insert)
+        except asyncio.CancelledError:
+            try:
+                await insert
+                self._written(rows)
+            except Exception as e:
+                logger.error(f"Error inserting telemetry into {self.table}, spilling to disk: {e}")
+                self._spill(rows)
+            raise
+        except Exception as e:
+            logger.error(f"Error inserting telemetry into {self.table}, spilling to disk: {e}")
+            await asyncio.to_thread(self._spill, rows)
+            return
+        self._written(rows)
+
+        # The database is reachable again; replay anything spilled earlier
+        take = asyncio.ensure_future(asyncio.to_thread(self._take_spilled))
+        try:
+            spilled = await asyncio.shield(take)
+        except asyncio.CancelledError:
+            try:
+                self._spill(await take)
+            except Exception as e:
+                logger.error(f"Error reading telemetry spill file: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error reading telemetry spill file: {e}")
+            return
+        if spilled:
+            logger.info(f"Replaying {len(spilled)} spilled telemetry rows")
+            await self._write(spilled)
+
+    def _drain(self, batch: List[Dict[str, Any]]) -> None:
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch.append(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+            while len(self._batch) < self.batch_size:
+                self._drain(self._batch)
+                remaining = deadline - loop.time()
+                if len(self._batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            async with self._write_lock:
+                batch, self._batch = self._batch, []
+                await self._write(batch)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer and flush everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        rows, self._batch = self._batch, []
+        while not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        if rows:
+            async with self._write_lock:
+                await self._write(rows)
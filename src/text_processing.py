@@ -1,59 +1,157 @@
 import logging
 from datetime import datetime
 import re
-from typing import Optional
+import math
+import string
+from typing import List
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 MAX_TOKEN_LIMIT = 30000
 
+# Approximate tokens per character for Gemini's SentencePiece vocabulary, by code point range.
+# (first code point, weight); a range runs until the next entry.
+TOKEN_WEIGHT_RANGES = (
+    (0x00, 0.5),     # ASCII control characters and punctuation
+    (0x09, 0.25),    # tab, newline and other ASCII whitespace
+    (0x0E, 0.5),
+    (0x20, 0.0),     # space, merged into the following word piece
+    (0x21, 0.5),
+    (0x30, 1.0),     # digits are tokenized one by one
+    (0x3A, 0.5),
+    (0x41, 0.25),    # A-Z
+    (0x5B, 0.5),
+    (0x61, 0.25),    # a-z
+    (0x7B, 0.5),
+    (0x80, 0.4),     # Latin-1 and Latin Extended letters (Uzbek, Turkish, European)
+    (0x250, 0.5),    # IPA, modifier letters (Uzbek ʻ), Greek
+    (0x400, 0.33),   # Cyrillic
+    (0x530, 0.5),
+    (0x600, 0.4),    # Arabic
+    (0x700, 0.6),
+    (0x3000, 0.7),   # CJK punctuation and kana
+    (0x3100, 0.8),   # CJK ideographs
+    (0xA000, 1.0),
+    (0xAC00, 0.7),   # Hangul
+    (0xD7B0, 1.0),
+    (0x10000, 1.5),  # emoji and other astral characters
+)
+
+
+def _build_token_weight_table() -> np.ndarray:
+    table = np.empty(0x10001, dtype=np.float32)
+    for (start, weight), (end, _) in zip(TOKEN_WEIGHT_RANGES, TOKEN_WEIGHT_RANGES[1:] + ((0x10001, 0),)):
+        table[start:end] = weight
+    return table
+
+
+_TOKEN_WEIGHTS = _build_token_weight_table()
+
+# Runs of anything but word characters and common punctuation (whitespace included)
+CLEAN_TEXT_GARBAGE = re.compile(r'[^\w.,!?;:\'"()\[\]{}\-–—/]+')
+# PDF page references such as /12" or /3'
+PAGE_REFERENCE_PATTERN = re.compile(r'/\d+["\']')
+# Standalone tokens dropped by clean_text: separators and single Latin letters
+STRAY_TOKENS = frozenset('_-–—/' + string.ascii_letters)
+
 def format_timestamp(timestamp: datetime) -> str:
     return timestamp.strftime("%Y-%m-%d %H:%M:%S")
 
-def truncate_text(text: str, max_length: int = 3000) -> str:
-    if len(text) <= max_length:
-        return text
-    return text[:max_length] + "..."
-
-async def truncate_text(text: str, max_length: int = 16000) -> str:
+def truncate_text(text: str, max_length: int) -> str:
     """Truncate text to max_length while preserving word boundaries."""
     if len(text) <= max_length:
         return text
     return text[:max_length].rsplit(' ', 1)[0]
 
+def normalize_whitespace(text: str) -> str:
+    """Collapse all whitespace runs to single spaces and strip the ends."""
+    return ' '.join(text.split())
+
 def clean_text(text: str) -> str:
-    """Clean text from garbage characters and normalize spacing."""
-    text = re.sub(r'[^\w\s\.,!?;:\'\"()\[\]{}\-–—/]', ' ', text)
-    
-    text = re.sub(r'\s+', ' ', text)
-    
-    text = re.sub(r'\s[_\-–—/]\s', ' ', text)
-    
-    patterns = [
-        r'/\d+["\']',  
-        r'_[a-zA-Z]+<', 
-        r'>[a-zA-Z]+\s',  # Matches patterns like >l
-        r'\s[a-zA-Z]\s',  # Single letters
-        r'[<>]',  # Remove < and >
-    ]
-    
-    for pattern in patterns:
-        text = re.sub(pattern, ' ', text)
-    
-    # Clean up the result
-    text = text.strip()
-    text = re.sub(r'\s+', ' ', text)
-    
-    return text
+    """Clean text from garbage characters and normalize spacing.
+
+    Linear time: one precompiled character-class pass turns garbage characters and
+    whitespace runs into single spaces, then one pass over the tokens drops page
+    references, and stray separators and single Latin letters left by PDF extraction.
+    As before, a stray token is only dropped when whitespace (or garbage) surrounds it
+    on both sides, so a letter at the very start or end of the text is kept. Unlike the
+    old regex, which consumed the space after each match, every letter in a run such as
+    "a b c" is dropped, not every other one.
+    """
+    text = CLEAN_TEXT_GARBAGE.sub(' ', text)
+    if '/' in text:
+        text = PAGE_REFERENCE_PATTERN.sub(' ', text)
+    tokens = text.split(' ')
+    last = len(tokens) - 1
+    # A leading or trailing space leaves an empty first or last token, so inner positions are the surrounded ones
+    return ' '.join(token for i, token in enumerate(tokens)
+                    if token and (token not in STRAY_TOKENS or i == 0 or i == last))
 
-def detect_language(text: str) -> str:
-    cyrillic = len(re.findall(r'[а-яА-ЯёЁ]', text))
-    latin = len(re.findall(r'[a-zA-Z]', text))
-    uzbek = len(re.findall(r'[ўқғҳ]', text))
+def token_weights(text: str) -> np.ndarray:
+    """Estimated Gemini token cost of every character of `text`.
+
+    Weights depend on the script: English words average about four characters
+    per token, Cyrillic about three, CJK close to one, and digits exactly one.
+    """
+    code_points = np.frombuffer(text.encode('utf-32-le'), dtype='<u4')
+    return _TOKEN_WEIGHTS[np.minimum(code_points, 0x10000)]
+
+def estimate_tokens(text: str) -> int:
+    """Token count estimate for Gemini models, used for budgeting and chunking."""
+    if not text:
+        return 0
+    return math.ceil(float(token_weights(text).sum(dtype=np.float64)))
+
+def _split_sentences(text: str, max_chars: int) -> List[str]:
+    """Split text on sentence boundaries, and sentences longer than max_chars on word boundaries."""
+    parts = []
+    for sentence in re.split(r'(?<=[.!?…])\s+', text):
+        if len(sentence) <= max_chars:
+            parts.append(sentence)
+            continue
+        words = sentence.split(' ')
+        current = ""
+        for word in words:
+            while len(word) > max_chars:
+                if current:
+                    parts.append(current)
+                    current = ""
+                parts.append(word[:max_chars])
+                word = word[max_chars:]
+            if current and len(current) + 1 + len(word) > max_chars:
+                parts.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current:
+            parts.append(current)
+    return parts
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of about max_tokens, preferring sentence boundaries.
+
+    Callers pass clean_text output, which has no line breaks left, so chunks are
+    packed from whole sentences joined by single spaces.
+    """
+    text = text.strip()
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return [text] if text else []
+    # Chunk by characters at the text's average density
+    max_chars = max(1, int(max_tokens * len(text) / tokens))
     
-    if uzbek > 0 or ('oʻzbek' in text.lower()):
-        return 'uz'
-    elif cyrillic > latin:
-        return 'ru'
-    else:
-        return 'en' 
\ No newline at end of file
+    chunks = []
+    current = ""
+    for sentence in _split_sentences(text, max_chars):
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
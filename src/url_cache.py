@@ -0,0 +1,122 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+URL_CACHE_MAX_BYTES = int(os.environ.get("URL_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))  # 50MB of text
+URL_CACHE_FRESH_SECONDS = int(os.environ.get("URL_CACHE_FRESH_SECONDS", str(10 * 60)))  # served without revalidation
+URL_CACHE_MAX_AGE = int(os.environ.get("URL_CACHE_MAX_AGE", str(7 * 24 * 60 * 60)))  # dropped after this
+
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "mc_cid", "mc_eid", "igshid", "ref_src"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL so trivially different links share a cache entry.
+
+    Lowercases the scheme and host, drops default ports, fragments and tracking
+    parameters (utm_*, fbclid, ...), and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class CachedPage:
+    __slots__ = ("text", "size", "etag", "last_modified", "tier", "fetched_at", "validated_at")
+
+    def __init__(self, text: str, etag: Optional[str], last_modified: Optional[str], tier: str):
+        self.text = text
+        self.size = len(text.encode("utf-8"))
+        self.etag = etag
+        self.last_modified = last_modified
+        self.tier = tier
+        self.fetched_at = self.validated_at = time.time()
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class URLCache:
+    """In-memory cache of extracted page text keyed by normalized URL.
+
+    Entries younger than `fresh_seconds` are served directly. Older entries that
+    carry an ETag or Last-Modified header are revalidated with a conditional
+    request; those without validators are refetched. The cache is an LRU bounded
+    by the total size of the stored text.
+    """
+
+    def __init__(self, max_bytes: int = URL_CACHE_MAX_BYTES, fresh_seconds: float = URL_CACHE_FRESH_SECONDS,
+                 max_age: float = URL_CACHE_MAX_AGE):
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.max_age = max_age
+        self._pages: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._bytes = 0
+        self.stats = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "evictions": 0}
+
+    def lookup(self, key: str) -> Tuple[Optional[CachedPage], bool]:
+        """Return (page, fresh). A stale page can still be revalidated; None means fetch from scratch."""
+        now = time.time()
+        page = self._pages.get(key)
+        if page is not None and now - page.fetched_at > self.max_age:
+            self._remove(key)
+            page = None
+        if page is None:
+            self.stats["misses"] += 1
+            return None, False
+        self._pages.move_to_end(key)
+        fresh = now - page.validated_at <= self.fresh_seconds
+        if fresh:
+            self.stats["fresh_hits"] += 1
+        return page, fresh
+
+    def mark_validated(self, page: CachedPage) -> None:
+        page.validated_at = time.time()
+        self.stats["revalidated"] += 1
+
+    def set(self, key: str, text: str, tier: str, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        page = CachedPage(text, etag, last_modified, tier)
+        if page.size > self.max_bytes:
+            return
+        self._remove(key)
+        self._pages[key] = page
+        self._bytes += page.size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._pages))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        page = self._pages.pop(key, None)
+        if page is not None:
+            self._bytes -= page.size
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["entries"] = len(self._pages)
+        stats["bytes"] = self._bytes
+        return stats
+
+
+url_cache = URLCache()
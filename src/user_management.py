@@ -1,8 +1,13 @@
 import os
+import time
+import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
 from supabase import create_client, Client
-from typing import Optional
+from typing import Optional, Dict, Any, Tuple
+
+from src.telemetry import TelemetrySink
+from src.stats import StatsAggregator
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +27,113 @@ def get_tashkent_time():
 def get_translation(lang: str, key: str) -> str:
     return TRANSLATIONS.get(lang, TRANSLATIONS["en"]).get(key, TRANSLATIONS["en"][key])
 
+PROFILE_CACHE_TTL = 300  # seconds
+ACTIVITY_FLUSH_INTERVAL = 30  # seconds between batched last_interaction upserts
+
+class UserProfileStore:
+    """In-memory cache of simplelearn_users rows with write-behind activity updates.
+
+    A profile is loaded with a single query and served from memory until it expires
+    or is invalidated; lookups of users without a row always query the table by a language, style or premium change. Activity updates are
+    collected per user and written in one batched upsert every flush interval.
+    """
+
+    def __init__(self, client: Client, ttl: float = PROFILE_CACHE_TTL,
+                 flush_interval: float = ACTIVITY_FLUSH_INTERVAL):
+        self.client = client
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self._profiles: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._pending_activity: Dict[str, Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        response = self.client.table('simplelearn_users').select('*').eq('user_id', user_id).execute()
+        return response.data[0] if response.data else None
+
+    async def _fetch(self, user_id: str) -> Optional[Dict[str, Any]]:
+        profile = await asyncio.to_thread(self._load, user_id)
+        # Missing users are not cached: the activity flush or a language choice may create the row at any time
+        if profile is not None:
+            self._profiles[user_id] = (time.monotonic(), profile)
+        return profile
+
+    async def get_profile(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Return the user's row, or None if the user does not exist."""
+        key = str(user_id)
+        entry = self._profiles.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        # Concurrent misses for the same user share one query
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key))
+            self._loading[key] = task
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(task)
+
+    def invalidate(self, user_id: int) -> None:
+        self._profiles.pop(str(user_id), None)
+
+    def touch(self, user) -> None:
+        """Record user activity; it is written to the database on the next flush."""
+        key = str(user.id)
+        current_time = get_tashkent_time()
+        self._pending_activity[key] = {
+            'user_id': key,
+            'first_name': user.first_name,
+            'last_name': user.last_name if hasattr(user, 'last_name') else None,
+            'username': user.username if hasattr(user, 'username') else None,
+            'last_interaction': current_time
+        }
+        entry = self._profiles.get(key)
+        if entry is not None and entry[1] is not None:
+            entry[1]['last_interaction'] = current_time
+
+    async def flush(self) -> None:
+        if not self._pending_activity:
+            return
+        rows = list(self._pending_activity.values())
+        self._pending_activity = {}
+        try:
+            await asyncio.to_thread(
+                lambda: self.client.table('simplelearn_users').upsert(rows, on_conflict='user_id').execute()
+            )
+            logger.info(f"Flushed activity for {len(rows)} users")
+        except Exception as e:
+            logger.error(f"Error flushing user activity: {e}")
+            # Keep the rows for the next flush unless newer activity arrived meanwhile
+            for row in rows:
+                self._pending_activity.setdefault(row['user_id'], row)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+profile_store = UserProfileStore(supabase)
+
 async def get_user_language(user_id: int) -> str:
     try:
-        response = supabase.table('simplelearn_users').select('language').eq('user_id', str(user_id)).execute()
-        if response.data and len(response.data) > 0 and 'language' in response.data[0]:
-            return response.data[0]['language']
+        profile = await profile_store.get_profile(user_id)
+        if profile and 'language' in profile:
+            return profile['language']
     except Exception as e:
         logger.error(f"Error getting user language: {e}")
     return "en"
@@ -53,29 +160,21 @@ async def update_user_language(user_id: int, language: str) -> None:
         logger.info(f"Updated language to {language} for user {user_id}")
     except Exception as e:
         logger.error(f"Error updating user language: {e}")
+    finally:
+        profile_store.invalidate(user_id)
 
 async def update_user_activity(user) -> None:
     try:
-        current_time = get_tashkent_time()
-        user_data = {
-            'user_id': str(user.id),
-            'first_name': user.first_name,
-            'last_name': user.last_name if hasattr(user, 'last_name') else None,
-            'username': user.username if hasattr(user, 'username') else None,
-            'last_interaction': current_time
-        }
-        
-        # Update user data in simplelearn_users table
-        supabase.table('simplelearn_users').upsert(user_data, on_conflict='user_id').execute()
-        
-        logger.info(f"Updated user activity for user {user.id}")
+        # Written to simplelearn_users in the store's next batched upsert
+        profile_store.touch(user)
+        stats_aggregator.record_activity(user.id)
     except Exception as e:
         logger.error(f"Error updating user activity: {e}")
 
 async def get_total_users() -> int:
     try:
-        response = supabase.table('simplelearn_users').select('user_id', count='exact').execute()
-        return response.count if response.count is not None else 0
+        await stats_aggregator.ensure_reconciled(load_stats_totals)
+        return stats_aggregator.total_users
     except Exception as e:
         logger.error(f"Error getting total users: {e}")
         return 0
@@ -95,12 +194,14 @@ async def update_user_premium_status(user_id: int, is_premium: bool) -> None:
         logger.info(f"Updated premium status to {is_premium} for user {user_id}")
     except Exception as e:
         logger.error(f"Error updating user premium status: {e}")
+    finally:
+        profile_store.invalidate(user_id)
 
 async def get_user_premium_status(user_id: int) -> bool:
     try:
-        response = supabase.table('simplelearn_users').select('is_premium').eq('user_id', str(user_id)).execute()
-        if response.data and len(response.data) > 0 and 'is_premium' in response.data[0]:
-            return response.data[0]['is_premium']
+        profile = await profile_store.get_profile(user_id)
+        if profile and 'is_premium' in profile:
+            return profile['is_premium']
     except Exception as e:
         logger.error(f"Error getting user premium status: {e}")
     return False
@@ -115,9 +216,9 @@ async def get_total_premium_users() -> int:
 
 async def get_user_summary_style(user_id: int) -> str:
     try:
-        response = supabase.table('simplelearn_users').select('summary_style').eq('user_id', str(user_id)).execute()
-        if response.data and len(response.data) > 0 and 'summary_style' in response.data[0]:
-            return response.data[0]['summary_style']
+        profile = await profile_store.get_profile(user_id)
+        if profile and profile.get('summary_style'):
+            return profile['summary_style']
     except Exception as e:
         logger.error(f"Error getting user summary style: {e}")
     return "medium"  # Default to medium
@@ -171,6 +272,8 @@ async def update_user_summary_style(user_id: int, style: str) -> None:
     except Exception as e:
         logger.error(f"Error updating user summary style: {e}")
         raise  # Re-raise the exception to handle it in the calling function 
+    finally:
+        profile_store.invalidate(user_id)
 
 # SQL for creating the processed_files_simplelearn table
 """
@@ -191,6 +294,42 @@ CREATE INDEX IF NOT EXISTS idx_processed_files_user_id ON processed_files_simple
 CREATE INDEX IF NOT EXISTS idx_processed_files_created_at ON processed_files_simplelearn(created_at);
 """
 
+processed_files_sink = TelemetrySink(supabase, 'processed_files_simplelearn')
+stats_aggregator = StatsAggregator()
+stats_aggregator.attach(processed_files_sink)
+
+def _count(response) -> int:
+    return response.count if response.count is not None else 0
+
+def load_stats_totals() -> dict:
+    """Exact counts used to (re)build the in-memory stats baseline"""
+    tashkent_tz = timezone(timedelta(hours=5))
+    today = datetime.now(tashkent_tz).date()
+    today_start = datetime.combine(today, datetime.min.time(), tzinfo=tashkent_tz)
+    
+    total_users = supabase.table('simplelearn_users').select('user_id', count='exact').execute()
+    total_files = supabase.table('processed_files_simplelearn').select('id', count='exact').execute()
+    successful_files = supabase.table('processed_files_simplelearn').select('id', count='exact').eq('status', 'success').execute()
+    active_users = supabase.table('simplelearn_users') \
+        .select('user_id', count='exact') \
+        .gte('last_interaction', today_start.isoformat()) \
+        .execute()
+    
+    return {
+        'total_users': _count(total_users),
+        'total_files': _count(total_files),
+        'successful_files': _count(successful_files),
+        'active_users': _count(active_users)
+    }
+
+def load_user_file_rows(user_id: str) -> list:
+    """All of a user's processed files in one query"""
+    response = supabase.table('processed_files_simplelearn') \
+        .select('file_type, status, processing_time') \
+        .eq('user_id', user_id) \
+        .execute()
+    return response.data or []
+
 async def track_processed_file(
     user_id: int,
     file_type: str,
@@ -200,7 +339,7 @@ async def track_processed_file(
     error_message: Optional[str] = None
 ) -> None:
     """
-    Track a processed file in the database.
+    Track a processed file in the database. The row is queued and bulk-inserted later.
     
     Args:
         user_id: The user's ID
@@ -230,16 +369,16 @@ async def track_processed_file(
             'error_message': error_message
         }
         
-        response = supabase.table('processed_files_simplelearn').insert(data).execute()
-        logger.info(f"Tracked processed file for user {user_id}: {response.data}")
+        # Written in the background by the telemetry sink, off the request path
+        processed_files_sink.record(data)
     except Exception as e:
         logger.error(f"Error tracking processed file: {e}")
 
 async def get_user_processed_files_count(user_id: int) -> int:
     """Get the total number of files processed by a user"""
     try:
-        response = supabase.table('processed_files_simplelearn').select('id', count='exact').eq('user_id', str(user_id)).execute()
-        return response.count if response.count is not None else 0
+        rollup = await stats_aggregator.get_user_rollup(user_id, load_user_file_rows)
+        return rollup.total
     except Exception as e:
         logger.error(f"Error getting processed files count: {e}")
         return 0
@@ -247,29 +386,14 @@ async def get_user_processed_files_count(user_id: int) -> int:
 async def get_user_processed_files_stats(user_id: int) -> dict:
     """Get statistics about user's processed files"""
     try:
-        # Get total count
-        total_response = supabase.table('processed_files_simplelearn').select('id', count='exact').eq('user_id', str(user_id)).execute()
-        total_count = total_response.count if total_response.count is not None else 0
-        
-        # Get success count
-        success_response = supabase.table('processed_files_simplelearn').select('id', count='exact').eq('user_id', str(user_id)).eq('status', 'success').execute()
-        success_count = success_response.count if success_response.count is not None else 0
-        
-        # Get file type distribution
-        type_response = supabase.table('processed_files_simplelearn').select('file_type', count='exact').eq('user_id', str(user_id)).group_by('file_type').execute()
-        type_distribution = {item['file_type']: item['count'] for item in type_response.data} if type_response.data else {}
-        
-        # Get average processing time
-        time_response = supabase.table('processed_files_simplelearn').select('processing_time').eq('user_id', str(user_id)).eq('status', 'success').execute()
-        processing_times = [item['processing_time'] for item in time_response.data] if time_response.data else []
-        avg_processing_time = sum(processing_times) / len(processing_times) if processing_times else 0
+        rollup = await stats_aggregator.get_user_rollup(user_id, load_user_file_rows)
         
         return {
-            'total_files': total_count,
-            'successful_files': success_count,
-            'failed_files': total_count - success_count,
-            'file_type_distribution': type_distribution,
-            'average_processing_time': avg_processing_time
+            'total_files': rollup.total,
+            'successful_files': rollup.successful,
+            'failed_files': rollup.total - rollup.successful,
+            'file_type_distribution': rollup.by_type(),
+            'average_processing_time': rollup.average_processing_time
         }
     except Exception as e:
         logger.error(f"Error getting processed files stats: {e}")
@@ -284,8 +408,8 @@ async def get_user_processed_files_stats(user_id: int) -> dict:
 async def get_total_processed_files() -> int:
     """Get the total number of processed files"""
     try:
-        response = supabase.table('processed_files_simplelearn').select('id', count='exact').execute()
-        return response.count if response.count is not None else 0
+        await stats_aggregator.ensure_reconciled(load_stats_totals)
+        return stats_aggregator.total_files
     except Exception as e:
         logger.error(f"Error getting total processed files: {e}")
         return 0
@@ -293,18 +417,8 @@ async def get_total_processed_files() -> int:
 async def get_success_rate() -> float:
     """Calculate the success rate of file processing"""
     try:
-        # Get total count
-        total_response = supabase.table('processed_files_simplelearn').select('id', count='exact').execute()
-        total_count = total_response.count if total_response.count is not None else 0
-        
-        if total_count == 0:
-            return 100.0  # If no files processed yet, return 100%
-            
-        # Get success count
-        success_response = supabase.table('processed_files_simplelearn').select('id', count='exact').eq('status', 'success').execute()
-        success_count = success_response.count if success_response.count is not None else 0
-        
-        return (success_count / total_count) * 100
+        await stats_aggregator.ensure_reconciled(load_stats_totals)
+        return stats_aggregator.success_rate
     except Exception as e:
         logger.error(f"Error calculating success rate: {e}")
         return 0.0 
@@ -312,20 +426,8 @@ async def get_success_rate() -> float:
 async def get_todays_active_users() -> int:
     """Get the number of users who interacted with the bot today"""
     try:
-        # Get today's date in Tashkent timezone
-        tashkent_tz = timezone(timedelta(hours=5))
-        today = datetime.now(tashkent_tz).date()
-        today_start = datetime.combine(today, datetime.min.time(), tzinfo=tashkent_tz)
-        today_end = datetime.combine(today, datetime.max.time(), tzinfo=tashkent_tz)
-        
-        # Query users who interacted today
-        response = supabase.table('simplelearn_users') \
-            .select('user_id', count='exact') \
-            .gte('last_interaction', today_start.isoformat()) \
-            .lte('last_interaction', today_end.isoformat()) \
-            .execute()
-            
-        return response.count if response.count is not None else 0
+        await stats_aggregator.ensure_reconciled(load_stats_totals)
+        return stats_aggregator.todays_active_users
     except Exception as e:
         logger.error(f"Error getting today's active users: {e}")
-        return 0 
\ No newline at end of file
+        return 0
@@ -3,9 +3,10 @@ import logging
 import uuid
 import asyncio
 import tempfile
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, Union
 from moviepy import VideoFileClip
 from src.audio_processing import extract_text_from_audio
+from src.media_tools import extract_audio_track
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", 
@@ -22,52 +23,62 @@ logger.info("Info logging test")
 logger.warning("Warning logging test")
 logger.error("Error logging test")
 
-async def process_video_file(video_bytes: bytes, api_key: str, output_format: str = "mp3") -> Tuple[bool, str, Optional[str]]:
-    """Process video file and extract text using audio transcription."""
+def extract_audio_with_moviepy(video_path: str, audio_path: str, output_format: str = "mp3") -> None:
+    """Decode the video and re-encode its audio with MoviePy (slow fallback path)."""
+    video_clip = VideoFileClip(video_path)
+    try:
+        video_clip.audio.write_audiofile(
+            audio_path,
+            fps=44100,
+            nbytes=2,
+            codec='libmp3lame' if output_format == "mp3" else output_format,
+            bitrate='192k'
+        )
+    finally:
+        video_clip.close()
+
+async def process_video_file(video: Union[bytes, str], api_key: str, output_format: str = "mp3") -> Tuple[bool, str, Optional[str]]:
+    """Process video file and extract text using audio transcription.
+
+    `video` is either raw bytes or the path of an already-downloaded file, which is used in place.
+    """
     if not api_key:
         return False, "ElevenLabs API key is required", None
     
+    owns_video_file = not isinstance(video, str)
+    video_path = None
+    audio_path = None
+    
     try:
-        # Save video bytes to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_video:
-            temp_video.write(video_bytes)
-            video_path = temp_video.name
+        if owns_video_file:
+            # Save video bytes to a temporary file
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_video:
+                temp_video.write(video)
+                video_path = temp_video.name
+        else:
+            video_path = video
+        
+        # Fast path: demux the audio stream with ffmpeg
+        audio_path = await extract_audio_track(video_path)
+        
+        if audio_path is None:
+            logger.info("Falling back to MoviePy audio extraction")
+            audio_path = tempfile.mktemp(suffix=f'.{output_format}')
+            await asyncio.to_thread(extract_audio_with_moviepy, video_path, audio_path, output_format)
         
-        # Create temporary audio file path
-        audio_path = tempfile.mktemp(suffix=f'.{output_format}')
+        # Transcribe the audio straight from disk
+        success, message, transcript = await extract_text_from_audio(audio_path, api_key)
         
-        try:
-            # Extract audio using MoviePy
-            video = VideoFileClip(video_path)
-            video.audio.write_audiofile(
-                audio_path,
-                fps=44100,
-                nbytes=2,
-                codec='libmp3lame' if output_format == "mp3" else output_format,
-                bitrate='192k'
-            )
-            video.close()
-            
-            # Read the extracted audio
-            with open(audio_path, 'rb') as audio_file:
-                audio_bytes = audio_file.read()
-            
-            # Transcribe the audio
-            success, message, transcript = await extract_text_from_audio(audio_bytes, api_key)
-            
-            return success, message, transcript
-            
-        finally:
-            # Clean up temporary files
-            try:
-                os.unlink(video_path)
-            except:
-                pass
-            try:
-                os.unlink(audio_path)
-            except:
-                pass
+        return success, message, transcript
                 
     except Exception as e:
         logger.error(f"Error processing video: {e}")
-        return False, f"Error processing video: {str(e)}", None
\ No newline at end of file
+        return False, f"Error processing video: {str(e)}", None
+    finally:
+        # Clean up temporary files
+        for path in ([video_path] if owns_video_file else []) + [audio_path]:
+            if path:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
@@ -1,30 +1,83 @@
 import logging
 import aiohttp
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import scrapy
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
 import asyncio
+import time
+import functools
+from collections import OrderedDict
 from typing import Optional, Tuple
+from urllib.parse import urlparse
 import re
 
+from src.http_client import get_http_session, DEFAULT_USER_AGENT
+from src.browser_pool import browser_pool
+from src.crawl_worker import crawl_worker
+from src.url_cache import url_cache, normalize_url, CachedPage
+from src.content_extraction import extract_main_text
+from src.text_processing import normalize_whitespace
+
 logger = logging.getLogger(__name__)
 
+MIN_CONTENT_CHARS = 100  # extracted text shorter than this counts as a failed tier
+JS_SHELL_MAX_CHARS = 1000  # pages with less text than this are checked for a JavaScript-only shell
+JS_SHELL_PATTERN = re.compile(r'<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>', re.IGNORECASE)
+NOSCRIPT_PATTERN = re.compile(
+    r'<noscript[^>]*>[^<]*(?:enable javascript|javascript is (?:required|disabled)|turn on javascript)',
+    re.IGNORECASE
+)
+ROBOT_MESSAGE_PATTERN = re.compile(
+    r"(?:Please confirm that you and not a robot|"
+    r"We're sorry, but it looks like requests sent from your device are automated).*?Why might th\.\.\.",
+    re.DOTALL
+)
+
+# Statuses anti-bot protections answer with; a browser may get through where a plain fetch cannot
+BOT_CHECK_STATUSES = (403, 429, 503)
+
+# Extraction tiers from cheapest to most expensive
+EXTRACTION_TIERS = ("http", "browser", "scrapy")
+DOMAIN_TIER_TTL = 24 * 60 * 60  # seconds to remember which tier worked for a domain
+DOMAIN_TIER_MAX_ENTRIES = 5000
+
+
+class DomainTierMemory:
+    """Remembers which extraction tier last succeeded for each domain (bounded LRU with TTL)."""
+
+    def __init__(self, ttl: float = DOMAIN_TIER_TTL, max_entries: int = DOMAIN_TIER_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._tiers: OrderedDict = OrderedDict()
+
+    def get(self, domain: str) -> Optional[str]:
+        entry = self._tiers.get(domain)
+        if entry is None:
+            return None
+        tier, recorded_at = entry
+        if time.monotonic() - recorded_at > self.ttl:
+            del self._tiers[domain]
+            return None
+        self._tiers.move_to_end(domain)
+        return tier
+
+    def set(self, domain: str, tier: str) -> None:
+        self._tiers[domain] = (tier, time.monotonic())
+        self._tiers.move_to_end(domain)
+        while len(self._tiers) > self.max_entries:
+            self._tiers.popitem(last=False)
+
+
+domain_tiers = DomainTierMemory()
+
+
 class WebContentExtractor:
-    def __init__(self):
-        self.chrome_options = Options()
-        self.chrome_options.add_argument('--headless')
-        self.chrome_options.add_argument('--no-sandbox')
-        self.chrome_options.add_argument('--disable-dev-shm-usage')
-        self.chrome_options.add_argument('--disable-gpu')
-        self.chrome_options.add_argument('--window-size=1920,1080')
-        self.chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        # HTTP requests use the shared application session unless one is injected
+        self.session = session
+        # Validators of the last HTTP-tier response, and whether it was a 304 for a cached page
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.not_modified = False
+        # Whether the last HTTP-tier failure is one the heavier tiers may get past
+        self.escalate = False
 
     def is_robot_check(self, text: str) -> bool:
         robot_phrases = [
@@ -37,42 +90,33 @@ class WebContentExtractor:
         ]
         return any(phrase.lower() in text.lower() for phrase in robot_phrases)
 
+    def needs_browser(self, html: str, text: str) -> Optional[str]:
+        """Reason why a plain HTTP fetch did not yield the real content, or None if it did."""
+        if self.is_robot_check(text):
+            return "Robot verification required"
+        if len(text) < MIN_CONTENT_CHARS:
+            return "Page has almost no text without JavaScript"
+        if len(text) < JS_SHELL_MAX_CHARS:
+            if JS_SHELL_PATTERN.search(html):
+                return "Page is a JavaScript application shell"
+            if NOSCRIPT_PATTERN.search(html):
+                return "Page requires JavaScript"
+        return None
+
     def clean_text(self, text: str) -> str:
         # Remove robot check messages
-        text = re.sub(r'Please confirm that you and not a robot.*?Why might th\.\.\.', '', text, flags=re.DOTALL)
-        text = re.sub(r"We're sorry, but it looks like requests sent from your device are automated.*?Why might th\.\.\.", '', text, flags=re.DOTALL)
+        text = ROBOT_MESSAGE_PATTERN.sub('', text)
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        
-        return text
+        return normalize_whitespace(text)
 
     async def extract_with_selenium(self, url: str) -> Tuple[bool, str]:
         try:
-            driver = webdriver.Chrome(options=self.chrome_options)
-            driver.get(url)
-            
-            # Wait for content to load
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Get the page source
-            html = driver.page_source
-            
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(html, 'html.parser')
+            # Render the page in a warm pooled browser
+            html = await browser_pool.fetch_html(url)
             
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'header', 'footer', 'nav', 'aside', 'ads', 'iframe']):
-                element.decompose()
-            
-            # Try to find main content
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content') or soup
-            
-            # Extract text
-            text = main_content.get_text(separator='\n')
+            # Extract the main content block
+            text = await asyncio.to_thread(extract_main_text, html)
             
             # Clean up text
             text = self.clean_text(text)
@@ -81,55 +125,38 @@ class WebContentExtractor:
             if self.is_robot_check(text):
                 return False, "Robot verification required"
             
-            driver.quit()
             return True, text
         except Exception as e:
             logger.error(f"Selenium extraction failed for {url}: {e}")
-            if 'driver' in locals():
-                driver.quit()
             return False, str(e)
 
     async def extract_with_scrapy(self, url: str) -> Tuple[bool, str]:
         try:
-            class WebSpider(scrapy.Spider):
-                name = 'web_spider'
-                start_urls = [url]
-                
-                def parse(self, response):
-                    # Remove unwanted elements
-                    for selector in ['script', 'style', 'header', 'footer', 'nav', 'aside', 'ads', 'iframe']:
-                        response.css(selector).drop()
-                    
-                    # Try to find main content
-                    main_content = response.css('main, article, div.content').get() or response.body.decode()
-                    
-                    # Extract text
-                    text = ' '.join(main_content.split())
-                    return {'text': text}
-
-            process = CrawlerProcess(get_project_settings())
-            process.crawl(WebSpider)
-            process.start()
+            # Fetch through the long-lived Scrapy worker process
+            html = await crawl_worker.fetch_html(url)
             
-            # Get the result from the spider
-            result = process.crawler.stats.get_value('item_scraped_count', 0)
-            if result > 0:
-                text = process.crawler.stats.get_value('text', '')
-                text = self.clean_text(text)
-                
-                if self.is_robot_check(text):
-                    return False, "Robot verification required"
-                    
-                return True, text
-            return False, "No content found"
+            text = await asyncio.to_thread(extract_main_text, html)
+            text = self.clean_text(text)
+            
+            if self.is_robot_check(text):
+                return False, "Robot verification required"
+            
+            return True, text
         except Exception as e:
             logger.error(f"Scrapy extraction failed for {url}: {e}")
             return False, str(e)
 
-    async def extract_with_requests(self, url: str) -> Tuple[bool, str]:
+    async def extract_with_requests(self, url: str, cached: Optional[CachedPage] = None) -> Tuple[bool, str]:
+        """Fetch and extract the page with a plain HTTP request.
+
+        On failure `escalate` tells whether a browser could do better: only for pages
+        that need JavaScript or a robot check, and for bot-check statuses. Missing
+        pages, other error statuses, DNS failures and timeouts are final.
+        """
+        self.escalate = False
         try:
             headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'User-Agent': DEFAULT_USER_AGENT,
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 'Accept-Language': 'en-US,en;q=0.5',
                 'Accept-Encoding': 'gzip, deflate, br',
@@ -138,56 +165,94 @@ class WebContentExtractor:
                 'Cache-Control': 'max-age=0',
                 'TE': 'Trailers'
             }
+            if cached is not None:
+                headers.update(cached.conditional_headers())
             
             timeout = aiohttp.ClientTimeout(total=30)
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url, 
-                    headers=headers, 
-                    timeout=timeout, 
-                    allow_redirects=True,
-                    ssl=False
-                ) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        for element in soup(['script', 'style', 'header', 'footer', 'nav', 'aside', 'ads', 'iframe']):
-                            element.decompose()
-                        
-                        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content') or soup
-                        
-                        text = main_content.get_text(separator='\n')
-                        text = self.clean_text(text)
-                        
-                        if self.is_robot_check(text):
-                            return False, "Robot verification required"
-                        
-                        return True, text
-                    else:
-                        return False, f"Error: Could not access the website (Status code: {response.status})"
+            session = self.session or get_http_session()
+            async with session.get(
+                url, 
+                headers=headers, 
+                timeout=timeout, 
+                allow_redirects=True,
+                ssl=False
+            ) as response:
+                if response.status == 304 and cached is not None:
+                    self.not_modified = True
+                    return True, cached.text
+                if response.status == 200:
+                    self.etag = response.headers.get('ETag')
+                    self.last_modified = response.headers.get('Last-Modified')
+                    html = await response.text()
+                    text = await asyncio.to_thread(extract_main_text, html)
+                    text = self.clean_text(text)
+                    
+                    reason = self.needs_browser(html, text)
+                    if reason:
+                        self.escalate = True
+                        return False, reason
+                    
+                    return True, text
+                else:
+                    self.escalate = response.status in BOT_CHECK_STATUSES
+                    return False, f"Could not access the website (Status code: {response.status})"
+        except asyncio.TimeoutError:
+            logger.error(f"Requests extraction timed out for {url}")
+            return False, "The website took too long to respond"
         except Exception as e:
             logger.error(f"Requests extraction failed for {url}: {e}")
             return False, str(e)
 
-async def extract_text_from_url(url: str) -> str:
+async def extract_text_from_url(url: str, session: Optional[aiohttp.ClientSession] = None) -> str:
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
 
-    extractor = WebContentExtractor()
+    # Repeated links are served from the cache, revalidated with a conditional request once stale
+    cache_key = normalize_url(url)
+    cached, fresh = url_cache.lookup(cache_key)
+    if fresh:
+        logger.info(f"Serving {url} from the URL cache")
+        return cached.text
+    revalidate = cached if cached is not None and cached.has_validators else None
+
+    extractor = WebContentExtractor(session)
+    methods = {
+        "http": functools.partial(extractor.extract_with_requests, cached=revalidate),
+        "browser": extractor.extract_with_selenium,
+        "scrapy": extractor.extract_with_scrapy
+    }
     
-    # Try each method in sequence
-    methods = [
-        extractor.extract_with_selenium,
-        extractor.extract_with_scrapy,
-        extractor.extract_with_requests
-    ]
+    # Cheapest tier first, unless this domain is known to need a heavier one
+    domain = (urlparse(url).hostname or "").lower()
+    known_tier = domain_tiers.get(domain)
+    tiers = list(EXTRACTION_TIERS)
+    if known_tier in tiers:
+        tiers.remove(known_tier)
+        tiers.insert(0, known_tier)
     
-    for method in methods:
-        success, result = await method(url)
-        if success and result and len(result) > 100:
+    result = ""
+    for tier in tiers:
+        start_time = time.monotonic()
+        success, result = await methods[tier](url)
+        if success and result and len(result) > MIN_CONTENT_CHARS:
+            domain_tiers.set(domain, tier)
+            if extractor.not_modified:
+                url_cache.mark_validated(cached)
+            elif tier == "http":
+                url_cache.set(cache_key, result, tier, extractor.etag, extractor.last_modified)
+            else:
+                url_cache.set(cache_key, result, tier)
+            logger.info(f"Extracted {url} with the {tier} tier in {time.monotonic() - start_time:.2f}s")
             return result
+        if tier == "http" and not success and not extractor.escalate:
+            if tier == tiers[0]:
+                logger.info(f"http tier could not fetch {url}, not escalating: {result}")
+                return f"Error: Could not extract content from URL. {result}"
+            # A heavier tier already failed first; the ones after this still get their turn
+            logger.info(f"http tier could not fetch {url}: {result}")
+            continue
+        logger.info(f"{tier} tier did not extract {url}, escalating: {result}")
     
     # If all methods fail, return the last error message
     return f"Error: Could not extract content from URL. All methods failed. Last error: {result}" 
\ No newline at end of file
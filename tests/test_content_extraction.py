@@ -0,0 +1,32 @@
+from src.content_extraction import extract_main_text
+
+ARTICLE = (
+    "The council approved the new budget on Tuesday, after three hours of debate. "
+    "Funding for public libraries rises by ten percent, while road maintenance, "
+    "parks and street lighting keep last year's allocation. "
+    "Opponents argued that the increase, modest as it is, comes at the expense of "
+    "long-delayed repairs to the main bridge, which engineers rated as poor."
+)
+
+
+def test_extract_main_text_reads_form_wrapped_pages():
+    html = f"""<html><body><form method="post" action="./Article.aspx" id="aspnetForm">
+        <input type="hidden" name="__VIEWSTATE" value="abc">
+        <header><h1>City news</h1><nav><a href="/">Home</a> <a href="/news">News</a></nav></header>
+        <div id="content"><p>{ARTICLE}</p><p>{ARTICLE}</p></div>
+        <footer>Copyright</footer>
+    </form></body></html>"""
+    text = extract_main_text(html)
+    assert ARTICLE in text
+    assert "Home" not in text
+    assert "Copyright" not in text
+
+
+def test_extract_main_text_keeps_article_headers():
+    html = f"""<html><body><article>
+        <header><h1>Budget approved</h1></header>
+        <p>{ARTICLE}</p><p>{ARTICLE}</p>
+    </article></body></html>"""
+    text = extract_main_text(html)
+    assert "Budget approved" in text
+    assert ARTICLE in text
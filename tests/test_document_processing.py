@@ -0,0 +1,30 @@
+import random
+import re
+
+from src.document_processing import PDF_NOISE_REGEX, remove_pdf_noise
+
+ALPHABET = ['/', '1', '2', '"', "'", '/1"\'', '<', '>', 'a', 'ж', '_', ' ', '\t', '\n', '.', '(', ',', '-']
+
+
+def _legacy_remove_pdf_noise(text: str) -> str:
+    return re.sub(PDF_NOISE_REGEX, ' ', text)
+
+
+def test_remove_pdf_noise_matches_regex_on_fuzzed_corpus():
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = ''.join(rng.choices(ALPHABET, k=rng.randint(0, 60)))
+        assert remove_pdf_noise(text) == _legacy_remove_pdf_noise(text), repr(text)
+
+
+def test_remove_pdf_noise_requires_word_before_angle():
+    assert remove_pdf_noise('/12"\'< abc.') == '/12"\'< abc.'
+    assert remove_pdf_noise('x /12"\'ab < c. y') == 'x   y'
+
+
+def test_remove_pdf_noise_angle_on_next_line():
+    # `\s*` before the angle may span a line break
+    assert remove_pdf_noise('/1"\'abc\n> tail. end') == '  end'
+    # No end character after the first angle: the regex backtracks to the angle on the next line
+    assert remove_pdf_noise('/1"\'a<b\n> tail. end') == '  end'
+    assert remove_pdf_noise('/1"\'a<b\nc\n> tail.') == '/1"\'a<b\nc\n> tail.'
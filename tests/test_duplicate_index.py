@@ -0,0 +1,21 @@
+from src.duplicate_index import DuplicateIndex
+
+TEXT = ("Photosynthesis converts light energy into chemical energy stored in glucose, "
+        "releasing oxygen as a by-product of splitting water molecules in the chloroplasts.")
+
+
+def test_load_keeps_current_signatures_and_rebuilds_stale_ones(tmp_path):
+    path = str(tmp_path / "index.db")
+    index = DuplicateIndex(path=path)
+    index.add_sync("current", TEXT, "v")
+    index.add_sync("stale", TEXT + " Plants", "v")
+    index._conn.execute("UPDATE documents SET params = 'old', signature = NULL WHERE key = 'stale'")
+    index._conn.execute("UPDATE documents SET text = x'00' WHERE key = 'current'")  # never read back
+    index._conn.commit()
+
+    reloaded = DuplicateIndex(path=path)
+    assert reloaded.find_sync(TEXT, "v")[0] == "current"
+    assert reloaded.get_stats()["documents"] == 2
+    assert reloaded.find_sync(TEXT, "other") is None
+    params = reloaded._conn.execute("SELECT params FROM documents WHERE key = 'stale'").fetchone()[0]
+    assert params != "old"
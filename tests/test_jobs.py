@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+from src.jobs import JobContext
+
+
+def test_run_reports_deadline_in_the_error_message():
+    async def scenario():
+        async with JobContext(1, "document", timeout=0.01) as job:
+            await job.run(asyncio.sleep(1))
+
+    with pytest.raises(asyncio.TimeoutError, match="took too long"):
+        asyncio.run(scenario())
+
+
+def test_run_passes_through_timeouts_of_the_awaitable():
+    async def timing_out():
+        raise asyncio.TimeoutError("ffmpeg timed out")
+
+    async def scenario():
+        async with JobContext(1, "video", timeout=60) as job:
+            await job.run(timing_out())
+
+    with pytest.raises(asyncio.TimeoutError, match="ffmpeg timed out"):
+        asyncio.run(scenario())
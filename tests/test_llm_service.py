@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+from src import llm_service
+
+LONG_TEXT = " ".join(f"Sentence number {i} explains a separate idea in detail." for i in range(3000))
+PARTIAL = json.dumps({"title": "Part", "points": [{"title": "P", "key_points": ["k"], "summary": "s"}]})
+
+
+def _summarize(monkeypatch, fail_first_chunk):
+    stored = []
+    calls = []
+
+    async def invoke(messages, user_id=None):
+        calls.append(messages)
+        if fail_first_chunk and "section 1 of" in messages[-1]["content"]:
+            raise RuntimeError("model error")
+        return PARTIAL
+
+    async def store(*args):
+        stored.append(args)
+
+    monkeypatch.setattr(llm_service, "_invoke_llm", invoke)
+    monkeypatch.setattr(llm_service, "_store_summary", store)
+    summary = asyncio.run(llm_service._summarize_uncached(LONG_TEXT, "medium", "en", None, "key", LONG_TEXT))
+    return summary, stored
+
+
+def test_complete_map_reduce_summaries_are_stored(monkeypatch):
+    summary, stored = _summarize(monkeypatch, fail_first_chunk=False)
+    assert summary and len(stored) == 1
+
+
+def test_degraded_map_reduce_summaries_are_not_stored(monkeypatch):
+    summary, stored = _summarize(monkeypatch, fail_first_chunk=True)
+    assert summary and stored == []
+
+
+def test_near_duplicates_are_scoped_to_the_user(monkeypatch, tmp_path):
+    from src.duplicate_index import DuplicateIndex
+    from src.summary_cache import SummaryCache
+
+    monkeypatch.setattr(llm_service, "duplicate_index", DuplicateIndex(path=str(tmp_path / "index.db")))
+    monkeypatch.setattr(llm_service, "summary_cache", SummaryCache(path=str(tmp_path / "cache.db")))
+    text = LONG_TEXT[:5000]
+
+    async def scenario():
+        await llm_service._store_summary("key", "summary", llm_service.clean_text(text), "medium", "en", 1)
+        own = await llm_service.find_similar_summary(text, "en", user_id=1)
+        other = await llm_service.find_similar_summary(text, "en", user_id=2)
+        return own, other
+
+    monkeypatch.setattr(llm_service, "_summary_language", lambda text, user_language: "en")
+    own, other = asyncio.run(scenario())
+    assert own[0] == "summary"
+    assert other is None
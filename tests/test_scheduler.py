@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from src.jobs import JobContext
+from src.scheduler import JobScheduler, AdmissionRejected
+
+
+def test_queued_jobs_are_rejected_at_their_deadline():
+    async def scenario():
+        scheduler = JobScheduler(max_running=1)
+        async with JobContext(1, "document") as running:
+            await scheduler.admit(running, False, 1.0)
+            async with JobContext(2, "document", timeout=0.05) as waiting:
+                with pytest.raises(AdmissionRejected):
+                    await scheduler.admit(waiting, False, 1.0)
+        assert scheduler.get_stats() == {"running": 0, "queued_premium": 0, "queued_free": 0}
+
+    asyncio.run(scenario())
+
+
+def test_jobs_without_deadline_wait_for_a_slot():
+    async def scenario():
+        scheduler = JobScheduler(max_running=1)
+        async with JobContext(1, "document") as running:
+            await scheduler.admit(running, False, 1.0)
+        async with JobContext(2, "document") as waiting:
+            await scheduler.admit(waiting, False, 1.0)
+            assert scheduler.get_stats()["running"] == 1
+
+    asyncio.run(scenario())
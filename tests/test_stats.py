@@ -0,0 +1,123 @@
+import time
+import asyncio
+
+from src.stats import StatsAggregator
+from src.telemetry import TelemetrySink
+
+
+class _Table:
+    def __init__(self, inserted):
+        self.inserted = inserted
+
+    def insert(self, rows):
+        self.inserted.extend(rows)
+        return self
+
+    def execute(self):
+        return None
+
+
+class _Client:
+    def __init__(self):
+        self.inserted = []
+
+    def table(self, name):
+        return _Table(self.inserted)
+
+
+def _row(status='success'):
+    return {'user_id': '1', 'file_type': 'pdf', 'status': status, 'processing_time': 3}
+
+
+def _totals(client):
+    successful = sum(1 for row in client.inserted if row['status'] == 'success')
+    return {'total_users': 1, 'total_files': len(client.inserted), 'successful_files': successful,
+            'active_users': 0}
+
+
+def test_reconcile_keeps_rows_not_yet_inserted(tmp_path):
+    async def scenario():
+        client = _Client()
+        sink = TelemetrySink(client, 'files', flush_interval=60, spill_path=str(tmp_path / 'spill.jsonl'))
+        stats = StatsAggregator()
+        stats.attach(sink)
+        await sink.start()
+        sink.record(_row())
+        sink.record(_row('error'))
+        await stats.reconcile(lambda: _totals(client))
+        assert stats.total_files == 2
+        assert stats.success_rate == 50.0
+
+        await sink.stop()
+        assert len(client.inserted) == 2
+        await stats.reconcile(lambda: _totals(client))
+        assert stats.total_files == 2
+
+    asyncio.run(scenario())
+
+
+def test_reconcile_keeps_rows_recorded_while_loading(tmp_path):
+    async def scenario():
+        client = _Client()
+        sink = TelemetrySink(client, 'files', batch_size=1, spill_path=str(tmp_path / 'spill.jsonl'))
+        stats = StatsAggregator()
+        stats.attach(sink)
+        await sink.start()
+        loop = asyncio.get_running_loop()
+
+        def load_totals():
+            totals = _totals(client)
+            # Recorded after the counts were taken: it must stay unwritten until the load ends
+            asyncio.run_coroutine_threadsafe(_record(sink), loop).result()
+            return totals
+
+        await stats.reconcile(load_totals)
+        assert stats.total_files == 1
+        await sink.stop()
+        assert len(client.inserted) == 1
+
+    async def _record(sink):
+        sink.record(_row())
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+
+
+def test_user_rollups_are_bounded():
+    async def scenario():
+        stats = StatsAggregator(max_users=2)
+        for user_id in (1, 2, 3):
+            await stats.get_user_rollup(user_id, lambda key: [_row()])
+        assert list(stats._users) == ['2', '3']
+
+    asyncio.run(scenario())
+
+
+def test_stop_spills_the_batch_being_inserted(tmp_path):
+    import json
+    import threading
+
+    started = threading.Event()
+
+    class _FailingClient:
+        def table(self, name):
+            return self
+
+        def insert(self, rows):
+            return self
+
+        def execute(self):
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("database down")
+
+    async def scenario():
+        spill_path = tmp_path / 'spill.jsonl'
+        sink = TelemetrySink(_FailingClient(), 'files', batch_size=1, spill_path=str(spill_path))
+        await sink.start()
+        sink.record(_row())
+        await asyncio.to_thread(started.wait, 1)
+        await sink.stop()
+        return [json.loads(line) for line in spill_path.read_text().splitlines()]
+
+    assert asyncio.run(scenario()) == [_row()]
@@ -0,0 +1,12 @@
+from src.text_processing import clean_text
+
+
+def test_clean_text_keeps_stray_tokens_at_text_boundaries():
+    assert clean_text('a cat sat') == 'a cat sat'
+    assert clean_text('cat sat b') == 'cat sat b'
+    assert clean_text(' a cat b ') == 'cat'
+
+
+def test_clean_text_drops_surrounded_stray_tokens():
+    assert clean_text('x a b c y') == 'x y'
+    assert clean_text('cat - dog /12" end') == 'cat dog end'
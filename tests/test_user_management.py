@@ -0,0 +1,41 @@
+import asyncio
+
+from src.user_management import UserProfileStore
+
+
+class _Query:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def execute(self):
+        return type('Response', (), {'data': list(self.rows)})()
+
+
+class _Client:
+    def __init__(self):
+        self.rows = []
+        self.queries = 0
+
+    def table(self, name):
+        self.queries += 1
+        return _Query(self.rows)
+
+
+def test_missing_users_are_not_cached():
+    async def scenario():
+        client = _Client()
+        store = UserProfileStore(client)
+        assert await store.get_profile(1) is None
+        client.rows.append({'user_id': '1', 'language': 'uz'})
+        assert (await store.get_profile(1))['language'] == 'uz'
+        queries = client.queries
+        assert (await store.get_profile(1))['language'] == 'uz'
+        assert client.queries == queries
+
+    asyncio.run(scenario())